@@ -1,18 +1,17 @@
-from fastapi import FastAPI, HTTPException, Body, Depends
+from fastapi import FastAPI, HTTPException, Body, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any, Union
-from datetime import datetime
-from runtime.flow_runner import run, save_scenario, list_scenarios
-from scenario.scenario import get_all_field_paths, TestScenario as TestScenarioModel  # Renamed to avoid conflict
-from runtime.flow_runner import get_scenario_path, is_yaml_exists, yaml_file_to_object
-from scenario.scenario import get_value_from_path
-from difflib import get_close_matches
+from datetime import datetime, timezone
+import asyncio
 import json
 import os
 import traceback
 import logging  # Import logging
-from database import get_db
+# The scenario runtime and validators are imported inside the routes that use them, and the
+# database engine is created on first use, so the app itself starts quickly
+from database import get_db, SessionLocal, check_health
 from sqlalchemy.orm import Session
 from repositories import template_repository
 
@@ -40,6 +39,8 @@ class APIRequestModel(BaseModel):
     # Add assertions if they are part of the request model sent from frontend
     assertions: Optional[List[Dict[str, Any]]] = None
     save_as: Optional[str] = None
+    # {variable: JSONPath or dotted path} of the values to keep from the response
+    extract: Optional[Dict[str, str]] = None
 
 
 class ScenarioRequest(BaseModel):
@@ -56,6 +57,7 @@ class ScenarioRequest(BaseModel):
 @app.get("/api/scenarios")
 def get_scenarios():
     """Return list of scenario names as strings to match frontend expectations"""
+    from runtime.flow_runner import list_scenarios  # Local import
     logger.info("Received request for /api/scenarios")
     try:
         scenarios = list_scenarios()
@@ -69,15 +71,10 @@ def get_scenarios():
 @app.get("/api/scenarios/{name}")
 def get_scenario(name: str):
     """Return full scenario details by name"""
+    from runtime.flow_runner import read_scenario  # Local import
     logger.info(f"Received request for /api/scenarios/{name}")
     try:
-        path = get_scenario_path(name)
-
-        if not is_yaml_exists(path):
-            logger.warning(f"Scenario '{name}' not found at path: {path}")
-            raise HTTPException(status_code=404, detail=f"Scenario '{name}' not found")
-
-        scenario_obj = yaml_file_to_object(path, TestScenarioModel)  # Use aliased TestScenarioModel
+        scenario_obj = read_scenario(name)  # Cached; only re-read when the file changes
         # Ensure to_dict method exists and is called correctly
         if hasattr(scenario_obj, 'to_dict') and callable(getattr(scenario_obj, 'to_dict')):
             scenario_dict = scenario_obj.to_dict()
@@ -108,6 +105,8 @@ def get_scenario(name: str):
 @app.post("/api/scenarios")
 def create_scenario(scenario: ScenarioRequest):
     """Create a new scenario with data from the frontend"""
+    from runtime.flow_runner import save_scenario  # Local import
+    from scenario.scenario import TestScenario as TestScenarioModel  # Renamed to avoid conflict
     logger.info(f"Received request to create scenario: {scenario.name}")
     try:
         if not scenario.id:
@@ -151,6 +150,7 @@ def create_scenario(scenario: ScenarioRequest):
 @app.post("/api/scenarios/{name}/run")
 def run_scenario_endpoint(name: str, body: dict = Body(...)):  # Renamed from run to avoid conflict
     """Run a scenario by name and return the result"""
+    from runtime.flow_runner import run  # Local import
     logger.info(f"Received request to run scenario: {name} with body: {body}")
     try:
         environment = body.get("environment", "localDev")
@@ -158,7 +158,7 @@ def run_scenario_endpoint(name: str, body: dict = Body(...)):  # Renamed from ru
             logger.warning("Environment not provided in run request, defaulting to 'localDev'.")
             environment = "localDev"
 
-        result = run(name, environment)  # Call the original run function
+        result = run(name, environment, body.get("concurrency"))  # Call the original run function
         logger.info(f"Scenario '{name}' executed with result: {result}")
         return result
     except Exception as e:
@@ -167,6 +167,165 @@ def run_scenario_endpoint(name: str, body: dict = Body(...)):  # Renamed from ru
         raise HTTPException(status_code=400, detail=error_details)
 
 
+@app.post("/api/scenarios/{name}/run/async")
+async def run_scenario_async_endpoint(name: str, body: dict = Body(...)):
+    """Run a scenario by name on the event loop, so long runs don't hold a threadpool worker"""
+    from runtime.flow_runner import run_async  # Local import
+    logger.info(f"Received request to run scenario asynchronously: {name} with body: {body}")
+    try:
+        environment = body.get("environment", "localDev")
+        if not environment:
+            logger.warning("Environment not provided in run request, defaulting to 'localDev'.")
+            environment = "localDev"
+
+        result = await run_async(name, environment, body.get("concurrency"))
+        logger.info(f"Scenario '{name}' executed asynchronously with result: {result}")
+        return result
+    except Exception as e:
+        error_details = f"Error running scenario '{name}': {str(e)}\n{traceback.format_exc()}"
+        logger.error(error_details)
+        raise HTTPException(status_code=400, detail=error_details)
+
+
+def _format_frame(frame: dict, sse: bool) -> str:
+    data = json.dumps(frame, default=str)
+    if sse:
+        return f"event: {frame['event']}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+@app.post("/api/scenarios/{name}/run/stream")
+async def run_scenario_stream_endpoint(name: str, body: dict = Body(...)):
+    """
+    Run a scenario by name, streaming each step's result as soon as it finishes and then a summary.
+    Frames are NDJSON lines, or Server-Sent Events when the body has "format": "sse".
+    """
+    from runtime.flow_runner import read_scenario, select_environment, stream_run  # Local import
+    logger.info(f"Received request to stream scenario run: {name} with body: {body}")
+    environment = body.get("environment", "localDev")
+    if not environment:
+        logger.warning("Environment not provided in run request, defaulting to 'localDev'.")
+        environment = "localDev"
+    sse = body.get("format", "ndjson") == "sse"
+
+    # Fail with a regular error response before the stream starts if the scenario can't be loaded
+    try:
+        # Selected on the event loop, so the streaming task below inherits the environment
+        select_environment(name, environment)
+        scenario = await asyncio.to_thread(read_scenario, name)
+    except Exception as e:
+        error_details = f"Error running scenario '{name}': {str(e)}\n{traceback.format_exc()}"
+        logger.error(error_details)
+        raise HTTPException(status_code=400, detail=error_details)
+
+    async def frames():
+        try:
+            async for frame in stream_run(scenario, body.get("concurrency")):
+                yield _format_frame(frame, sse)
+        except Exception as e:
+            logger.error(f"Error streaming scenario '{name}': {str(e)}\n{traceback.format_exc()}")
+            yield _format_frame({"event": "error", "detail": str(e)}, sse)
+
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    return StreamingResponse(frames(), media_type=media_type)
+
+
+class LoadTestRequest(BaseModel):
+    environment: str = "localDev"
+    users: int = 1
+    iterations: Optional[int] = None
+    duration: Optional[float] = None
+    rampUp: float = 0
+    targetRps: Optional[float] = None
+    concurrency: Optional[int] = None
+
+
+@app.post("/api/scenarios/{name}/load-test")
+def load_test_scenario_endpoint(name: str, load_test: LoadTestRequest):
+    """Run a scenario repeatedly across virtual users and return aggregated throughput and latency"""
+    from runtime.flow_runner import run_load_test  # Local import
+    logger.info(f"Received request to load test scenario: {name} with settings: {load_test}")
+    try:
+        summary = run_load_test(name, load_test.environment or "localDev", users=load_test.users,
+                                iterations=load_test.iterations, duration=load_test.duration,
+                                ramp_up=load_test.rampUp, target_rps=load_test.targetRps,
+                                concurrency=load_test.concurrency)
+        logger.info(f"Load test of scenario '{name}' finished: {summary['throughput']}")
+        return summary
+    except Exception as e:
+        error_details = f"Error load testing scenario '{name}': {str(e)}\n{traceback.format_exc()}"
+        logger.error(error_details)
+        raise HTTPException(status_code=400, detail=error_details)
+
+
+class BatchRunRequest(BaseModel):
+    pattern: Optional[str] = None
+    environment: str = "localDev"
+    workers: Optional[int] = None
+    concurrency: Optional[int] = None
+
+
+@app.post("/api/batch/run")
+def batch_run_endpoint(batch: BatchRunRequest):
+    """Run every saved scenario (or those matching a glob) in parallel worker processes"""
+    from runtime.batch_runner import run_batch  # Local import
+    logger.info(f"Received request to run scenario batch with settings: {batch}")
+    try:
+        report = run_batch(batch.pattern, batch.environment or "localDev", workers=batch.workers,
+                           concurrency=batch.concurrency)
+        logger.info(f"Scenario batch finished: {report['passed']}/{report['scenarios']} passed")
+        return report
+    except Exception as e:
+        error_details = f"Error running scenario batch: {str(e)}\n{traceback.format_exc()}"
+        logger.error(error_details)
+        raise HTTPException(status_code=400, detail=error_details)
+
+
+@app.get("/api/scenarios/{name}/runs")
+def get_scenario_runs(name: str, environment: Optional[str] = None, limit: int = 50, db: Session = Depends(get_db)):
+    """Return the latest recorded runs of a scenario, newest first"""
+    from repositories import run_repository  # Local import
+    return [run.to_dict() for run in run_repository.list_runs(db, name, environment, min(max(limit, 1), 1000))]
+
+
+@app.get("/api/runs/{run_id}")
+def get_run(run_id: int, db: Session = Depends(get_db)):
+    """Return a recorded run with its steps"""
+    from repositories import run_repository  # Local import
+    run = run_repository.get_run(db, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail=f"Run {run_id} not found")
+    result = run.to_dict()
+    result["steps"] = [step.to_dict() for step in run.steps]
+    return result
+
+
+@app.get("/api/scenarios/{name}/runs/trends")
+def get_scenario_run_trends(name: str, environment: Optional[str] = None, since: Optional[datetime] = None,
+                            bucket: str = "day", db: Session = Depends(get_db)):
+    """Return latency percentiles and failure rates of each step per hour or day"""
+    from repositories import run_repository  # Local import
+    try:
+        return run_repository.get_step_trends(db, name, environment, _as_utc(since), bucket)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/scenarios/{name}/runs/failure-rates")
+def get_scenario_failure_rates(name: str, environment: Optional[str] = None, since: Optional[datetime] = None,
+                               db: Session = Depends(get_db)):
+    """Return how often each step of a scenario failed across its recorded runs"""
+    from repositories import run_repository  # Local import
+    return run_repository.get_step_failure_rates(db, name, environment, _as_utc(since))
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Run times are stored in UTC; a naive datetime is taken to be UTC already
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc)
+
+
 @app.get("/api/environments")
 def get_environments():
     """Return available environment configurations"""
@@ -197,12 +356,39 @@ def get_environments():
         }
 
 
+@app.get("/api/health")
+async def get_health():
+    """Report whether the database answers, without blocking the event loop"""
+    database = await check_health()
+    return {"status": database["status"], "database": database}
+
+
+@app.get("/api/transport/stats")
+def get_transport_stats():
+    """Return connection pool usage and reuse ratio per origin for the shared HTTP transport"""
+    from util.http_client import http_transport  # Local import
+    return http_transport.stats()
+
+
 # ----- FIELD AND TEMPLATE ROUTES -----
+def _conditional_json(content: Any, etag: str, request: Request) -> Response:
+    """A JSON response with an ETag, or 304 Not Modified if the client already has that version."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if etag in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+    return JSONResponse(content=content, headers=headers)
+
+
 @app.get("/item/fields/{endpoint_type}")
-def get_fields(endpoint_type: str):
+def get_fields(endpoint_type: str, request: Request):
     """Return available fields for an endpoint type with path property using validator"""
     logger.info(f"Received request for fields of endpoint_type: {endpoint_type}")
     from validation.endpoint_validations import ValidatorFactory  # Local import
+    from validation.field_schema import get_validator_field_schema
+    from validation.route_index import closest_endpoint_key
 
     # Normalize endpoint_type for matching (e.g., handle potential slashes)
     normalized_endpoint_type = endpoint_type.split("/")[0].lower()
@@ -211,12 +397,11 @@ def get_fields(endpoint_type: str):
     validator_class = ValidatorFactory.get_validator(normalized_endpoint_type)
 
     if not validator_class:
-        closest_match_key = get_close_matches(normalized_endpoint_type, ValidatorFactory.get_all_validator_names(), n=1,
-                                              cutoff=0.6)
+        closest_match_key = closest_endpoint_key(normalized_endpoint_type)  # Memoized fuzzy match
         if closest_match_key:
             logger.warning(
-                f"No exact validator for '{normalized_endpoint_type}', using closest match: '{closest_match_key[0]}'")
-            validator_class = ValidatorFactory.get_validator(closest_match_key[0])
+                f"No exact validator for '{normalized_endpoint_type}', using closest match: '{closest_match_key}'")
+            validator_class = ValidatorFactory.get_validator(closest_match_key)
         else:
             logger.warning(
                 f"No validator or close match found for endpoint_type: {normalized_endpoint_type}. Returning empty list.")
@@ -228,45 +413,17 @@ def get_fields(endpoint_type: str):
         return []
 
     try:
-        sample_body = validator_class.get_valid_body()
-        logger.debug(f"Sample body for '{normalized_endpoint_type}': {sample_body}")
-
-        fields_with_paths = get_all_field_paths(sample_body)
-        logger.debug(f"Extracted field paths: {fields_with_paths}")
-
-        result = []
-        for field_path in fields_with_paths:
-            field_value = get_value_from_path(sample_body, field_path)
-            field_type = "string"  # Default
-
-            if isinstance(field_value, bool):
-                field_type = "boolean"
-            elif isinstance(field_value, int):
-                field_type = "integer"
-            elif isinstance(field_value, float):
-                field_type = "number"
-            elif isinstance(field_value, list):
-                field_type = "array"
-            elif isinstance(field_value, dict):
-                field_type = "object"
-
-            # Basic heuristic for required fields
-            required = "name" in field_path.lower() or field_path.lower().endswith(".id")
-
-            result.append({
-                "path": field_path,
-                "type": field_type,
-                "required": required
-            })
-        logger.info(f"Returning {len(result)} fields for endpoint_type: {endpoint_type}")
-        return result
+        # Extracted once per validator from a deterministic sample body
+        schema = get_validator_field_schema(validator_class)
+        logger.info(f"Returning {len(schema.fields)} fields for endpoint_type: {endpoint_type}")
+        return _conditional_json(schema.fields, schema.etag, request)
     except Exception as e:
         logger.error(f"Error processing fields for '{normalized_endpoint_type}': {str(e)}\n{traceback.format_exc()}")
         return []
 
 
 @app.post("/item/fields/{endpoint_type}")
-def fetch_body_fields(endpoint_type: str, body: Dict[str, Any] = Body(default_factory=dict)):
+def fetch_body_fields(endpoint_type: str, request: Request, body: Dict[str, Any] = Body(default_factory=dict)):
     """
     Fetch and analyze fields for a specific endpoint type from its URL or provided body.
     This endpoint is used when the user clicks the "Fetch" button next to the URL field
@@ -274,6 +431,7 @@ def fetch_body_fields(endpoint_type: str, body: Dict[str, Any] = Body(default_fa
     """
     logger.info(f"Received POST request for fields of endpoint_type: {endpoint_type} with body: {body}")
     from validation.endpoint_validations import ValidatorFactory  # Local import
+    from validation.field_schema import extract_field_schema, get_validator_field_schema
 
     normalized_endpoint_type = endpoint_type.split("/")[0].lower()
     logger.debug(f"Normalized endpoint_type for validator lookup: {normalized_endpoint_type}")
@@ -285,61 +443,19 @@ def fetch_body_fields(endpoint_type: str, body: Dict[str, Any] = Body(default_fa
         # Fallback: try to infer schema from the provided body if any
         if body:
             logger.info("Attempting to infer schema from provided body as validator is missing.")
-            fields_from_body = get_all_field_paths(body)
-            result = []
-            for field_path in fields_from_body:
-                field_value = get_value_from_path(body, field_path)
-                field_type = "string"
-                if isinstance(field_value, bool):
-                    field_type = "boolean"
-                elif isinstance(field_value, int):
-                    field_type = "integer"
-                elif isinstance(field_value, float):
-                    field_type = "number"
-                elif isinstance(field_value, list):
-                    field_type = "array"
-                elif isinstance(field_value, dict):
-                    field_type = "object"
-                result.append({"path": field_path, "type": field_type,
-                               "required": False})  # Cannot infer required from body alone
+            # Cannot infer required from body alone
+            result = extract_field_schema(body, infer_required=False)
             return {"fields": result, "message": "Inferred fields from provided body due to missing validator."}
         return {"fields": [], "message": f"No validator found for endpoint type: {endpoint_type}"}
 
     try:
-        sample_body = validator_class.get_valid_body()
-        logger.debug(f"Sample body for '{normalized_endpoint_type}': {sample_body}")
-
         # If a user provides a body, we can try to merge or prioritize its structure,
         # but for now, we'll primarily rely on the validator's sample body.
         # Future enhancement: merge `body` with `sample_body` intelligently.
-
-        fields_with_paths = get_all_field_paths(sample_body)
-        logger.debug(f"Extracted field paths from sample_body: {fields_with_paths}")
-
-        result = []
-        for field_path in fields_with_paths:
-            field_value = get_value_from_path(sample_body, field_path)
-            field_type = "string"
-            if isinstance(field_value, bool):
-                field_type = "boolean"
-            elif isinstance(field_value, int):
-                field_type = "integer"
-            elif isinstance(field_value, float):
-                field_type = "number"
-            elif isinstance(field_value, list):
-                field_type = "array"
-            elif isinstance(field_value, dict):
-                field_type = "object"
-
-            required = "name" in field_path.lower() or field_path.lower().endswith(".id")
-
-            result.append({
-                "path": field_path,
-                "type": field_type,
-                "required": required
-            })
-        logger.info(f"Successfully retrieved {len(result)} fields for endpoint_type: {endpoint_type}")
-        return {"fields": result, "message": "Successfully retrieved fields based on validator."}
+        schema = get_validator_field_schema(validator_class)
+        logger.info(f"Successfully retrieved {len(schema.fields)} fields for endpoint_type: {endpoint_type}")
+        return _conditional_json({"fields": schema.fields, "message": "Successfully retrieved fields based on validator."},
+                                 schema.etag, request)
     except Exception as e:
         logger.error(f"Error fetching fields for '{normalized_endpoint_type}': {str(e)}\n{traceback.format_exc()}")
         return {"fields": [], "message": f"Error fetching fields: {str(e)}"}
@@ -351,34 +467,34 @@ def get_body_templates(endpoint_type: str, db: Session = Depends(get_db)):
     logger.info(f"Request for body templates for endpoint_type: {endpoint_type}")
     normalized_type = endpoint_type.lower()
 
-    # Get templates from database
-    db_templates = template_repository.get_templates_by_type(db, normalized_type)
-    templates = {}
+    # Get templates from database, with the bodies as the stored JSON text
+    db_templates = template_repository.get_raw_template_bodies_by_type(db, normalized_type)
+    if db_templates:
+        # Compose the name -> body object expected by the frontend without decoding and re-encoding the bodies
+        content = "{" + ",".join(f"{json.dumps(name)}:{body}" for name, body in db_templates) + "}"
+        logger.info(f"Returning {len(db_templates)} templates for '{normalized_type}'.")
+        return Response(content=content, media_type="application/json")
 
-    # Convert database templates to dictionary format expected by frontend
-    for template in db_templates:
-        template_dict = template.to_dict()
-        templates[template_dict["name"]] = template_dict["body"]
-
-    # If no specific templates in database, try to generate one from validator
-    if not templates:
-        logger.info(f"No stored templates for '{normalized_type}', attempting to generate from validator.")
-        from validation.endpoint_validations import ValidatorFactory  # Local import
-        validator_class = ValidatorFactory.get_validator(normalized_type)
-        if validator_class and hasattr(validator_class, 'get_valid_body'):
-            try:
-                generated_template_body = validator_class.get_valid_body()
-                template_name = f"Default {normalized_type.capitalize()} Template"
-                templates[template_name] = generated_template_body
-
-                # Save the generated template to the database
-                template_repository.create_template(db, template_name, normalized_type, generated_template_body)
-                logger.info(f"Generated and saved default template for '{normalized_type}' to database.")
-            except Exception as e:
-                logger.error(f"Error generating default template for '{normalized_type}': {str(e)}")
-        else:
-            logger.warning(
-                f"No validator or get_valid_body method for '{normalized_type}' to generate default template.")
+    # No templates in database, try to generate one from validator
+    templates = {}
+    logger.info(f"No stored templates for '{normalized_type}', attempting to generate from validator.")
+    from validation.endpoint_validations import ValidatorFactory  # Local import
+    from validation.body_pool import get_sample_body
+    validator_class = ValidatorFactory.get_validator(normalized_type)
+    if validator_class and hasattr(validator_class, 'get_valid_body'):
+        try:
+            generated_template_body = get_sample_body(validator_class)
+            template_name = f"Default {normalized_type.capitalize()} Template"
+            templates[template_name] = generated_template_body
+
+            # Save the generated template to the database
+            template_repository.create_template(db, template_name, normalized_type, generated_template_body)
+            logger.info(f"Generated and saved default template for '{normalized_type}' to database.")
+        except Exception as e:
+            logger.error(f"Error generating default template for '{normalized_type}': {str(e)}")
+    else:
+        logger.warning(
+            f"No validator or get_valid_body method for '{normalized_type}' to generate default template.")
 
     logger.info(f"Returning {len(templates)} templates for '{normalized_type}'.")
     return templates
@@ -414,6 +530,48 @@ def save_body_template(endpoint_type: str, name: str = Body(...), body: Dict[str
             raise HTTPException(status_code=500, detail=f"Failed to create template '{name}'")
 
 
+class TemplateItem(BaseModel):
+    name: str
+    endpoint_type: str
+    body: Any
+    # The body is JSON text to decode, rather than a JSON string to store as is
+    encoded: bool = False
+
+
+@app.post("/api/templates/bulk")
+def bulk_save_templates(templates: List[TemplateItem], db: Session = Depends(get_db)):
+    """Create or update many body templates in one transaction (e.g. to seed a new environment)."""
+    logger.info(f"Request to bulk save {len(templates)} templates")
+    try:
+        count = template_repository.bulk_upsert_templates(db, (template.model_dump() for template in templates))
+    except ValueError as e:
+        logger.warning(f"Rejected bulk template save: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error bulk saving templates: {str(e)}\n{traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail=f"Failed to save templates: {str(e)}")
+    logger.info(f"Bulk saved {count} templates.")
+    return {"message": f"Saved {count} templates.", "count": count}
+
+
+@app.get("/api/templates/export")
+def export_templates(endpoint_type: Optional[str] = None):
+    """Stream all templates (optionally of one endpoint type) as NDJSON, one template per line."""
+    logger.info(f"Request to export templates, endpoint_type: {endpoint_type}")
+
+    def lines():
+        # The stream outlives the request's dependencies, so it uses its own session
+        db = SessionLocal()
+        try:
+            # Lines are composed around the stored JSON text, in the format POST /api/templates/bulk accepts
+            for name, template_type, body in template_repository.iter_raw_templates(db, endpoint_type):
+                yield f'{{"name": {json.dumps(name)}, "endpoint_type": {json.dumps(template_type)}, "body": {body}}}\n'
+        finally:
+            db.close()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @app.get("/api/urls")
 def get_urls(chars: Optional[str] = None):
     """Return a list of URLs (endpoint names from validators) based on the provided characters"""
@@ -0,0 +1,59 @@
+# benchmarks/bench_api.py
+"""The FastAPI routes the UI calls most, through a TestClient (no network between client and app)."""
+import logging
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from api import app  # noqa: E402
+from bench_scenario import REQUESTS  # noqa: E402
+from runtime.flow_runner import save_scenario  # noqa: E402
+from scenario.scenario import TestScenario  # noqa: E402
+
+SCENARIO_NAME = "benchmark_api"
+
+
+@pytest.fixture(scope="module")
+def client(mock_gateway):
+    # The routes log every request and result at INFO
+    logging.disable(logging.INFO)
+    save_scenario(TestScenario(SCENARIO_NAME, "id_benchmark_api", "Benchmark scenario", "1.0.0", "", "", REQUESTS))
+    try:
+        with TestClient(app) as client:
+            yield client
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def _get(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response
+
+
+def _run(client):
+    response = client.post(f"/api/scenarios/{SCENARIO_NAME}/run", json={"environment": "benchmark"})
+    assert response.status_code == 200 and response.json()["status"] == "success"
+    return response
+
+
+@pytest.mark.parametrize("endpoint_type", ["api-specs", "products"])
+def bench_get_fields(benchmark, track_allocations, client, endpoint_type):
+    _get(client, f"/item/fields/{endpoint_type}")
+    track_allocations(_get, client, f"/item/fields/{endpoint_type}")
+    benchmark(_get, client, f"/item/fields/{endpoint_type}")
+
+
+def bench_list_scenarios(benchmark, track_allocations, client):
+    _get(client, "/api/scenarios")
+    track_allocations(_get, client, "/api/scenarios")
+    benchmark(_get, client, "/api/scenarios")
+
+
+def bench_run_scenario(benchmark, track_allocations, client):
+    _run(client)
+    track_allocations(_run, client)
+    benchmark(_run, client)
@@ -0,0 +1,43 @@
+# benchmarks/bench_scenario.py
+"""Scenario execution against the mock gateway, sequentially and with independent steps in parallel."""
+import contextlib
+import io
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from scenario.scenario import TestScenario  # noqa: E402
+
+REQUESTS = [
+    {"name": "create-api", "method": "POST", "url": "api-specs",
+     "body": {"name": "bench-api", "description": "Benchmark API", "metaData": {"version": "1.0"}}},
+    {"name": "create-api-2", "method": "POST", "url": "api-specs",
+     "body": {"name": "bench-api-2", "description": "Benchmark API", "metaData": {"version": "1.0"}}},
+    {"name": "create-product", "method": "POST", "url": "products",
+     "body": {"name": "bench-product", "apiSpecs": [{"apiSpecId": "{{create-api.apiSpecId}}"},
+                                                    {"apiSpecId": "{{create-api-2.apiSpecId}}"}]}},
+    {"name": "get-product", "method": "GET", "url": "products/{{create-product.productId}}"},
+]
+
+
+def _scenario() -> TestScenario:
+    scenario = TestScenario("benchmark", "id_benchmark", "Benchmark scenario", "1.0.0", "", "", REQUESTS)
+    scenario.compile()
+    return scenario
+
+
+def _execute(scenario: TestScenario, concurrency: int):
+    # Steps print their progress; keep it out of the benchmark output
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = scenario.execute(max_concurrency=concurrency)
+    assert len(results) == len(REQUESTS)
+    return results
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def bench_execute(benchmark, track_allocations, mock_gateway, concurrency):
+    scenario = _scenario()
+    _execute(scenario, concurrency)
+    track_allocations(_execute, scenario, concurrency)
+    benchmark(_execute, scenario, concurrency)
@@ -0,0 +1,40 @@
+# benchmarks/bench_templating.py
+"""Request templating and random data generation, the CPU work done for every step."""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from scenario.api_request import APIRequest  # noqa: E402
+from scenario.plan import make_resolver  # noqa: E402
+from validation.endpoint_validations import manipulate_and_create_random_data  # noqa: E402
+
+BODY = {
+    "name": "product-{{vu}}-{{iteration}}",
+    "description": "Created by ${vu}",
+    "apiSpecs": [{"apiSpecId": "{{create-api.apiSpecId}}"} for _ in range(10)],
+    "metaData": {"owner": "{{owner}}", "tags": ["a", "b", "c"], "version": "1.0"},
+}
+CONTEXT = {"vu": 3, "iteration": 42, "owner": "benchmark", "create-api": {"apiSpecId": 7}}
+
+
+def bench_template_body(benchmark, track_allocations):
+    request = APIRequest(name="create-product", method="POST", url="products", body=BODY)
+    track_allocations(request._template_body, BODY, CONTEXT)
+    result = benchmark(request._template_body, BODY, CONTEXT)
+    assert result["apiSpecs"][0]["apiSpecId"] == 7
+
+
+def bench_render_compiled_step(benchmark, track_allocations):
+    step = APIRequest(name="create-product", method="POST", url="products", body=BODY).compile()
+    resolve = make_resolver(None, CONTEXT)
+    track_allocations(step.render, resolve, "http://gateway")
+    url, _, body = benchmark(step.render, resolve, "http://gateway")
+    assert url.endswith("/products") and body["name"] == "product-3-42"
+
+
+@pytest.mark.parametrize("url", ["http://gateway/api-specs", "http://gateway/products/1/plans"])
+def bench_manipulate_and_create_random_data(benchmark, track_allocations, url):
+    manipulate_and_create_random_data({"name": "bench"}, url)
+    track_allocations(manipulate_and_create_random_data, {"name": "bench"}, url)
+    # Each round gets a fresh body, as steps do
+    benchmark(lambda: manipulate_and_create_random_data({"name": "bench"}, url))
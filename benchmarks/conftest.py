@@ -0,0 +1,68 @@
+# benchmarks/conftest.py
+"""
+Fixtures shared by the benchmarks: an in-process mock of the DGate gateway and
+Keycloak, an environment pointing at it, and allocation tracking.
+"""
+import os
+import sys
+import tempfile
+import tracemalloc
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config  # noqa: E402
+from config.envModel import Env, envs  # noqa: E402
+from runtime.mock_gateway import MockGateway  # noqa: E402
+
+BENCHMARK_ENV = "benchmark"
+
+
+@pytest.fixture(scope="session")
+def mock_gateway():
+    """
+    The base URL of a mock gateway and Keycloak, selected as the "benchmark" environment.
+    Scenarios are saved to a temporary directory and runs aren't recorded in the run history.
+    """
+    patch = pytest.MonkeyPatch()
+    patch.setenv("SCENARIO_SAVE_DIR", tempfile.mkdtemp(prefix="benchmark-scenarios-"))
+    patch.setattr("repositories.run_repository.RUN_HISTORY_ENABLED", False)
+    gateway = MockGateway(port=0, latency_ms=0, error_rate=0, seed=1)
+    url = gateway.start()
+    envs[BENCHMARK_ENV] = Env(clientId="benchmark", clientSecret="secret", urlKeycloak=url, realm="dgate",
+                              envUrl=url, username="benchmark", password="secret")
+    token = Config.set_selected_env(BENCHMARK_ENV)
+    try:
+        yield url
+    finally:
+        Config.reset_selected_env(token)
+        envs.pop(BENCHMARK_ENV, None)
+        gateway.stop()
+        patch.undo()
+
+
+@pytest.fixture
+def track_allocations(benchmark):
+    """
+    Run a function once under tracemalloc and add its allocations to the benchmark's
+    extra_info (shown in --benchmark-json output and saved runs). Call it after a
+    warm-up, so one-time caches don't count.
+    """
+
+    def track(function, *args, **kwargs):
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            function(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+        diff = after.compare_to(before, "filename")
+        benchmark.extra_info["allocations"] = sum(stat.count_diff for stat in diff if stat.count_diff > 0)
+        benchmark.extra_info["allocatedBytes"] = sum(stat.size_diff for stat in diff if stat.size_diff > 0)
+        benchmark.extra_info["peakBytes"] = peak
+
+    return track
@@ -1,18 +1,51 @@
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Iterator, Optional, Tuple
+
 from config.envModel import envs, Env
 
+# (name, Env) of the environment selected for the current run. A context variable rather
+# than a class attribute, so concurrent runs (threads, tasks, requests) each see their own;
+# asyncio tasks inherit it, plain threads need contextvars.copy_context() to carry it over.
+_selected_env: ContextVar[Optional[Tuple[str, Env]]] = ContextVar("selected_env", default=None)
+
 
 class Config:
-    # Static variable to store the selected environment
-    selected_env_name = None
-    selected_env:Env = None
 
     @staticmethod
-    def set_selected_env(envName: str):
+    def set_selected_env(envName: str) -> Token:
         """
-        Set the selected environment.
-        :param env: The name of the environment to set.
+        Set the selected environment of the current context.
+        :param envName: The name of the environment to set.
+        :return: A token that Config.reset_selected_env restores the previous selection with.
         """
-        Config.selected_env_name = envName
-        Config.selected_env = envs.get(envName)
-        if not Config.selected_env:
-            raise ValueError(f"Environment '{envName}' not found.")
\ No newline at end of file
+        env = envs.get(envName)
+        if not env:
+            raise ValueError(f"Environment '{envName}' not found.")
+        return _selected_env.set((envName, env))
+
+    @staticmethod
+    def reset_selected_env(token: Token) -> None:
+        _selected_env.reset(token)
+
+    @staticmethod
+    def get_selected_env() -> Env:
+        selected = _selected_env.get()
+        if selected is None:
+            raise ValueError("No environment selected.")
+        return selected[1]
+
+    @staticmethod
+    def get_selected_env_name() -> Optional[str]:
+        selected = _selected_env.get()
+        return selected[0] if selected else None
+
+    @staticmethod
+    @contextmanager
+    def selected(envName: str) -> Iterator[Env]:
+        """Select an environment for the duration of a with block."""
+        token = Config.set_selected_env(envName)
+        try:
+            yield Config.get_selected_env()
+        finally:
+            Config.reset_selected_env(token)
@@ -24,4 +24,75 @@ sql_alchemy_database_url = f"mssql+pyodbc://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{D
 # Fallback to SQLite for development/testing if SQL Server connection fails
 sqlite_database_url = "sqlite:///./test.db"
 
+# Database to use: "mssql", "sqlite", or "auto" to try SQL Server first and fall back to SQLite.
+# The engine is created on first use, not at import time.
+DB_BACKEND = os.getenv("DB_BACKEND", "auto").lower()
+# Seconds to wait for a SQL Server connection (and for the health probe)
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+
+# Seconds before a Keycloak access token expires at which it is proactively renewed
+TOKEN_REFRESH_MARGIN_SECONDS = float(os.getenv("TOKEN_REFRESH_MARGIN_SECONDS", "30"))
+
+# Pooled HTTP transport used for scenario requests and token fetches
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+HTTP_ASYNC_POOL_SIZE = int(os.getenv("HTTP_ASYNC_POOL_SIZE", "100"))
+HTTP_KEEP_ALIVE = os.getenv("HTTP_KEEP_ALIVE", "true").lower() == "true"
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.3"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+
+# Maximum number of independent scenario steps executed at the same time (1 = sequential)
+SCENARIO_MAX_CONCURRENCY = int(os.getenv("SCENARIO_MAX_CONCURRENCY", "1"))
+
+# Bytes of step responses (and response bodies in run results) kept per run before responses no later step
+# references are evicted; the results of evicted responses keep a reference and a preview of the body
+RESPONSE_STORE_MAX_BYTES = int(os.getenv("RESPONSE_STORE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Response capture: bodies are read in chunks and spilled to a temporary file past RESPONSE_CAPTURE_MEMORY_BYTES;
+# reading stops at RESPONSE_CAPTURE_MAX_BYTES (0 for no limit). Run results include bodies up to
+# RESPONSE_RESULT_INLINE_BYTES, larger ones as a reference and a preview of RESPONSE_PREVIEW_CHARS characters
+RESPONSE_CAPTURE_MEMORY_BYTES = int(os.getenv("RESPONSE_CAPTURE_MEMORY_BYTES", str(1024 * 1024)))
+RESPONSE_CAPTURE_MAX_BYTES = int(os.getenv("RESPONSE_CAPTURE_MAX_BYTES", str(256 * 1024 * 1024)))
+RESPONSE_RESULT_INLINE_BYTES = int(os.getenv("RESPONSE_RESULT_INLINE_BYTES", str(256 * 1024)))
+RESPONSE_PREVIEW_CHARS = int(os.getenv("RESPONSE_PREVIEW_CHARS", "500"))
+
+# Seconds a cached scenario file (or directory listing) is trusted before it is stat'ed for changes again
+SCENARIO_CACHE_STAT_INTERVAL = float(os.getenv("SCENARIO_CACHE_STAT_INTERVAL", "1.0"))
+
+# Pre-generated sample bodies kept per validator; with a seed, bodies are deterministic and generated once
+BODY_POOL_SIZE = int(os.getenv("BODY_POOL_SIZE", "32"))
+BODY_POOL_SEED = int(os.getenv("BODY_POOL_SEED")) if os.getenv("BODY_POOL_SEED") else None
+
+# Seconds templates read through the template cache are reused before being read from the database again
+TEMPLATE_CACHE_TTL_SECONDS = float(os.getenv("TEMPLATE_CACHE_TTL_SECONDS", "60"))
+
+# Start method of the batch runner's worker processes ("spawn", "forkserver" or "fork")
+BATCH_START_METHOD = os.getenv("BATCH_START_METHOD", "spawn")
+
+# Run history: runs are written by a background thread in batches of RUN_HISTORY_BATCH_SIZE, at
+# least every RUN_HISTORY_FLUSH_INTERVAL seconds; response bodies are kept as a hash and a preview
+RUN_HISTORY_ENABLED = os.getenv("RUN_HISTORY_ENABLED", "true").lower() == "true"
+RUN_HISTORY_BATCH_SIZE = int(os.getenv("RUN_HISTORY_BATCH_SIZE", "50"))
+RUN_HISTORY_FLUSH_INTERVAL = float(os.getenv("RUN_HISTORY_FLUSH_INTERVAL", "1.0"))
+RUN_HISTORY_QUEUE_SIZE = int(os.getenv("RUN_HISTORY_QUEUE_SIZE", "10000"))
+RUN_HISTORY_BODY_PREVIEW = int(os.getenv("RUN_HISTORY_BODY_PREVIEW", "512"))
+
+# Values collected per assertion during a load test before they are checked as a batch
+ASSERTION_BATCH_SIZE = int(os.getenv("ASSERTION_BATCH_SIZE", "1024"))
+
+# Mock gateway (python -m runtime.mock_gateway): address, injected latency (a fixed delay plus a random
+# jitter), the share of requests answered with MOCK_GATEWAY_ERROR_STATUS, and items kept per collection
+MOCK_GATEWAY_HOST = os.getenv("MOCK_GATEWAY_HOST", "127.0.0.1")
+MOCK_GATEWAY_PORT = int(os.getenv("MOCK_GATEWAY_PORT", "8099"))
+MOCK_GATEWAY_LATENCY_MS = float(os.getenv("MOCK_GATEWAY_LATENCY_MS", "0"))
+MOCK_GATEWAY_LATENCY_JITTER_MS = float(os.getenv("MOCK_GATEWAY_LATENCY_JITTER_MS", "0"))
+MOCK_GATEWAY_ERROR_RATE = float(os.getenv("MOCK_GATEWAY_ERROR_RATE", "0"))
+MOCK_GATEWAY_ERROR_STATUS = int(os.getenv("MOCK_GATEWAY_ERROR_STATUS", "500"))
+MOCK_GATEWAY_MAX_ITEMS = int(os.getenv("MOCK_GATEWAY_MAX_ITEMS", "10000"))
+
+# Latency samples a histogram keeps for its percentiles; past this, a uniform random sample is kept
+# (counts, min, mean, max and bucket counts stay exact), so long load tests use bounded memory
+LATENCY_RESERVOIR_SIZE = int(os.getenv("LATENCY_RESERVOIR_SIZE", "10000"))
+
 # Other settings can be added here
@@ -1,23 +1,212 @@
-import requests
+import asyncio
+import threading
+import time
 import os
+import weakref
+from typing import Dict, Any, Tuple
 from config.envModel import Env
+from config.settings import TOKEN_REFRESH_MARGIN_SECONDS
+from util.http_client import http_transport, async_http_transport
 
-def get_keycloak_token(env: Env) -> str:
-    url = f"{env.urlKeycloak}/realms/{env.realm}/protocol/openid-connect/token"
-    headers = {
-        "Content-Type": "application/x-www-form-urlencoded"
-    }
-    data = {
+
+def _token_url(env: Env) -> str:
+    return f"{env.urlKeycloak}/realms/{env.realm}/protocol/openid-connect/token"
+
+
+_TOKEN_HEADERS = {
+    "Content-Type": "application/x-www-form-urlencoded"
+}
+
+
+def _grant_data(env: Env, data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
         "client_id": env.clientId,
         "client_secret": env.clientSecret,
+        **data
+    }
+
+
+def _password_grant(env: Env) -> Dict[str, Any]:
+    return {
         "grant_type": "password",
         "username": env.username,
         "password": env.password
     }
 
-    response = requests.post(url, headers=headers, data=data)
 
+def _refresh_grant(refresh_token: str) -> Dict[str, Any]:
+    return {
+        "grant_type": "refresh_token",
+        "refresh_token": refresh_token
+    }
+
+
+def _token_payload(response) -> Dict[str, Any]:
     if response.status_code != 200:
         raise Exception(f"Failed to get token: {response.status_code} {response.text}")
 
-    return response.json().get("access_token", "")
\ No newline at end of file
+    return response.json()
+
+
+def _request_token(env: Env, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Post a grant to the Keycloak token endpoint and return the full token payload."""
+    response = http_transport.request("POST", _token_url(env), headers=_TOKEN_HEADERS, data=_grant_data(env, data))
+    return _token_payload(response)
+
+
+async def _request_token_async(env: Env, data: Dict[str, Any]) -> Dict[str, Any]:
+    response = await async_http_transport.request("POST", _token_url(env), headers=_TOKEN_HEADERS,
+                                                  data=_grant_data(env, data))
+    return _token_payload(response)
+
+
+def fetch_keycloak_token(env: Env) -> Dict[str, Any]:
+    """Run the password grant and return the token payload (access/refresh tokens and their lifetimes)."""
+    return _request_token(env, _password_grant(env))
+
+
+def refresh_keycloak_token(env: Env, refresh_token: str) -> Dict[str, Any]:
+    """Exchange a refresh token for a new token payload."""
+    return _request_token(env, _refresh_grant(refresh_token))
+
+
+async def fetch_keycloak_token_async(env: Env) -> Dict[str, Any]:
+    return await _request_token_async(env, _password_grant(env))
+
+
+async def refresh_keycloak_token_async(env: Env, refresh_token: str) -> Dict[str, Any]:
+    return await _request_token_async(env, _refresh_grant(refresh_token))
+
+
+def get_keycloak_token(env: Env) -> str:
+    return fetch_keycloak_token(env).get("access_token", "")
+
+
+class CachedToken:
+    """A token payload together with the monotonic deadlines derived from its lifetimes."""
+
+    def __init__(self, payload: Dict[str, Any], issued_at: float):
+        self.access_token = payload.get("access_token", "")
+        self.refresh_token = payload.get("refresh_token")
+        self.expires_at = issued_at + float(payload.get("expires_in") or 0)
+        # Keycloak reports 0 for offline tokens that never expire on their own
+        refresh_expires_in = payload.get("refresh_expires_in")
+        if refresh_expires_in is None or not self.refresh_token:
+            self.refresh_expires_at = issued_at
+        elif float(refresh_expires_in) == 0:
+            self.refresh_expires_at = float("inf")
+        else:
+            self.refresh_expires_at = issued_at + float(refresh_expires_in)
+
+    def is_fresh(self, now: float, margin: float) -> bool:
+        return bool(self.access_token) and now < self.expires_at - margin
+
+    def can_refresh(self, now: float, margin: float) -> bool:
+        return bool(self.refresh_token) and now < self.refresh_expires_at - margin
+
+
+class TokenCache:
+    """
+    Caches Keycloak access tokens per environment and client.
+
+    Tokens are renewed ``margin`` seconds before ``expires_in`` elapses, using the
+    ``refresh_token`` grant while the refresh token is still valid and falling back
+    to the password grant otherwise. Each cache key has its own lock so concurrent
+    callers share a single in-flight fetch instead of each hitting Keycloak;
+    get_token_async does the same for coroutines with asyncio locks.
+    """
+
+    def __init__(self, margin: float = TOKEN_REFRESH_MARGIN_SECONDS):
+        self.margin = margin
+        self._entries: Dict[Tuple[str, ...], CachedToken] = {}
+        self._locks: Dict[Tuple[str, ...], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        # asyncio locks belong to one event loop, so each loop gets its own
+        self._async_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple, asyncio.Lock]]" = \
+            weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def _key(env: Env) -> Tuple[str, ...]:
+        return (env.urlKeycloak, env.realm, env.clientId, env.username or "")
+
+    def _lock_for(self, key: Tuple[str, ...]) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def get_token(self, env: Env) -> str:
+        """Return a valid access token for env, fetching or refreshing it only when needed."""
+        key = self._key(env)
+        entry = self._entries.get(key)
+        if entry and entry.is_fresh(time.monotonic(), self.margin):
+            return entry.access_token
+
+        with self._lock_for(key):
+            # Another caller may have renewed the token while we waited on the lock
+            entry = self._entries.get(key)
+            now = time.monotonic()
+            if entry and entry.is_fresh(now, self.margin):
+                return entry.access_token
+
+            payload = None
+            if entry and entry.can_refresh(now, self.margin):
+                try:
+                    payload = refresh_keycloak_token(env, entry.refresh_token)
+                except Exception as e:
+                    print(f"Token refresh failed, falling back to password grant: {e}")
+            if payload is None:
+                payload = fetch_keycloak_token(env)
+
+            entry = CachedToken(payload, now)
+            self._entries[key] = entry
+            return entry.access_token
+
+    def _async_lock_for(self, key: Tuple[str, ...]) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        with self._locks_guard:
+            locks = self._async_locks.get(loop)
+            if locks is None:
+                locks = self._async_locks[loop] = {}
+            lock = locks.get(key)
+            if lock is None:
+                lock = locks[key] = asyncio.Lock()
+        return lock
+
+    async def get_token_async(self, env: Env) -> str:
+        """Async variant of get_token; shares cached entries with the synchronous path."""
+        key = self._key(env)
+        entry = self._entries.get(key)
+        if entry and entry.is_fresh(time.monotonic(), self.margin):
+            return entry.access_token
+
+        async with self._async_lock_for(key):
+            entry = self._entries.get(key)
+            now = time.monotonic()
+            if entry and entry.is_fresh(now, self.margin):
+                return entry.access_token
+
+            payload = None
+            if entry and entry.can_refresh(now, self.margin):
+                try:
+                    payload = await refresh_keycloak_token_async(env, entry.refresh_token)
+                except Exception as e:
+                    print(f"Token refresh failed, falling back to password grant: {e}")
+            if payload is None:
+                payload = await fetch_keycloak_token_async(env)
+
+            entry = CachedToken(payload, now)
+            self._entries[key] = entry
+            return entry.access_token
+
+    def invalidate(self, env: Env) -> None:
+        """Drop the cached token for env so the next call fetches a new one."""
+        self._entries.pop(self._key(env), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# Shared cache used by util.token_util.generate_token
+token_cache = TokenCache()
@@ -1,9 +1,12 @@
 # database.py
+import asyncio
 import logging
-from sqlalchemy import create_engine, event
+import threading
+import time
+from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from config.settings import sql_alchemy_database_url, sqlite_database_url  # Import from settings.py
+from config.settings import sql_alchemy_database_url, sqlite_database_url, DB_BACKEND, DB_CONNECT_TIMEOUT  # Import from settings.py
 from sqlalchemy.sql import text
 
 # Configure logging
@@ -14,34 +17,80 @@ logger = logging.getLogger(__name__)
 # This needs to be defined before importing models to avoid circular imports
 Base = declarative_base()
 
-# Try to create the SQLAlchemy engine with SQL Server
-try:
-    logger.info("Attempting to connect to SQL Server...")
-    engine = create_engine(
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def _create_mssql_engine():
+    return create_engine(
         sql_alchemy_database_url,
         pool_pre_ping=True,  # Check connection before using from pool
         pool_recycle=3600,   # Recycle connections after 1 hour
         pool_size=5,         # Maximum number of connections to keep in pool
-        max_overflow=10      # Maximum number of connections to create beyond pool_size
+        max_overflow=10,     # Maximum number of connections to create beyond pool_size
+        connect_args={"timeout": DB_CONNECT_TIMEOUT},
     )
 
-    # Test the connection
-    with engine.connect() as connection:
-        connection.execute(text("SELECT 1"))
-    logger.info("Successfully connected to SQL Server")
 
-except Exception as e:
-    logger.error(f"Error connecting to SQL Server: {str(e)}")
-    logger.warning("Falling back to SQLite database")
-
-    # Fallback to SQLite if SQL Server connection fails
-    engine = create_engine(
+def _create_sqlite_engine():
+    return create_engine(
         sqlite_database_url,
         connect_args={"check_same_thread": False}  # Needed for SQLite
     )
 
+
+def _create_engine():
+    if DB_BACKEND == "sqlite":
+        return _create_sqlite_engine()
+    if DB_BACKEND == "mssql":
+        return _create_mssql_engine()
+
+    # "auto": try SQL Server, falling back to SQLite if it can't be reached
+    try:
+        logger.info("Attempting to connect to SQL Server...")
+        engine = _create_mssql_engine()
+
+        # Test the connection
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        logger.info("Successfully connected to SQL Server")
+        return engine
+    except Exception as e:
+        logger.error(f"Error connecting to SQL Server: {str(e)}")
+        logger.warning("Falling back to SQLite database")
+        return _create_sqlite_engine()
+
+
+def get_engine():
+    """
+    The SQLAlchemy engine, created on first use rather than at import time, so starting
+    the API doesn't wait on a database connection (see DB_BACKEND).
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine()
+    return _engine
+
+
+def __getattr__(name):
+    # `from database import engine` keeps working, creating the engine when first imported that way
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _LazySessionmaker(sessionmaker):
+    """A sessionmaker that binds its sessions to the lazily created engine."""
+
+    def __call__(self, **local_kw):
+        local_kw.setdefault("bind", get_engine())
+        return super().__call__(**local_kw)
+
+
 # Create a SessionLocal class, which will be used to create database sessions
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
 
 # Dependency to get a DB session in FastAPI path operations
 def get_db():
@@ -50,3 +99,24 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def _probe(engine):
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return engine.dialect.name, (time.perf_counter() - started) * 1000
+
+
+async def check_health(timeout: float = DB_CONNECT_TIMEOUT) -> dict:
+    """Run SELECT 1 off the event loop, reporting the backend and latency or the error."""
+    try:
+        # Creating the engine can itself take up to DB_CONNECT_TIMEOUT (in "auto" mode, before falling back
+        # to SQLite), so it isn't counted against the probe's timeout
+        engine = await asyncio.to_thread(get_engine)
+        backend, latency = await asyncio.wait_for(asyncio.to_thread(_probe, engine), timeout)
+        return {"status": "ok", "backend": backend, "latencyMs": round(latency, 3)}
+    except asyncio.TimeoutError:
+        return {"status": "error", "error": f"Database did not respond within {timeout} seconds"}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
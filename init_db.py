@@ -1,6 +1,7 @@
 # init_db.py
 from database import engine, Base
-from models import Template  # Import all models
+from models import Template, ScenarioRun, StepRun  # Import all models
+import argparse
 import logging
 import sys
 
@@ -8,12 +9,65 @@ import sys
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def init_db():
+def find_duplicate_templates(connection) -> list:
+    """(name, endpoint_type, count) of the templates stored more than once."""
+    from sqlalchemy import text
+    return [tuple(row) for row in connection.execute(text(
+        "SELECT name, endpoint_type, COUNT(*) FROM templates GROUP BY name, endpoint_type "
+        "HAVING COUNT(*) > 1 ORDER BY name, endpoint_type"
+    ))]
+
+def migrate_templates(remove_duplicates: bool = False, bind=None) -> bool:
+    """
+    Bring a templates table created by an earlier version up to date; create_all skips existing tables.
+    The unique index on (name, endpoint_type) can't be created while duplicate templates exist: they
+    are listed and the index is left out, unless remove_duplicates is set (--remove-duplicate-templates),
+    which deletes all but the latest of each first. Returns False when the unique index is still missing.
+    """
+    from sqlalchemy import inspect, text
+    bind = bind if bind is not None else engine
+    inspector = inspect(bind)
+    if "templates" not in inspector.get_table_names():
+        return True
+    existing = {index["name"] for index in inspector.get_indexes("templates")}
+    existing |= {constraint["name"] for constraint in inspector.get_unique_constraints("templates")}
+
+    with bind.begin() as connection:
+        for index in Template.__table__.indexes:
+            if index.name not in existing:
+                index.create(bind=connection)
+                logger.info(f"Created index {index.name}.")
+        if "uq_templates_name_endpoint_type" in existing:
+            return True
+
+        duplicates = find_duplicate_templates(connection)
+        for name, endpoint_type, count in duplicates:
+            logger.warning(f"Template '{name}' ({endpoint_type}) is stored {count} times.")
+        if duplicates and not remove_duplicates:
+            logger.error(f"Not creating unique index uq_templates_name_endpoint_type: {len(duplicates)} templates "
+                         f"are duplicated. Remove the duplicates, or run 'python init_db.py "
+                         f"--remove-duplicate-templates' to keep only the latest of each.")
+            return False
+        if duplicates:
+            removed = connection.execute(text(
+                "DELETE FROM templates WHERE id NOT IN "
+                "(SELECT MAX(id) FROM templates GROUP BY name, endpoint_type)"
+            )).rowcount
+            logger.warning(f"Removed {removed} duplicate templates, keeping the latest of each.")
+        connection.execute(text(
+            "CREATE UNIQUE INDEX uq_templates_name_endpoint_type ON templates (name, endpoint_type)"
+        ))
+        logger.info("Created unique index uq_templates_name_endpoint_type.")
+    return True
+
+def init_db(remove_duplicate_templates: bool = False):
     """Initialize the database by creating all tables."""
     try:
         logger.info("Creating database tables...")
         Base.metadata.create_all(bind=engine)
         logger.info("Database tables created successfully.")
+        if not migrate_templates(remove_duplicate_templates):
+            return False
 
         # Verify tables were created by checking if they exist
         from sqlalchemy import inspect
@@ -56,7 +110,11 @@ def init_db():
         return False
 
 if __name__ == "__main__":
-    success = init_db()
+    parser = argparse.ArgumentParser(description="Create the database tables and bring existing ones up to date.")
+    parser.add_argument("--remove-duplicate-templates", action="store_true",
+                        help="Delete all but the latest of each duplicated template, so the unique index can be created")
+    args = parser.parse_args()
+    success = init_db(args.remove_duplicate_templates)
     if not success:
         logger.error("Database initialization failed.")
         sys.exit(1)
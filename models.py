@@ -1,24 +1,27 @@
 # models.py
-from sqlalchemy import Column, String, Text, DateTime, Integer
+from sqlalchemy import Column, String, JSON, DateTime, Integer, Float, Text, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
-import json
 
 class Template(Base):
     """Database model for body templates."""
     __tablename__ = "templates"
+    # Templates are looked up and upserted by name within an endpoint type
+    __table_args__ = (UniqueConstraint("name", "endpoint_type", name="uq_templates_name_endpoint_type"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
-    endpoint_type = Column(String(100), nullable=False)
-    body = Column(Text, nullable=False)  # JSON stored as text
+    endpoint_type = Column(String(100), nullable=False, index=True)
+    # Native JSON where the dialect has it; on SQLite and SQL Server it's JSON text, as before
+    body = Column(JSON, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     def __init__(self, name, endpoint_type, body):
         self.name = name
         self.endpoint_type = endpoint_type.lower()  # Normalize endpoint type
-        self.body = json.dumps(body)  # Convert dict to JSON string
+        self.body = body
 
     def to_dict(self):
         """Convert model to dictionary."""
@@ -26,7 +29,77 @@ class Template(Base):
             "id": self.id,
             "name": self.name,
             "endpoint_type": self.endpoint_type,
-            "body": json.loads(self.body),  # Convert JSON string back to dict
+            "body": self.body,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
+
+
+class ScenarioRun(Base):
+    """Database model for the history of scenario runs."""
+    __tablename__ = "scenario_runs"
+    # Runs are listed per scenario and environment, newest first
+    __table_args__ = (Index("ix_scenario_runs_scenario_environment_started_at", "scenario", "environment", "started_at"),)
+
+    id = Column(Integer, primary_key=True)
+    scenario = Column(String(255), nullable=False)
+    environment = Column(String(100), nullable=False)
+    status = Column(String(20), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    duration_ms = Column(Float)
+    number_of_requests = Column(Integer, nullable=False, default=0)
+    failed_requests = Column(Integer, nullable=False, default=0)
+
+    steps = relationship("StepRun", back_populates="run", cascade="all, delete-orphan", order_by="StepRun.step_index")
+
+    def to_dict(self):
+        """Convert model to dictionary."""
+        return {
+            "id": self.id,
+            "scenario": self.scenario,
+            "environment": self.environment,
+            "status": self.status,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "duration_ms": self.duration_ms,
+            "number_of_requests": self.number_of_requests,
+            "failed_requests": self.failed_requests,
+        }
+
+
+class StepRun(Base):
+    """Database model for the steps of a scenario run; the response body is kept as a hash and a preview."""
+    __tablename__ = "step_runs"
+    # The run's scenario, environment and start time are repeated so per-step trends are read from one index
+    __table_args__ = (Index("ix_step_runs_scenario_environment_name_started_at",
+                            "scenario", "environment", "name", "started_at"),)
+
+    id = Column(Integer, primary_key=True)
+    run_id = Column(Integer, ForeignKey("scenario_runs.id", ondelete="CASCADE"), nullable=False, index=True)
+    step_index = Column(Integer, nullable=False)
+    scenario = Column(String(255), nullable=False)
+    environment = Column(String(100), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    name = Column(String(255), nullable=False)
+    method = Column(String(10))
+    status_code = Column(Integer)
+    result = Column(String(20), nullable=False)
+    total_ms = Column(Float)
+    timings = Column(JSON)
+    body_hash = Column(String(64))
+    body_preview = Column(Text)
+
+    run = relationship("ScenarioRun", back_populates="steps")
+
+    def to_dict(self):
+        """Convert model to dictionary."""
+        return {
+            "step_index": self.step_index,
+            "name": self.name,
+            "method": self.method,
+            "status_code": self.status_code,
+            "result": self.result,
+            "total_ms": self.total_ms,
+            "timings": self.timings,
+            "body_hash": self.body_hash,
+            "body_preview": self.body_preview,
+        }
@@ -0,0 +1,283 @@
+# run_repository.py
+import atexit
+import hashlib
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from config.settings import RUN_HISTORY_ENABLED, RUN_HISTORY_BATCH_SIZE, RUN_HISTORY_FLUSH_INTERVAL, \
+    RUN_HISTORY_QUEUE_SIZE, RUN_HISTORY_BODY_PREVIEW
+from database import Base, SessionLocal
+from models import ScenarioRun, StepRun
+from util.stats import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# strftime formats of the time buckets of step trends
+TREND_BUCKETS = {"hour": "%Y-%m-%dT%H:00", "day": "%Y-%m-%d"}
+
+
+class RunRecord(NamedTuple):
+    scenario: str
+    environment: str
+    started_at: datetime
+    duration_ms: float
+    results: List[Dict[str, Any]]
+
+
+# Keys of the reference that replaces a large or evicted body in a run result (StoredResponse.reference)
+_BODY_REFERENCE_KEYS = {"reference", "size", "truncated", "preview"}
+
+
+def _body_digest(response: Dict[str, Any], preview_length: int = RUN_HISTORY_BODY_PREVIEW):
+    """
+    (sha256, truncated text) of a result's response body; bodies aren't stored in full. The hash
+    is the one taken of the raw body while it was captured (bodyHash), as the result may only
+    have a reference to it; results without one hash the body they include.
+    """
+    body = response.get("body")
+    if body is None:
+        return response.get("bodyHash"), None
+    if isinstance(body, dict) and body.keys() == _BODY_REFERENCE_KEYS and response.get("bodyHash"):
+        text = body["preview"]
+    else:
+        text = body if isinstance(body, str) else json.dumps(body, sort_keys=True, default=str)
+    body_hash = response.get("bodyHash") or hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return body_hash, text[:preview_length]
+
+
+def history_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The parts of a run result the run history keeps, with the body already reduced to its digest;
+    lets streamed runs collect their results for record_run without holding on to the bodies.
+    """
+    body_hash, body_preview = _body_digest(result.get("response", {}))
+    return {
+        "name": result["name"],
+        "status": result["status"],
+        "request": {"method": result.get("request", {}).get("method")},
+        "timings": result.get("timings", {}),
+        "response": {"body": body_preview, "bodyHash": body_hash},
+    }
+
+
+def _run_model(record: RunRecord) -> ScenarioRun:
+    run = ScenarioRun(
+        scenario=record.scenario,
+        environment=record.environment,
+        started_at=record.started_at,
+        duration_ms=round(record.duration_ms, 3),
+        number_of_requests=len(record.results),
+        failed_requests=sum(1 for result in record.results if result["status"]["text"] == "FAILED"),
+    )
+    run.status = "success" if run.failed_requests == 0 else "failed"
+    for index, result in enumerate(record.results):
+        timings = result.get("timings", {})
+        body_hash, body_preview = _body_digest(result.get("response", {}))
+        run.steps.append(StepRun(
+            step_index=index,
+            scenario=record.scenario,
+            environment=record.environment,
+            started_at=record.started_at,
+            name=result["name"],
+            method=result.get("request", {}).get("method"),
+            status_code=result["status"]["code"],
+            result=result["status"]["text"],
+            total_ms=timings.get("total"),
+            timings=timings,
+            body_hash=body_hash,
+            body_preview=body_preview,
+        ))
+    return run
+
+
+class RunHistoryWriter:
+    """
+    Writes run records to the database on a background thread, so recording a run only
+    costs a queue put. Records are committed in batches of up to batch_size, waiting at
+    most flush_interval seconds for a batch to fill. When the queue is full (the database
+    can't keep up), records are dropped rather than slowing the runs down.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, batch_size: int = RUN_HISTORY_BATCH_SIZE,
+                 flush_interval: float = RUN_HISTORY_FLUSH_INTERVAL, max_queue: int = RUN_HISTORY_QUEUE_SIZE):
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.max_queue = max_queue
+        self._tables_ready = False
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Start over with an empty queue and no writer thread. A forked process inherits the parent's
+        queue and thread handle, but not the running thread, so its records would never be written.
+        """
+        self._queue: "queue.Queue[RunRecord]" = queue.Queue(maxsize=self.max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, record: RunRecord) -> bool:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="run-history-writer", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"Run history queue is full; dropped the run of scenario '{record.scenario}'.")
+            return False
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until every submitted record has been written (or failed to); False on timeout."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                logger.error(f"Error writing {len(batch)} runs to the run history: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: List[RunRecord]) -> None:
+        db = self.session_factory()
+        try:
+            if not self._tables_ready:
+                # Databases initialized before the run history existed don't have its tables yet
+                Base.metadata.create_all(bind=db.get_bind(), tables=[ScenarioRun.__table__, StepRun.__table__])
+                self._tables_ready = True
+            db.add_all([_run_model(record) for record in batch])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+run_history_writer = RunHistoryWriter()
+# Write out what's still queued when the process exits (e.g. a batch runner worker)
+atexit.register(run_history_writer.flush, RUN_HISTORY_FLUSH_INTERVAL + 5)
+
+
+def record_run(scenario: str, environment: str, results: List[Dict[str, Any]], started_at: datetime,
+               duration_ms: float) -> None:
+    """Queue a finished run for the run history (see RUN_HISTORY_ENABLED)."""
+    if RUN_HISTORY_ENABLED:
+        run_history_writer.submit(RunRecord(scenario, environment, started_at, duration_ms, results))
+
+
+def _filter_steps(query, scenario: str, environment: Optional[str], since: Optional[datetime]):
+    query = query.filter(StepRun.scenario == scenario)
+    if environment:
+        query = query.filter(StepRun.environment == environment)
+    if since:
+        query = query.filter(StepRun.started_at >= since)
+    return query
+
+
+def list_runs(db: Session, scenario: Optional[str] = None, environment: Optional[str] = None,
+              limit: int = 50) -> List[ScenarioRun]:
+    """The latest runs, newest first."""
+    query = db.query(ScenarioRun)
+    if scenario:
+        query = query.filter(ScenarioRun.scenario == scenario)
+    if environment:
+        query = query.filter(ScenarioRun.environment == environment)
+    return query.order_by(ScenarioRun.started_at.desc(), ScenarioRun.id.desc()).limit(limit).all()
+
+
+def get_run(db: Session, run_id: int) -> Optional[ScenarioRun]:
+    return db.query(ScenarioRun).filter(ScenarioRun.id == run_id).first()
+
+
+def get_step_trends(db: Session, scenario: str, environment: Optional[str] = None, since: Optional[datetime] = None,
+                    bucket: str = "day") -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Latency percentiles and failure rate of each step of a scenario per time bucket ("hour"
+    or "day"), oldest first. Only the indexed step columns are read, streamed in batches.
+    """
+    if bucket not in TREND_BUCKETS:
+        raise ValueError(f"Unknown trend bucket '{bucket}'; expected one of {', '.join(TREND_BUCKETS)}.")
+    bucket_format = TREND_BUCKETS[bucket]
+
+    query = _filter_steps(db.query(StepRun.name, StepRun.started_at, StepRun.result, StepRun.total_ms),
+                          scenario, environment, since)
+    buckets: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for name, started_at, result, total_ms in query.order_by(StepRun.started_at).yield_per(1000):
+        key = started_at.strftime(bucket_format)
+        entry = buckets.setdefault(name, {}).get(key)
+        if entry is None:
+            entry = buckets[name][key] = {"runs": 0, "failed": 0, "latency": LatencyHistogram()}
+        entry["runs"] += 1
+        if result == "FAILED":
+            entry["failed"] += 1
+        entry["latency"].add(total_ms)
+
+    return {
+        name: [
+            {
+                "bucket": key,
+                "runs": entry["runs"],
+                "failed": entry["failed"],
+                "failureRate": round(entry["failed"] / entry["runs"], 4),
+                "latencyMs": entry["latency"].summary(),
+            }
+            for key, entry in entries.items()
+        ]
+        for name, entries in buckets.items()
+    }
+
+
+def get_step_failure_rates(db: Session, scenario: str, environment: Optional[str] = None,
+                           since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Runs, failures and mean latency of each step of a scenario, aggregated in the database."""
+    failed = func.sum(case((StepRun.result == "FAILED", 1), else_=0))
+    query = _filter_steps(
+        db.query(StepRun.name, func.count(StepRun.id), failed, func.avg(StepRun.total_ms),
+                 func.min(StepRun.step_index), func.max(StepRun.started_at)),
+        scenario, environment, since,
+    ).group_by(StepRun.name)
+
+    rates = []
+    for name, runs, failures, mean_ms, step_index, last_run in query.all():
+        failures = int(failures or 0)
+        rates.append({
+            "name": name,
+            "stepIndex": step_index,
+            "runs": runs,
+            "failed": failures,
+            "failureRate": round(failures / runs, 4) if runs else 0.0,
+            "meanMs": round(mean_ms, 3) if mean_ms is not None else None,
+            "lastRun": last_run.isoformat() if last_run else None,
+        })
+    return sorted(rates, key=lambda rate: rate["stepIndex"])
@@ -0,0 +1,100 @@
+# scenario_repository.py
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from config.settings import SCENARIO_CACHE_STAT_INTERVAL
+from scenario.scenario import TestScenario
+from util.yaml_utils import yaml_file_to_object
+
+
+class _CachedScenario(NamedTuple):
+    signature: Tuple[int, int]  # (mtime_ns, size) of the file the scenario was parsed from
+    checked_at: float
+    scenario: TestScenario
+
+
+class _CachedListing(NamedTuple):
+    mtime_ns: int
+    checked_at: float
+    names: List[str]
+
+
+class ScenarioRepository:
+    """
+    Parsed and compiled scenarios, cached by file path.
+
+    An entry is reused as long as the file's mtime and size are unchanged. Files are
+    stat'ed at most once per stat_interval seconds, so running the same scenario in a
+    tight loop doesn't touch the disk; directory listings are cached the same way,
+    keyed by the directory's mtime. Cached scenarios are shared by every caller and
+    must not be modified.
+    """
+
+    def __init__(self, stat_interval: float = SCENARIO_CACHE_STAT_INTERVAL):
+        self.stat_interval = stat_interval
+        self._scenarios: Dict[str, _CachedScenario] = {}
+        self._listings: Dict[str, _CachedListing] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> TestScenario:
+        """Return the scenario stored at path; raises FileNotFoundError if there is none."""
+        now = time.monotonic()
+        cached = self._scenarios.get(path)
+        if cached is not None and now - cached.checked_at < self.stat_interval:
+            return cached.scenario
+
+        with self._lock:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                self._scenarios.pop(path, None)
+                raise
+            signature = (stat.st_mtime_ns, stat.st_size)
+            cached = self._scenarios.get(path)
+            if cached is not None and cached.signature == signature:
+                scenario = cached.scenario
+            else:
+                scenario = yaml_file_to_object(path, TestScenario)
+                scenario.compile()
+            self._scenarios[path] = _CachedScenario(signature, now, scenario)
+            return scenario
+
+    def exists(self, path: str) -> bool:
+        try:
+            self.get(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def list_names(self, directory: str, extension: str = ".yaml") -> List[str]:
+        """Names (without extension) of the scenario files in directory, which is created if missing."""
+        now = time.monotonic()
+        cached = self._listings.get(directory)
+        if cached is not None and now - cached.checked_at < self.stat_interval:
+            return list(cached.names)
+
+        with self._lock:
+            os.makedirs(directory, exist_ok=True)
+            mtime_ns = os.stat(directory).st_mtime_ns
+            cached = self._listings.get(directory)
+            if cached is not None and cached.mtime_ns == mtime_ns:
+                names = cached.names
+            else:
+                names = [os.path.splitext(f)[0] for f in os.listdir(directory) if f.endswith(extension)]
+            self._listings[directory] = _CachedListing(mtime_ns, now, names)
+            return list(names)
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Forget the cached scenario at path and the listing of its directory, or everything."""
+        with self._lock:
+            if path is None:
+                self._scenarios.clear()
+                self._listings.clear()
+            else:
+                self._scenarios.pop(path, None)
+                self._listings.pop(os.path.dirname(path), None)
+
+
+scenario_repository = ScenarioRepository()
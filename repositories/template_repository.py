@@ -1,14 +1,71 @@
 # template_repository.py
+from sqlalchemy import Text, func, text, type_coerce
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 from models import Template
+from config.settings import TEMPLATE_CACHE_TTL_SECONDS
 import json
-from typing import Dict, Any, List, Optional
+import threading
+import time
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+class TemplateCache:
+    """
+    Read-through cache of templates per endpoint type, as plain values (ORM objects are tied to
+    their session). Each endpoint type can be cached in several views (e.g. rows, or raw JSON
+    bodies), which are invalidated together. Entries expire after ttl seconds, so writes made by other processes show up
+    eventually; writes through this module invalidate the affected endpoint types immediately.
+
+    Every invalidation bumps a generation counter. Readers take the generation before querying
+    and pass it to put, which drops rows read before an invalidation, so a read in flight
+    during a write can't cache stale templates.
+    """
+
+    def __init__(self, ttl: float = TEMPLATE_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, str], Tuple[float, List[Any]]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, endpoint_type: str, view: str = "raw") -> Optional[List[Any]]:
+        entry = self._entries.get((endpoint_type, view))
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def put(self, endpoint_type: str, templates: List[Any], generation: Optional[int] = None,
+            view: str = "raw") -> bool:
+        """Cache templates read at the given generation; False (not cached) if they were invalidated since."""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+            self._entries[(endpoint_type, view)] = (time.monotonic() + self.ttl, templates)
+            return True
+
+    def invalidate(self, endpoint_type: Optional[str] = None) -> None:
+        with self._lock:
+            self._generation += 1
+            if endpoint_type is None:
+                self._entries.clear()
+            else:
+                endpoint_type = endpoint_type.lower()
+                for key in [key for key in self._entries if key[0] == endpoint_type]:
+                    del self._entries[key]
+
+template_cache = TemplateCache()
 
 def create_template(db: Session, name: str, endpoint_type: str, body: Dict[str, Any]) -> Template:
     """Create a new template in the database."""
     db_template = Template(name=name, endpoint_type=endpoint_type, body=body)
     db.add(db_template)
     db.commit()
+    template_cache.invalidate(endpoint_type)
     db.refresh(db_template)
     return db_template
 
@@ -19,24 +76,55 @@ def get_template_by_name_and_type(db: Session, name: str, endpoint_type: str) ->
         Template.endpoint_type == endpoint_type.lower()
     ).first()
 
-def get_templates_by_type(db: Session, endpoint_type: str) -> List[Template]:
-    """Get all templates for a specific endpoint type."""
-    return db.query(Template).filter(
-        Template.endpoint_type == endpoint_type.lower()
-    ).all()
+def _cached_templates(endpoint_type: str, view: str, load: Callable[[], List[Any]]) -> List[Any]:
+    """The cached view of an endpoint type's templates, calling load() to fill it on a miss."""
+    templates = template_cache.get(endpoint_type, view)
+    if templates is None:
+        generation = template_cache.generation
+        templates = load()
+        template_cache.put(endpoint_type, templates, generation, view)
+    return templates
+
+def get_templates_by_type(db: Session, endpoint_type: str) -> List[Row]:
+    """
+    Get all templates for a specific endpoint type, served from the template cache. The templates
+    are read-only rows with the Template columns as attributes, not session-bound Template objects.
+    """
+    endpoint_type = endpoint_type.lower()
+    return list(_cached_templates(endpoint_type, "rows", lambda: db.query(*Template.__table__.columns).filter(
+        Template.endpoint_type == endpoint_type
+    ).order_by(Template.id).all()))
+
+def _raw_template_query(db: Session, *columns):
+    # The body is read as the stored JSON text, skipping the decode of the JSON type
+    return db.query(*columns, type_coerce(Template.body, Text).label("body"))
+
+def get_raw_template_bodies_by_type(db: Session, endpoint_type: str) -> List[Tuple[str, str]]:
+    """(name, body as JSON text) of all templates for an endpoint type, served from the template cache."""
+    endpoint_type = endpoint_type.lower()
+    return _cached_templates(endpoint_type, "raw", lambda: [tuple(row) for row in _raw_template_query(
+        db, Template.name
+    ).filter(Template.endpoint_type == endpoint_type).order_by(Template.id)])
 
-def update_template(db: Session, name: str, endpoint_type: str, body: Dict[str, Any]) -> Optional[Template]:
-    """Update an existing template."""
+def _decode_body(body: Any, encoded: bool) -> Any:
+    """
+    The body to store. A string body is stored as a JSON string, unless encoded says it is
+    JSON text (e.g. exported by an earlier version), which is decoded; raises ValueError if it isn't valid JSON.
+    """
+    if encoded and isinstance(body, str):
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            raise ValueError(f"Template body is not valid JSON: {e}")
+    return body
+
+def update_template(db: Session, name: str, endpoint_type: str, body: Any, encoded: bool = False) -> Optional[Template]:
+    """Update an existing template; with encoded, a string body is decoded from JSON text."""
     db_template = get_template_by_name_and_type(db, name, endpoint_type)
     if db_template:
-        # The Template model's __init__ method already converts the body to a JSON string,
-        # but we're updating an existing instance, so we need to do it manually here.
-        # Check if the body is already a JSON string to avoid double-encoding
-        if isinstance(body, dict):
-            db_template.body = json.dumps(body)
-        else:
-            db_template.body = body
+        db_template.body = _decode_body(body, encoded)
         db.commit()
+        template_cache.invalidate(endpoint_type)
         db.refresh(db_template)
     return db_template
 
@@ -46,9 +134,119 @@ def delete_template(db: Session, name: str, endpoint_type: str) -> bool:
     if db_template:
         db.delete(db_template)
         db.commit()
+        template_cache.invalidate(endpoint_type)
         return True
     return False
 
 def get_all_templates(db: Session) -> List[Template]:
     """Get all templates."""
     return db.query(Template).all()
+
+# Rows per statement in bulk upserts; keeps MERGE below SQL Server's 2100-parameter limit
+BULK_CHUNK_SIZE = 500
+
+def _template_rows(templates: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Normalize templates into table rows, keeping the last one for each (name, endpoint_type).
+    String bodies of templates with "encoded" set are decoded from JSON text (see _decode_body).
+    """
+    rows: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for template in templates:
+        endpoint_type = template["endpoint_type"].lower()
+        rows[(template["name"], endpoint_type)] = {
+            "name": template["name"],
+            "endpoint_type": endpoint_type,
+            "body": _decode_body(template["body"], template.get("encoded", False)),
+        }
+    return list(rows.values())
+
+def _chunks(rows: List[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        yield rows[start:start + BULK_CHUNK_SIZE]
+
+def _upsert_sqlite(db: Session, rows: List[Dict[str, Any]]) -> None:
+    for chunk in _chunks(rows):
+        statement = sqlite_insert(Template).values(chunk)
+        statement = statement.on_conflict_do_update(
+            index_elements=["name", "endpoint_type"],
+            set_={"body": statement.excluded.body, "updated_at": func.now()},
+        )
+        db.execute(statement)
+
+def _merge_mssql(db: Session, rows: List[Dict[str, Any]]) -> None:
+    for chunk in _chunks(rows):
+        values = ", ".join(f"(:name_{i}, :endpoint_type_{i}, :body_{i})" for i in range(len(chunk)))
+        params = {}
+        for i, row in enumerate(chunk):
+            params[f"name_{i}"] = row["name"]
+            params[f"endpoint_type_{i}"] = row["endpoint_type"]
+            params[f"body_{i}"] = json.dumps(row["body"])
+        db.execute(text(
+            f"MERGE templates WITH (HOLDLOCK) AS target "
+            f"USING (VALUES {values}) AS source (name, endpoint_type, body) "
+            f"ON target.name = source.name AND target.endpoint_type = source.endpoint_type "
+            f"WHEN MATCHED THEN UPDATE SET body = source.body, updated_at = SYSDATETIMEOFFSET() "
+            f"WHEN NOT MATCHED THEN INSERT (name, endpoint_type, body) "
+            f"VALUES (source.name, source.endpoint_type, source.body);"
+        ), params)
+
+def _upsert_generic(db: Session, rows: List[Dict[str, Any]]) -> None:
+    # One SELECT per chunk instead of one per template
+    for chunk in _chunks(rows):
+        existing = {
+            (template.name, template.endpoint_type): template
+            for template in db.query(Template).filter(Template.name.in_({row["name"] for row in chunk}))
+        }
+        for row in chunk:
+            template = existing.get((row["name"], row["endpoint_type"]))
+            if template:
+                template.body = row["body"]
+            else:
+                db.add(Template(row["name"], row["endpoint_type"], row["body"]))
+        db.flush()
+
+def bulk_upsert_templates(db: Session, templates: Iterable[Dict[str, Any]]) -> int:
+    """
+    Create or update many templates, matched by name and endpoint type, in one transaction.
+    Uses the dialect's native upsert (SQLite ON CONFLICT, SQL Server MERGE) when available.
+    Returns the number of templates written; raises ValueError for encoded bodies that aren't valid JSON.
+    """
+    rows = _template_rows(templates)
+    if not rows:
+        return 0
+    dialect = db.get_bind().dialect.name
+    try:
+        if dialect == "sqlite":
+            try:
+                _upsert_sqlite(db, rows)
+            except OperationalError:
+                # ON CONFLICT needs the unique index, which init_db adds to databases created before it
+                db.rollback()
+                _upsert_generic(db, rows)
+        elif dialect == "mssql":
+            _merge_mssql(db, rows)
+        else:
+            _upsert_generic(db, rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    for endpoint_type in {row["endpoint_type"] for row in rows}:
+        template_cache.invalidate(endpoint_type)
+    return len(rows)
+
+def iter_templates(db: Session, endpoint_type: Optional[str] = None, batch_size: int = BULK_CHUNK_SIZE) -> Iterator[Template]:
+    """Stream templates in batches of batch_size rows instead of loading them all at once."""
+    query = db.query(Template)
+    if endpoint_type:
+        query = query.filter(Template.endpoint_type == endpoint_type.lower())
+    return query.order_by(Template.id).yield_per(batch_size)
+
+def iter_raw_templates(db: Session, endpoint_type: Optional[str] = None,
+                       batch_size: int = BULK_CHUNK_SIZE) -> Iterator[Tuple[str, str, str]]:
+    """Stream (name, endpoint_type, body as JSON text) of templates, without loading or decoding them all."""
+    query = _raw_template_query(db, Template.name, Template.endpoint_type)
+    if endpoint_type:
+        query = query.filter(Template.endpoint_type == endpoint_type.lower())
+    for row in query.order_by(Template.id).yield_per(batch_size):
+        yield tuple(row)
@@ -0,0 +1,172 @@
+"""
+Runs many scenarios in one invocation, sharded across a pool of worker processes.
+
+Every scenario under SCENARIO_SAVE_DIR (or those whose names match a glob) is
+submitted to the pool as its own task; each worker process has its own pooled
+HTTP sessions and token cache. The per-scenario reports are merged into one
+report with pass/fail counts and request latency across all scenarios.
+
+    python -m runtime.batch_runner --pattern "smoke_*" --environment localDev --workers 4
+"""
+import argparse
+import fnmatch
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional
+
+from config.settings import BATCH_START_METHOD, RUN_HISTORY_FLUSH_INTERVAL
+from util.stats import LatencyHistogram
+
+
+def find_scenarios(pattern: Optional[str] = None) -> List[str]:
+    """Names of the saved scenarios matching the glob pattern (all of them without one), sorted."""
+    from runtime.flow_runner import list_scenarios
+    names = sorted(list_scenarios())
+    if pattern:
+        names = [name for name in names if fnmatch.fnmatch(name, pattern)]
+    return names
+
+
+def _init_worker(environment: str) -> None:
+    """
+    Select the environment and start the worker with fresh HTTP sessions and tokens. With
+    the fork start method a worker would otherwise inherit the parent's pooled connections.
+    """
+    from config.config import Config
+    from config.token_generator import token_cache
+    from repositories.run_repository import run_history_writer
+    from util.http_client import http_transport
+
+    Config.set_selected_env(environment)
+    http_transport.close()
+    token_cache.clear()
+    run_history_writer.reset()
+
+
+def run_scenario_report(name: str, environment: str, concurrency: int = None) -> dict:
+    """Run one scenario and report its status, timing and steps; never raises."""
+    from repositories.run_repository import run_history_writer
+    from runtime.flow_runner import run
+
+    started = time.perf_counter()
+    report = {"scenario": name}
+    try:
+        summary = run(name, environment, concurrency)
+    except Exception as e:
+        report.update({
+            "status": "error",
+            "durationSeconds": round(time.perf_counter() - started, 3),
+            "numberOfRequests": 0,
+            "failedRequests": 0,
+            "steps": [],
+            "error": f"{e}\n{traceback.format_exc()}",
+        })
+        return report
+    finally:
+        # Forked workers exit without running atexit hooks, so write the run's record out now
+        run_history_writer.flush(RUN_HISTORY_FLUSH_INTERVAL + 5)
+
+    steps = [
+        {
+            "name": result["name"],
+            "status": result["status"]["code"],
+            "result": result["status"]["text"],
+            "totalMs": result.get("timings", {}).get("total"),
+        }
+        for result in summary["requests"]
+    ]
+    report.update({
+        "status": summary["status"],
+        "durationSeconds": round(time.perf_counter() - started, 3),
+        "numberOfRequests": summary["numberOfRequests"],
+        "failedRequests": sum(1 for step in steps if step["result"] == "FAILED"),
+        "steps": steps,
+    })
+    return report
+
+
+def merge_reports(reports: List[dict], environment: str, elapsed: float) -> dict:
+    """Combine per-scenario reports into the batch report."""
+    reports = sorted(reports, key=lambda report: report["scenario"])
+    request_latency = LatencyHistogram()
+    for report in reports:
+        for step in report["steps"]:
+            request_latency.add(step["totalMs"])
+
+    passed = sum(1 for report in reports if report["status"] == "success")
+    errors = sum(1 for report in reports if report["status"] == "error")
+    return {
+        "environment": environment,
+        "durationSeconds": round(elapsed, 3),
+        "scenarios": len(reports),
+        "passed": passed,
+        "failed": len(reports) - passed - errors,
+        "errors": errors,
+        "requests": sum(report["numberOfRequests"] for report in reports),
+        "failedRequests": sum(report["failedRequests"] for report in reports),
+        "requestLatencyMs": request_latency.summary(),
+        "results": reports,
+        "status": "success" if passed == len(reports) else "failed",
+    }
+
+
+def run_batch(pattern: Optional[str] = None, environment: str = "localDev", workers: int = None,
+              concurrency: int = None) -> dict:
+    """
+    Run every saved scenario matching pattern across a pool of worker processes.
+    :param workers: Number of worker processes (defaults to the CPU count, capped at the number of scenarios).
+    :param concurrency: Step concurrency inside each scenario, as for flow_runner.run().
+    """
+    if not environment:
+        raise ValueError("Environment cannot be empty.")
+    names = find_scenarios(pattern)
+    started = time.perf_counter()
+    if not names:
+        return merge_reports([], environment, 0.0)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(names)))
+    # Workers are spawned rather than forked by default: the parent runs threads
+    # (body pool refills, the API's workers) whose locks a forked child could inherit held
+    context = multiprocessing.get_context(BATCH_START_METHOD)
+    reports = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(environment,)) as executor:
+        futures = {executor.submit(run_scenario_report, name, environment, concurrency): name for name in names}
+        for future in as_completed(futures):
+            try:
+                reports.append(future.result())
+            except Exception as e:
+                # The worker itself died (e.g. BrokenProcessPool); run_scenario_report never raises
+                reports.append({"scenario": futures[future], "status": "error", "durationSeconds": 0.0,
+                                "numberOfRequests": 0, "failedRequests": 0, "steps": [], "error": str(e)})
+
+    return merge_reports(reports, environment, time.perf_counter() - started)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run saved scenarios in parallel worker processes.")
+    parser.add_argument("--pattern", help="Glob matched against scenario names, e.g. 'smoke_*' (default: all)")
+    parser.add_argument("--environment", default="localDev", help="Environment to run against")
+    parser.add_argument("--workers", type=int, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--concurrency", type=int, help="Step concurrency inside each scenario")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run_batch(args.pattern, args.environment, args.workers, args.concurrency)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"{report['passed']}/{report['scenarios']} scenarios passed; report written to {args.output}")
+    else:
+        print(output)
+    return 0 if report["status"] == "success" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,204 @@
+import asyncio
+import contextvars
+import threading
+import time
 import traceback
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Optional
 
 from config.config import Config
 from scenario.scenario import *
 from util.yaml_utils import *
+from util.stats import LatencyHistogram
+from scenario.assertions import AssertionCollector, pass_rate_entry
+from repositories.scenario_repository import scenario_repository
+from repositories.run_repository import history_result, record_run
 import os
 
 
-def run(scenarioName: str, environment: str):
+def run(scenarioName: str, environment: str, concurrency: int = None):
     """
-    Run the specified scenario.
+    Run the specified scenario; the run is recorded in the run history (see run_repository).
+    :param concurrency: Maximum number of independent steps to run in parallel (defaults to SCENARIO_MAX_CONCURRENCY).
+    """
+    scenario = load_scenario(scenarioName, environment)
+
+    # Execute the scenario
+    started_at, started = datetime.now(timezone.utc), time.perf_counter()
+    results = scenario.execute(max_concurrency=concurrency)
+    record_run(scenarioName, environment, results, started_at, (time.perf_counter() - started) * 1000)
+    return summarize_results(results)
+
+
+async def run_async(scenarioName: str, environment: str, concurrency: int = None):
+    """
+    Run the specified scenario on the running event loop, without blocking a worker thread per request.
+    """
+    # The environment is selected here rather than in the worker thread, whose context changes wouldn't
+    # carry back; reading and parsing the YAML file is blocking IO, so keep that off the event loop
+    select_environment(scenarioName, environment)
+    scenario = await asyncio.to_thread(read_scenario, scenarioName)
+
+    started_at, started = datetime.now(timezone.utc), time.perf_counter()
+    results = await scenario.execute_async(max_concurrency=concurrency)
+    record_run(scenarioName, environment, results, started_at, (time.perf_counter() - started) * 1000)
+    return summarize_results(results)
+
+
+class _Pacer:
+    """
+    Spaces out iteration starts across all virtual users to hold a target rate.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self.next_start = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(self.next_start, now)
+            self.next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def run_load_test(scenarioName: str, environment: str, users: int = 1, iterations: int = None,
+                  duration: float = None, ramp_up: float = 0, target_rps: float = None, concurrency: int = None):
+    """
+    Run the specified scenario repeatedly across concurrent virtual users and aggregate the results.
+    :param users: Number of virtual users running iterations in parallel.
+    :param iterations: Total number of scenario iterations across all users (defaults to one per user
+                       when no duration is given).
+    :param duration: Stop starting new iterations after this many seconds.
+    :param ramp_up: Seconds over which the virtual users are started, evenly spaced.
+    :param target_rps: Target request rate; iteration starts are paced to
+                       target_rps / number of steps per iteration.
+    :param concurrency: Step concurrency inside each iteration, as for run().
+    """
+    if users < 1:
+        raise ValueError("Number of users must be at least 1.")
+    if iterations is None and duration is None:
+        iterations = users
+
+    # Parse and compile the scenario once; runs only read the compiled plan, so all users share it
+    scenario = load_scenario(scenarioName, environment)
+    plan = scenario.compile()
+    steps_per_iteration = max(len(scenario.requests), 1)
+    # Assertion values are collected across all iterations and checked in batches
+    collector = AssertionCollector(plan) if any(step.assertions for step in plan.steps) else None
+    pacer = _Pacer(target_rps / steps_per_iteration) if target_rps else None
+
+    lock = threading.Lock()
+    started_iterations = [0]
+    iteration_latency = LatencyHistogram()
+    request_latency = LatencyHistogram()
+    step_timings: Dict[str, Dict[str, LatencyHistogram]] = {}
+    step_failures: Dict[str, int] = {}
+    counters = {"iterations": 0, "failedIterations": 0, "requests": 0, "failedRequests": 0}
+
+    start = time.monotonic()
+    deadline = start + duration if duration else None
+
+    def claim_iteration() -> Optional[int]:
+        with lock:
+            if iterations is not None and started_iterations[0] >= iterations:
+                return None
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            started_iterations[0] += 1
+            return started_iterations[0]
+
+    def record(results: list, elapsed_ms: float):
+        failed = steps_per_iteration - len(results) if scenario.requests else 0
+        with lock:
+            counters["iterations"] += 1
+            iteration_latency.add(elapsed_ms)
+            for result in results:
+                name = result["name"]
+                request_latency.add(result.get("timings", {}).get("total"))
+                record_step_timings(step_timings, result)
+                if result["status"]["text"] == "FAILED":
+                    failed += 1
+                    step_failures[name] = step_failures.get(name, 0) + 1
+            counters["requests"] += steps_per_iteration if scenario.requests else 0
+            counters["failedRequests"] += failed
+            if failed:
+                counters["failedIterations"] += 1
+
+    def virtual_user(user: int):
+        if ramp_up and users > 1:
+            time.sleep(ramp_up * user / users)
+        while True:
+            iteration = claim_iteration()
+            if iteration is None:
+                return
+            if pacer:
+                pacer.wait()
+                # The paced start may fall after the deadline of a duration run
+                if deadline is not None and time.monotonic() >= deadline:
+                    return
+            # Each iteration gets its own context, so users never share state
+            context = {"vu": user, "iteration": iteration}
+            iteration_start = time.perf_counter()
+            try:
+                results = scenario.execute(context, max_concurrency=concurrency, collector=collector)
+            except Exception as e:
+                print(f"  Virtual user {user}: iteration {iteration} failed - {e}")
+                results = []
+            record(results, (time.perf_counter() - iteration_start) * 1000)
+
+    # Every virtual user runs in a copy of this context, so it sees the environment selected above
+    threads = [threading.Thread(target=contextvars.copy_context().run, args=(virtual_user, user), daemon=True)
+               for user in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    summary = {
+        "scenario": scenarioName,
+        "environment": environment,
+        "users": users,
+        "durationSeconds": round(elapsed, 3),
+        "iterations": counters["iterations"],
+        "failedIterations": counters["failedIterations"],
+        "requests": counters["requests"],
+        "failedRequests": counters["failedRequests"],
+        "errorRate": round(counters["failedRequests"] / counters["requests"], 4) if counters["requests"] else 0.0,
+        "throughput": {
+            "iterationsPerSecond": round(counters["iterations"] / elapsed, 3) if elapsed else 0.0,
+            "requestsPerSecond": round(counters["requests"] / elapsed, 3) if elapsed else 0.0,
+        },
+        "iterationLatencyMs": iteration_latency.summary(),
+        "requestLatencyMs": request_latency.summary(),
+        "steps": {
+            name: {"failed": step_failures.get(name, 0), "timings": timings}
+            for name, timings in summarize_step_timings(step_timings).items()
+        },
+        "status": "success" if counters["failedRequests"] == 0 else "failed",
+    }
+    if collector is not None:
+        summary["assertions"] = collector.report()
+        if any(entry["failed"] or entry.get("slaMet") is False
+               for entries in summary["assertions"].values() for entry in entries):
+            summary["status"] = "failed"
+    return summary
+
+
+def load_scenario(scenarioName: str, environment: str) -> TestScenario:
+    """
+    Validate the run arguments, select the environment and load the scenario.
+    """
+    select_environment(scenarioName, environment)
+    return read_scenario(scenarioName)
+
+
+def select_environment(scenarioName: str, environment: str):
+    """
+    Validate the run arguments and select the environment for the current context (see Config).
     """
     # Check if the scenario name is valid
     if not scenarioName:
@@ -19,46 +209,124 @@ def run(scenarioName: str, environment: str):
 
     Config.set_selected_env(environment)
 
-    # Get the full path of the scenario file
-    path = get_scenario_path(scenarioName)
 
-    # Check if the YAML file exists
-    isExists = is_yaml_exists(path)
-    if not isExists:
+def read_scenario(scenarioName: str) -> TestScenario:
+    """
+    Return the parsed and compiled scenario, from the scenario cache unless its file changed.
+    """
+    try:
+        return scenario_repository.get(get_scenario_path(scenarioName))
+    except FileNotFoundError:
         raise FileNotFoundError(f"Scenario '{scenarioName}' does not exist.")
 
-    # Load the scenario YAML file
-    scenario = yaml_file_to_object(path, TestScenario)
 
-    # Execute the scenario
-    results = scenario.execute()
-    numberOfFailedRequests = 0
-    for result in results:
+def record_step_timings(step_timings: Dict[str, Dict[str, LatencyHistogram]], result: dict):
+    """
+    Add a run result's phase timings to the per-step, per-phase histograms.
+    """
+    phases = step_timings.setdefault(result["name"], {})
+    for phase, value in result.get("timings", {}).items():
+        phases.setdefault(phase, LatencyHistogram()).add(value)
+
+
+def summarize_step_timings(step_timings: Dict[str, Dict[str, LatencyHistogram]]) -> dict:
+    return {
+        name: {phase: histogram.summary() for phase, histogram in phases.items()}
+        for name, phases in step_timings.items()
+    }
+
+
+class RunSummary:
+    """
+    The overall status and per-step timings of a run, accumulated one result at a time
+    so streamed runs don't have to keep their results.
+    """
+
+    def __init__(self):
+        self.numberOfRequests = 0
+        self.numberOfFailedRequests = 0
+        self.step_timings: Dict[str, Dict[str, LatencyHistogram]] = {}
+        # (passed, total) per step and assertion
+        self.assertions: Dict[str, Dict[str, list]] = {}
+
+    def add(self, result: dict):
+        self.numberOfRequests += 1
         # The results are dictionaries, not objects, so use dictionary access
         if result["status"]["text"] == "FAILED":
-            numberOfFailedRequests += 1
+            self.numberOfFailedRequests += 1
+        record_step_timings(self.step_timings, result)
+        for outcome in result.get("assertions", ()):
+            counts = self.assertions.setdefault(result["name"], {}).setdefault(outcome["assertion"], [0, 0])
+            counts[0] += outcome["passed"]
+            counts[1] += 1
 
-    final_results = {
-        "requests": results,
-        "numberOfRequests": len(results),
-        "status": "success" if numberOfFailedRequests == 0 else "failed",
-    }
+    def as_dict(self) -> dict:
+        summary = {
+            "numberOfRequests": self.numberOfRequests,
+            "status": "success" if self.numberOfFailedRequests == 0 else "failed",
+            "timings": summarize_step_timings(self.step_timings),
+        }
+        if self.assertions:
+            summary["assertions"] = {
+                name: [pass_rate_entry(assertion, passed, total) for assertion, (passed, total) in outcomes.items()]
+                for name, outcomes in self.assertions.items()
+            }
+        return summary
+
+
+def summarize_results(results: list) -> dict:
+    """
+    Wrap the per-request results with the overall run status.
+    """
+    summary = RunSummary()
+    for result in results:
+        summary.add(result)
+
+    final_results = {"requests": results}
+    final_results.update(summary.as_dict())
 
     return final_results
 
+
+async def stream_run(scenario: TestScenario, concurrency: int = None) -> AsyncIterator[dict]:
+    """
+    Run a loaded scenario (see load_scenario), yielding a "step" frame with each result
+    as soon as its step finishes and a final "summary" frame. The run is recorded in the
+    run history like any other, from the digests of its results (see history_result).
+    """
+    summary = RunSummary()
+    history = []
+    started_at, started = datetime.now(timezone.utc), time.perf_counter()
+    async for index, result in scenario.iter_execute_async(max_concurrency=concurrency):
+        summary.add(result)
+        history.append((index, history_result(result)))
+        yield {"event": "step", "index": index, "result": result}
+    duration_ms = (time.perf_counter() - started) * 1000
+
+    frame = {"event": "summary"}
+    frame.update(summary.as_dict())
+    yield frame
+    # Steps that run in parallel finish out of order; the history keeps the scenario's order
+    history.sort(key=lambda entry: entry[0])
+    record_run(scenario.name, Config.get_selected_env_name(), [result for _, result in history], started_at,
+               duration_ms)
+
+
 def save_scenario(scenario: TestScenario) -> bool:
     """
     Save or update the scenario to a YAML file.
     """
     path = get_scenario_path(scenario.name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
 
     for req in (scenario.requests or []):
         # replace space with underscore
         req.name = req.name.replace(" ", "_")
-        req.save_as = req.name
+        req.save_as = req.save_as or req.name
 
     # Save the scenario to the YAML file
     object_to_yaml_file(scenario, path)
+    scenario_repository.invalidate(path)
 
     return True
 
@@ -67,20 +335,15 @@ def list_scenarios() -> list:
     List all scenarios in the scenario directory.
     """
     scenario_save_dir = os.getenv("SCENARIO_SAVE_DIR", "./")
-    os.makedirs(scenario_save_dir, exist_ok=True)
-
-    # List all YAML files in the scenario directory
-    scenario_files = [f for f in os.listdir(scenario_save_dir) if f.endswith('.yaml')]
 
-    # Return the list of scenario names without extensions
-    return [os.path.splitext(f)[0] for f in scenario_files]
+    # List the YAML files in the scenario directory, as names without extensions
+    return scenario_repository.list_names(scenario_save_dir)
 
 def get_scenario_path(scenarioName: str) -> str:
     """
     Get the full path of the scenario file.
     """
     scenario_save_dir = os.getenv("SCENARIO_SAVE_DIR", "./")
-    os.makedirs(scenario_save_dir, exist_ok=True)
     return os.path.join(scenario_save_dir, handleExtension(scenarioName))
 
 
@@ -0,0 +1,283 @@
+"""
+A mock of the DGate gateway for running scenarios and load tests without the real backend.
+
+Every endpoint registered in ValidatorFactory.validators is served as a collection kept in
+memory: POST creates items (or, for a list body, one item per element) with generated ids
+(e.g. "apiSpecId" for api-specs), GET lists a collection or reads an item, PUT/PATCH update
+and DELETE removes one. As with route resolution, the rightmost known segment of a path
+names the collection, so "authenticators/3/credentials" is the credentials collection.
+Keycloak's token endpoint is answered too, so an environment can point both its envUrl
+and urlKeycloak at the mock.
+
+Latency (a fixed delay plus a random jitter) and errors (a share of requests answered
+with an error status) can be injected. The time the mock spends per request is reported
+at /__mock__/stats, to tell the runner's own overhead apart from the server's.
+
+    python -m runtime.mock_gateway --port 8099 --latency-ms 5 --error-rate 0.01
+"""
+import argparse
+import itertools
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from config.settings import MOCK_GATEWAY_HOST, MOCK_GATEWAY_PORT, MOCK_GATEWAY_LATENCY_MS, \
+    MOCK_GATEWAY_LATENCY_JITTER_MS, MOCK_GATEWAY_ERROR_RATE, MOCK_GATEWAY_ERROR_STATUS, MOCK_GATEWAY_MAX_ITEMS
+from util.stats import LatencyHistogram
+from validation.endpoint_validations import ValidatorFactory
+
+TOKEN_PATH = "/protocol/openid-connect/token"
+STATS_PATH = "/__mock__/stats"
+RESET_PATH = "/__mock__/reset"
+
+# Fallback validators, not endpoints of the gateway
+_FALLBACK_KEYS = {"item", "default"}
+
+
+@lru_cache(maxsize=None)
+def id_field(collection: str) -> str:
+    """The id field of a collection's items: "api-specs" -> "apiSpecId", "policies" -> "policyId"."""
+    words = collection.split("-")
+    last = words[-1]
+    if last.endswith("ies"):
+        last = last[:-3] + "y"
+    elif last.endswith("s") and not last.endswith("ss"):
+        last = last[:-1]
+    words[-1] = last
+    return words[0] + "".join(word.capitalize() for word in words[1:]) + "Id"
+
+
+class MockGateway:
+    """The in-memory gateway; handle() answers one request, start() serves it over HTTP."""
+
+    def __init__(self, host: str = MOCK_GATEWAY_HOST, port: int = MOCK_GATEWAY_PORT,
+                 latency_ms: float = MOCK_GATEWAY_LATENCY_MS, latency_jitter_ms: float = MOCK_GATEWAY_LATENCY_JITTER_MS,
+                 error_rate: float = MOCK_GATEWAY_ERROR_RATE, error_status: int = MOCK_GATEWAY_ERROR_STATUS,
+                 max_items: int = MOCK_GATEWAY_MAX_ITEMS, seed: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.max_items = max(1, max_items)
+        self.collections = frozenset(key for key in ValidatorFactory.get_all_validator_names()
+                                     if key not in _FALLBACK_KEYS)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget every item and the request statistics."""
+        with self._lock:
+            self._items: Dict[str, Dict[str, Any]] = {collection: {} for collection in self.collections}
+            self._ids = itertools.count(1)
+            self._statuses: Counter = Counter()
+            self._server_ms = LatencyHistogram()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": sum(self._statuses.values()),
+                "statuses": {str(status): count for status, count in sorted(self._statuses.items())},
+                "items": {collection: len(items) for collection, items in sorted(self._items.items()) if items},
+                "serverMs": self._server_ms.summary(),
+            }
+
+    def record(self, status: int, elapsed_ms: float) -> None:
+        with self._lock:
+            self._statuses[status] += 1
+            self._server_ms.add(elapsed_ms)
+
+    def route(self, path: str) -> Optional[Tuple[str, Optional[str]]]:
+        """(collection, item id or None) of a path, or None when it isn't a gateway endpoint."""
+        segments = path.strip("/").split("/")
+        for index in range(len(segments) - 1, max(-1, len(segments) - 3), -1):
+            if segments[index] in self.collections:
+                rest = segments[index + 1:]
+                return segments[index], rest[0] if rest else None
+        return None
+
+    def handle(self, method: str, path: str, raw: bytes = b"") -> Tuple[int, Any]:
+        """The status and JSON payload (None for no body) of one request."""
+        if path.endswith(TOKEN_PATH):
+            return 200, {"access_token": "mock-access-token", "expires_in": 3600,
+                         "refresh_token": "mock-refresh-token", "refresh_expires_in": 7200, "token_type": "Bearer"}
+        if path == STATS_PATH:
+            return 200, self.stats()
+        if path == RESET_PATH:
+            self.reset()
+            return 200, {}
+
+        self._inject_latency()
+        if self.error_rate and self._rng.random() < self.error_rate:
+            return self.error_status, {"error": "Injected error", "status": self.error_status}
+
+        route = self.route(path)
+        if route is None:
+            return 404, {"error": f"No mock endpoint for '{path}'"}
+        collection, item_id = route
+        try:
+            body = json.loads(raw) if raw else None
+        except ValueError:
+            return 400, {"error": "Request body is not valid JSON"}
+
+        if item_id is None:
+            if method == "POST":
+                return self._create(collection, body)
+            if method == "GET":
+                with self._lock:
+                    return 200, list(self._items[collection].values())
+        elif method == "GET":
+            item = self._items[collection].get(item_id)
+            return (200, item) if item is not None else self._not_found(collection, item_id)
+        elif method in ("PUT", "PATCH"):
+            return self._update(collection, item_id, body, replace=method == "PUT")
+        elif method == "DELETE":
+            with self._lock:
+                item = self._items[collection].pop(item_id, None)
+            return (204, None) if item is not None else self._not_found(collection, item_id)
+        return 405, {"error": f"{method} is not supported on '{path}'"}
+
+    def _inject_latency(self) -> None:
+        delay_ms = self.latency_ms
+        if self.latency_jitter_ms:
+            delay_ms += self._rng.uniform(0, self.latency_jitter_ms)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+    def _create(self, collection: str, body: Any) -> Tuple[int, Any]:
+        if isinstance(body, list):
+            return 201, [self._store(collection, element) for element in body]
+        return 201, self._store(collection, body)
+
+    def _store(self, collection: str, body: Any) -> Any:
+        if not isinstance(body, dict):
+            return body
+        item_id = next(self._ids)
+        item = dict(body, id=item_id)
+        item[id_field(collection)] = item_id
+        with self._lock:
+            items = self._items[collection]
+            items[str(item_id)] = item
+            if len(items) > self.max_items:
+                # Long load tests would otherwise grow the store without bound; the oldest item goes first
+                del items[next(iter(items))]
+        return item
+
+    def _update(self, collection: str, item_id: str, body: Any, replace: bool) -> Tuple[int, Any]:
+        if not isinstance(body, dict):
+            return 400, {"error": "Request body must be a JSON object"}
+        with self._lock:
+            current = self._items[collection].get(item_id)
+            if current is None:
+                return self._not_found(collection, item_id)
+            ids = {"id": current["id"], id_field(collection): current["id"]}
+            item = {**body, **ids} if replace else {**current, **body, **ids}
+            self._items[collection][item_id] = item
+        return 200, item
+
+    @staticmethod
+    def _not_found(collection: str, item_id: str) -> Tuple[int, Any]:
+        return 404, {"error": f"No item '{item_id}' in '{collection}'"}
+
+    def start(self) -> str:
+        """Serve the mock on a background thread; returns its base URL (port 0 picks a free port)."""
+        self._server = _MockServer((self.host, self.port), _MockHandler)
+        self._server.gateway = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-gateway", daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2] if self._server is not None else (self.host, self.port)
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "MockGateway":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+class _MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Load tests open many connections at once
+    request_queue_size = 1024
+    gateway: MockGateway
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, delayed ACKs stall every keep-alive response
+    disable_nagle_algorithm = True
+
+    def _handle(self) -> None:
+        started = time.perf_counter()
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        status, payload = self.server.gateway.handle(self.command, urlsplit(self.path).path, raw)
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        if body:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.gateway.record(status, (time.perf_counter() - started) * 1000)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve a mock DGate gateway backed by an in-memory store.")
+    parser.add_argument("--host", default=MOCK_GATEWAY_HOST)
+    parser.add_argument("--port", type=int, default=MOCK_GATEWAY_PORT)
+    parser.add_argument("--latency-ms", type=float, default=MOCK_GATEWAY_LATENCY_MS,
+                        help="Delay added to every request")
+    parser.add_argument("--latency-jitter-ms", type=float, default=MOCK_GATEWAY_LATENCY_JITTER_MS,
+                        help="Random delay of up to this many milliseconds added on top")
+    parser.add_argument("--error-rate", type=float, default=MOCK_GATEWAY_ERROR_RATE,
+                        help="Share of requests (0-1) answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=MOCK_GATEWAY_ERROR_STATUS)
+    parser.add_argument("--max-items", type=int, default=MOCK_GATEWAY_MAX_ITEMS,
+                        help="Items kept per collection before the oldest are dropped")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the latency and error injection")
+    args = parser.parse_args(argv)
+
+    gateway = MockGateway(args.host, args.port, args.latency_ms, args.latency_jitter_ms, args.error_rate,
+                          args.error_status, args.max_items, args.seed)
+    gateway.start()
+    print(f"Mock gateway serving {len(gateway.collections)} endpoints at {gateway.url}")
+    try:
+        gateway._thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gateway.stop()
+        print(json.dumps(gateway.stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,167 @@
-import requests
 import json
-import re
+import time
 from typing import Dict, Any, Optional, List
 from util.token_util import *
 from config.config import Config
+from config.envModel import Env
+from util.http_client import http_transport, async_http_transport
+from scenario.plan import StepPlan, compile_step, compile_template, compile_value, render_value, make_resolver, \
+    CompiledTemplate
+from scenario.response_store import StoredResponse
+from scenario.assertions import ResponseView, compile_assertions
+from config.settings import RESPONSE_RESULT_INLINE_BYTES
+
+
+# Bytes per read of a streamed response body
+CAPTURE_CHUNK_SIZE = 64 * 1024
+
+# Network phases measured by the transport, followed by the client-side work done for each request
+TIMING_PHASES = ("dns", "connect", "tls", "ttfb", "total", "templating", "randomData", "token")
 
 
 class APIRequest:
     def __init__(self, name: str, method: str, url: str, headers: Optional[Dict[str, str]] = None,
-                 body: Optional[Any] = None, assertions: Optional[List[Dict[str, Any]]] = None):
+                 body: Optional[Any] = None, assertions: Optional[List[Dict[str, Any]]] = None,
+                 save_as: Optional[str] = None, extract: Optional[Dict[str, str]] = None):
+        """
+        :param save_as: Name later steps reference the response by (defaults to the request name).
+        :param extract: {variable: rule} with JSONPath ("$.items[0].id") or dotted ("items.0.id") rules;
+                        when given, only the extracted values are kept, as {{save_as.variable}}.
+        """
         self.name = name
         self.method = method.upper()
         self.url = url
         self.headers = headers if headers is not None else {}
         self.body = body
         self.assertions = assertions
+        self.save_as = save_as
+        self.extract = extract
         self.response = None
+        # Milliseconds spent per phase of the last execution (see TIMING_PHASES)
+        self.timings: Dict[str, float] = {}
         self.saved_data: Dict[str, Any] = {}
+        self._plan: Optional[StepPlan] = None
+
+    def compile(self) -> StepPlan:
+        """Compile the request's URL, headers and body templates once; the plan is reused by every run."""
+        if self._plan is None:
+            self._plan = compile_step(self.name, self.method, self.url, self.headers, self.body,
+                                      self.save_as, self.extract, compile_assertions(self.name, self.assertions))
+        return self._plan
 
     def execute(self, context: Dict[str, Any]):
         """Executes the API request using the provided context for templating."""
+        execution = RequestExecution(self.name, self.method)
+        started = time.perf_counter()
+        url, headers, body = self.compile().render(make_resolver(None, context))
+        execution.add_timing("templating", started)
+
+        try:
+            result = execution.send(url, headers, body)
+            self.response, self.timings = execution.response, execution.timings
+            self.saved_data = execution.extract(self.compile())
+            return result
+        finally:
+            execution.close()
+
+    async def execute_async(self, context: Dict[str, Any]):
+        """Async variant of execute using the asyncio transport and token fetch."""
+        execution = RequestExecution(self.name, self.method)
+        started = time.perf_counter()
+        url, headers, body = self.compile().render(make_resolver(None, context))
+        execution.add_timing("templating", started)
+
+        try:
+            result = await execution.send_async(url, headers, body)
+            self.response, self.timings = execution.response, execution.timings
+            self.saved_data = execution.extract(self.compile())
+            return result
+        finally:
+            execution.close()
+
+    def _template(self, value: str, context: Dict[str, Any]) -> str:
+        """Enhanced templating for URLs and headers using the context, supporting both {{key}} and ${key} syntax."""
+        template = compile_template(value)
+        if template.__class__ is not CompiledTemplate:
+            return value
+        return template.render(make_resolver(None, context))
+
+    def _template_body(self, body: Optional[Any], context: Dict[str, Any]) -> Optional[Any]:
+        """Templates the request body. Currently only handles JSON-like structures."""
+        if isinstance(body, str):
+            try:
+                body = json.loads(body)
+            except json.JSONDecodeError:
+                return self._template(body, context)  # Basic string templating if not JSON
+        return render_value(compile_value(body), make_resolver(None, context))
+
+    def __repr__(self):
+        return f"<APIRequest(name='{self.name}', method='{self.method}', url='{self.url}')>"
+
+
+class RequestExecution:
+    """
+    The state of one execution of a request: the response and the time spent per phase.
+
+    Kept apart from APIRequest so a scenario's requests and compiled plan can be
+    executed by many runs at once.
+    """
+
+    def __init__(self, name: str, method: str):
+        self.name = name
+        self.method = method
+        self.response = None
+        self.stored: Optional[StoredResponse] = None
+        # Milliseconds spent per phase (see TIMING_PHASES)
+        self.timings: Dict[str, float] = {}
+
+    def send(self, url: str, headers: Dict[str, str], body: Any, env: Env = None):
+        """
+        Sends the rendered request and returns the formatted run result.
+        :param env: The environment whose token is used (defaults to the selected environment).
+        """
+        started = time.perf_counter()
+        token = generate_token(env or Config.get_selected_env())
+        self.add_timing("token", started)
+        execution_details = self._prepare(token, url, headers, body)
+        request = execution_details["details"]["request"]
+
+        # The body is streamed into the stored response, so large bodies never sit in memory whole
+        self.response = http_transport.request(self.method, request["url"], stream=True, **self._send_kwargs(request))
+        started = time.perf_counter()
+        try:
+            self.stored = StoredResponse.capture(self.response.iter_content(CAPTURE_CHUNK_SIZE))
+        finally:
+            self.response.close()
+        self._add_body_timing(started)
+
+        return self._complete(execution_details)
+
+    async def send_async(self, url: str, headers: Dict[str, str], body: Any, env: Env = None):
+        started = time.perf_counter()
+        token = await generate_token_async(env or Config.get_selected_env())
+        self.add_timing("token", started)
+        execution_details = self._prepare(token, url, headers, body)
+        request = execution_details["details"]["request"]
+
+        self.response = await async_http_transport.request(self.method, request["url"], stream=True,
+                                                           **self._send_kwargs(request))
+        started = time.perf_counter()
+        try:
+            self.stored = await StoredResponse.capture_async(self.response.aiter_bytes(CAPTURE_CHUNK_SIZE))
+        finally:
+            await self.response.aclose()
+        self._add_body_timing(started)
+
+        return self._complete(execution_details)
+
+    def _add_body_timing(self, started: float):
+        # The transport's total stops at the headers of a streamed response; add the body read to it
+        self.timings.update(self.response.timings.as_dict())
+        self.timings["total"] = self.timings.get("total", 0.0) + (time.perf_counter() - started) * 1000
+
+    def _prepare(self, token: str, url: str, headers: Dict[str, str], body: Any) -> Dict[str, Any]:
+        """Applies the token to the rendered request, returning the execution details to fill in."""
         # Create a dictionary to collect execution details
         execution_details = {
             "name": self.name,
@@ -27,128 +169,99 @@ class APIRequest:
             "details": {}
         }
 
-        token = generate_token(Config.selected_env)
         if token:
-            self.headers["Authorization"] = f"Bearer {token}"
-
-        templated_url = self._template(self.url, context)
-        templated_headers = {k: self._template(v, context) for k, v in self.headers.items()}
-        templated_body = self._template_body(self.body, context)
+            headers["Authorization"] = f"Bearer {token}"
 
         # Record request details
         execution_details["details"]["request"] = {
-            "url": templated_url,
+            "url": url,
             "method": self.method,
-            "headers": templated_headers,
-            "body": templated_body
+            "headers": headers,
+            "body": body
         }
+        return execution_details
 
-        if self.method == "GET":
-            self.response = requests.get(templated_url, headers=templated_headers)
-        elif self.method == "POST":
-            self.response = requests.post(templated_url, headers=templated_headers, json=templated_body)
-        elif self.method == "PUT":
-            self.response = requests.put(templated_url, headers=templated_headers, json=templated_body)
-        elif self.method == "DELETE":
-            self.response = requests.delete(templated_url, headers=templated_headers)
+    def _send_kwargs(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Keyword arguments for the transport call, depending on the HTTP method."""
+        if self.method in ("GET", "DELETE"):
+            return {"headers": request["headers"]}
+        elif self.method in ("POST", "PUT", "PATCH"):
+            return {"headers": request["headers"], "json": request["body"]}
         # Add other HTTP methods as needed
         else:
             raise ValueError(f"Unsupported HTTP method: {self.method}")
 
+    def _complete(self, execution_details: Dict[str, Any]):
+        """Records the response details and formats the run result."""
         # Record response details
         execution_details["details"]["response"] = {
             "status_code": self.response.status_code,
             "headers": dict(self.response.headers)
         }
 
-        # Try to parse response as JSON
-        try:
-            response_json = self.response.json()
-            execution_details["details"]["response"]["body"] = response_json
-        except json.JSONDecodeError:
-            execution_details["details"]["response"]["body"] = self.response.text[
-                                                               :500] if self.response.text else ""
+        # Try to parse response as JSON; the stored response keeps the decoded body for later references.
+        # Bodies too large to include in the result are replaced by a reference to the stored response.
+        if self.stored.size > RESPONSE_RESULT_INLINE_BYTES or self.stored.truncated:
+            execution_details["details"]["response"]["body"] = self.stored.reference(self.name)
+        else:
+            try:
+                response_json = self.stored.json()
+                execution_details["details"]["response"]["body"] = response_json
+            except ValueError:
+                execution_details["details"]["response"]["body"] = self.stored.preview()
 
+        request = execution_details["details"]["request"]
         formatted_output = self.format_request_response_details(
-            execution_details, templated_url, templated_headers, templated_body
+            execution_details, request["url"], request["headers"], request["body"]
         )
+        # Hashed while captured, so it identifies the whole body even when the result only has a preview
+        formatted_output["response"]["bodyHash"] = self.stored.sha256
         return formatted_output
 
+    def response_view(self) -> ResponseView:
+        """The response as seen by assertions; valid until the stored body is dropped (see extract)."""
+        return ResponseView(self.response.status_code, self.timings.get("total"), self.stored)
 
-    def _template(self, value: str, context: Dict[str, Any]) -> str:
-        """Enhanced templating for URLs and headers using the context, supporting both {{key}} and ${key} syntax."""
-        if not value or not isinstance(value, str):
-            return value
-
-        # Handle ${key.subkey} references
-        def replace_dollar_reference(match):
-            reference = match.group(1)
-            try:
-                # Split reference into parts (e.g., "create_api_my.id" -> ["create_api_my", "id"])
-                parts = reference.split('.')
-                val = context
-
-                # Navigate through the context
-                for part in parts:
-                    if isinstance(val, dict) and part in val:
-                        val = val[part]
-                    else:
-                        # Reference not found, return the original reference
-                        return match.group(0)
-
-                return str(val)
-            except Exception as e:
-                print(f"Error resolving reference ${reference}: {e}")
-                return match.group(0)
+    def extract(self, step: StepPlan) -> Dict[str, Any]:
+        """
+        Apply the step's extraction rules to the response and drop the stored body, which
+        is no longer needed; {} if the step has no rules or the response isn't JSON.
+        """
+        if not step.extractors or self.stored is None:
+            return {}
+        try:
+            return step.extract(self.stored.json())
+        except ValueError as e:
+            print(f"Warning: Can't extract values from the response of '{step.name}': {e}")
+            return {}
+        finally:
+            self.close()
 
-        # Handle ${...} pattern
-        value = re.sub(r'\$\{([^}]+)\}', replace_dollar_reference, value)
+    def close(self):
+        """Drop the stored body, deleting it if it was spilled to disk; for bodies not handed to a ResponseStore."""
+        if self.stored is not None:
+            self.stored.close()
+            self.stored = None
 
-        # Handle {{...}} pattern (backward compatibility)
-        for key, val in context.items():
-            placeholder = f"{{{{{key}}}}}"
-            value = value.replace(placeholder, str(val))
+    def add_timing(self, phase: str, started: float):
+        """Adds the milliseconds elapsed since started (a perf_counter value) to the given phase."""
+        self.timings[phase] = self.timings.get(phase, 0.0) + (time.perf_counter() - started) * 1000
 
-        return value
-
-    def _template_body(self, body: Optional[Any], context: Dict[str, Any]) -> Optional[Any]:
-        """Templates the request body. Currently only handles JSON-like structures."""
-        if isinstance(body, str):
-            try:
-                body_dict = json.loads(body)
-                return self._template_recursive(body_dict, context)
-            except json.JSONDecodeError:
-                return self._template(body, context)  # Basic string templating if not JSON
-        elif isinstance(body, dict):
-            return self._template_recursive(body, context)
-        elif isinstance(body, list):
-            return [self._template_recursive(item, context) for item in body]
-        return body
-
-    def _template_recursive(self, data: Any, context: Dict[str, Any]) -> Any:
-        """Recursively templates values within dictionaries and lists."""
-        if isinstance(data, str):
-            return self._template(data, context)
-        elif isinstance(data, dict):
-            return {k: self._template_recursive(v, context) for k, v in data.items()}
-        elif isinstance(data, list):
-            return [self._template_recursive(item, context) for item in data]
-        return data
-
-    def __repr__(self):
-        return f"<APIRequest(name='{self.name}', method='{self.method}', url='{self.url}')>"
+    def _is_ok(self) -> bool:
+        # Same rule as requests.Response.ok, which httpx responses don't provide
+        return self.response.status_code < 400
 
     def format_request_response_details(self, execution_details, templated_url, templated_headers, templated_body):
         """Format request and response details into structured JSON output and return as RunResult"""
         # Set status in execution details
-        execution_details["status"] = "SUCCESS" if self.response.ok else "FAILED"
+        execution_details["status"] = "SUCCESS" if self._is_ok() else "FAILED"
 
         # Create structured JSON output
         formatted_json = {
             "name": self.name,
             "status": {
                 "code": self.response.status_code,
-                "text": "SUCCESS" if self.response.ok else "FAILED"
+                "text": "SUCCESS" if self._is_ok() else "FAILED"
             },
             "request": {
                 "url": templated_url,
@@ -160,11 +273,12 @@ class APIRequest:
                 "status": self.response.status_code,
                 "body": execution_details['details']['response']['body'],
                 "headers": execution_details['details']['response'].get('headers', {})
-            }
+            },
+            "timings": {phase: round(self.timings.get(phase, 0.0), 3) for phase in TIMING_PHASES}
         }
 
-        status = "SUCCESS" if self.response.ok else "FAILED"
-        if self.response.ok:
+        status = "SUCCESS" if self._is_ok() else "FAILED"
+        if self._is_ok():
             formatted_json["status"]["text"] = "SUCCESS"
         else:
             formatted_json["status"]["text"] = "FAILED"
@@ -0,0 +1,372 @@
+"""
+Assertions on step responses, compiled once per scenario.
+
+An assertion is split into a selector, which picks the value it checks from a
+response (status code, a JSONPath value, the latency, ...), and a check that is
+applied to a whole column of selected values at once. A single run checks each
+response as it arrives; load tests only collect the selected values per
+assertion (AssertionCollector) and check them in batches, so the assertion
+isn't re-interpreted for every response.
+
+Supported assertions (the first three are the ones the frontend edits):
+
+    {"type": "status_code", "value": 201}                     # or "in": [200, 201]
+    {"type": "json_path", "path": "$.status", "value": "DRAFT"}  # without value: the path must exist
+    {"type": "response_body_contains", "value": "apiSpecId"}
+    {"type": "regex", "pattern": "^api_", "path": "$.name"}   # without path: the body text
+    {"type": "schema", "schema": {"type": "object", "required": ["id"]}}
+    {"type": "latency", "max_ms": 500}                        # with "percentile": 95 in load tests
+"""
+import math
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config.settings import ASSERTION_BATCH_SIZE
+from scenario.plan import MISSING, compile_extractor
+
+# Failing values reported per assertion
+MAX_FAILURE_SAMPLES = 5
+# Characters of text values (e.g. a whole body) reported as the actual value
+MAX_REPORTED_TEXT = 200
+
+
+class ResponseView:
+    """The parts of a response assertions select from; the body is decoded (once) only when asked for."""
+
+    __slots__ = ("status_code", "latency_ms", "_stored")
+
+    def __init__(self, status_code: int, latency_ms: Optional[float], stored: Any):
+        self.status_code = status_code
+        self.latency_ms = latency_ms
+        self._stored = stored
+
+    def json(self) -> Any:
+        if self._stored is None:
+            return MISSING
+        try:
+            return self._stored.json()
+        except ValueError:
+            return MISSING
+
+    def text(self) -> str:
+        if self._stored is None:
+            return ""
+        return self._stored.raw.tobytes().decode("utf-8", errors="replace")
+
+
+class Assertion:
+    """A compiled assertion: select() picks the checked value, check() tests a column of them."""
+
+    # Whether load tests keep every selected value for summarize()
+    keeps_values = False
+
+    def __init__(self, description: str):
+        self.description = description
+
+    def select(self, response: ResponseView) -> Any:
+        raise NotImplementedError
+
+    def check(self, values: Sequence[Any]) -> List[bool]:
+        raise NotImplementedError
+
+    def summarize(self, values: Sequence[Any]) -> Dict[str, Any]:
+        """Extra figures over all selected values of a load test; see LatencyAssertion."""
+        return {}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.description!r})"
+
+
+class StatusAssertion(Assertion):
+    def __init__(self, expected: Tuple[int, ...]):
+        super().__init__(f"status in {list(expected)}" if len(expected) > 1 else f"status == {expected[0]}")
+        self.expected = frozenset(expected)
+
+    def select(self, response: ResponseView) -> Any:
+        return response.status_code
+
+    def check(self, values: Sequence[Any]) -> List[bool]:
+        expected = self.expected
+        return [value in expected for value in values]
+
+
+class JsonPathAssertion(Assertion):
+    def __init__(self, rule: str, expected: Any = MISSING):
+        super().__init__(f"{rule} exists" if expected is MISSING else f"{rule} == {expected!r}")
+        self.extractor = compile_extractor("json_path", rule)
+        self.expected = expected
+
+    def select(self, response: ResponseView) -> Any:
+        body = response.json()
+        return MISSING if body is MISSING else self.extractor.extract(body)
+
+    def check(self, values: Sequence[Any]) -> List[bool]:
+        if self.expected is MISSING:
+            return [value is not MISSING for value in values]
+        expected = self.expected
+        if isinstance(expected, str):
+            # The frontend sends every expected value as text
+            return [value is not MISSING and (value == expected or _as_text(value) == expected) for value in values]
+        return [value is not MISSING and value == expected for value in values]
+
+
+class RegexAssertion(Assertion):
+    def __init__(self, pattern: str, rule: Optional[str] = None, description: Optional[str] = None):
+        super().__init__(description or (f"{rule} matches /{pattern}/" if rule else f"body matches /{pattern}/"))
+        self.search = re.compile(pattern).search
+        self.extractor = compile_extractor("regex", rule) if rule else None
+
+    def select(self, response: ResponseView) -> Any:
+        if self.extractor is None:
+            return response.text()
+        body = response.json()
+        value = MISSING if body is MISSING else self.extractor.extract(body)
+        return None if value is MISSING else _as_text(value)
+
+    def check(self, values: Sequence[Any]) -> List[bool]:
+        search = self.search
+        return [value is not None and search(value) is not None for value in values]
+
+
+class SchemaAssertion(Assertion):
+    """
+    Checks the body against a JSON schema subset: type, properties, required, items and enum.
+    The body is validated when selected, so load tests only keep the error message.
+    """
+
+    def __init__(self, schema: Dict[str, Any]):
+        super().__init__("body matches schema")
+        if not isinstance(schema, dict):
+            raise ValueError("A schema assertion needs a 'schema' object.")
+        self.schema = schema
+
+    def select(self, response: ResponseView) -> Any:
+        body = response.json()
+        if body is MISSING:
+            return "body is not JSON"
+        return _schema_error(body, self.schema, "$")
+
+    def check(self, values: Sequence[Any]) -> List[bool]:
+        return [value is None for value in values]
+
+
+class LatencyAssertion(Assertion):
+    """The total request time stays within max_ms; in load tests, the percentile is checked as well."""
+
+    def __init__(self, max_ms: float, percentile: Optional[float] = None):
+        description = f"latency <= {max_ms}ms"
+        if percentile is not None:
+            description = f"p{percentile:g} {description}"
+        super().__init__(description)
+        self.max_ms = float(max_ms)
+        self.percentile = percentile
+        self.keeps_values = percentile is not None
+
+    def select(self, response: ResponseView) -> Any:
+        return response.latency_ms
+
+    def check(self, values: Sequence[Any]) -> List[bool]:
+        max_ms = self.max_ms
+        return [value is not None and value <= max_ms for value in values]
+
+    def summarize(self, values: Sequence[Any]) -> Dict[str, Any]:
+        if self.percentile is None:
+            return {}
+        ordered = sorted(value for value in values if value is not None)
+        if not ordered:
+            return {"percentileMs": None, "slaMet": False}
+        # Nearest rank, as in LatencyHistogram
+        value = ordered[max(1, math.ceil(self.percentile / 100 * len(ordered))) - 1]
+        return {"percentileMs": round(value, 3), "slaMet": value <= self.max_ms}
+
+
+_JSON_TYPES: Dict[str, Callable[[Any], bool]] = {
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "string": lambda value: isinstance(value, str),
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "null": lambda value: value is None,
+}
+
+
+def _schema_error(value: Any, schema: Dict[str, Any], path: str) -> Optional[str]:
+    """The first way value violates schema, or None."""
+    expected_type = schema.get("type")
+    if expected_type is not None:
+        types = expected_type if isinstance(expected_type, list) else [expected_type]
+        if not any(_JSON_TYPES.get(name, lambda _: True)(value) for name in types):
+            return f"{path} is not of type {expected_type}"
+    if "enum" in schema and value not in schema["enum"]:
+        return f"{path} is not one of {schema['enum']}"
+    if isinstance(value, dict):
+        for name in schema.get("required", ()):
+            if name not in value:
+                return f"{path}.{name} is required"
+        for name, property_schema in schema.get("properties", {}).items():
+            if name in value:
+                error = _schema_error(value[name], property_schema, f"{path}.{name}")
+                if error:
+                    return error
+    if isinstance(value, list) and isinstance(schema.get("items"), dict):
+        for index, item in enumerate(value):
+            error = _schema_error(item, schema["items"], f"{path}[{index}]")
+            if error:
+                return error
+    return None
+
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def compile_assertion(spec: Dict[str, Any]) -> Assertion:
+    """Compile one assertion spec (see the module docstring); raises ValueError for invalid specs."""
+    kind = spec.get("type")
+    try:
+        if kind in ("status_code", "status"):
+            expected = spec.get("in", spec.get("value"))
+            if expected is None:
+                raise ValueError("expected a 'value' or 'in'")
+            if isinstance(expected, str):
+                expected = expected.split(",")
+            elif not isinstance(expected, (list, tuple)):
+                expected = [expected]
+            return StatusAssertion(tuple(int(code) for code in expected))
+        elif kind in ("json_path", "jsonpath"):
+            if not spec.get("path"):
+                raise ValueError("expected a 'path'")
+            return JsonPathAssertion(spec["path"], spec.get("value", spec.get("equals", MISSING)))
+        elif kind == "response_body_contains":
+            text = str(spec["value"])
+            return RegexAssertion(re.escape(text), description=f"body contains {text!r}")
+        elif kind == "regex":
+            return RegexAssertion(spec.get("pattern", spec.get("value")), spec.get("path"))
+        elif kind == "schema":
+            return SchemaAssertion(spec.get("schema"))
+        elif kind == "latency":
+            return LatencyAssertion(spec.get("max_ms", spec.get("value")), spec.get("percentile"))
+    except (KeyError, TypeError, ValueError, re.error) as e:
+        raise ValueError(f"Invalid {kind} assertion {spec}: {e}")
+    raise ValueError(f"Unknown assertion type '{kind}'.")
+
+
+def compile_assertions(step_name: str, specs: Optional[List[Dict[str, Any]]]) -> Tuple[Assertion, ...]:
+    try:
+        return tuple(compile_assertion(spec) for spec in (specs or ()))
+    except ValueError as e:
+        raise ValueError(f"Step '{step_name}': {e}")
+
+
+def evaluate(assertions: Sequence[Assertion], response: ResponseView) -> List[Dict[str, Any]]:
+    """Check one response, as in a single run: one outcome per assertion."""
+    outcomes = []
+    for assertion in assertions:
+        value = assertion.select(response)
+        outcomes.append({
+            "assertion": assertion.description,
+            "passed": assertion.check((value,))[0],
+            "actual": _reported(value),
+        })
+    return outcomes
+
+
+def _reported(value: Any) -> Any:
+    if value is MISSING:
+        return None
+    if isinstance(value, str) and len(value) > MAX_REPORTED_TEXT:
+        return value[:MAX_REPORTED_TEXT] + "..."
+    return value
+
+
+def pass_rate_entry(description: str, passed: int, total: int) -> Dict[str, Any]:
+    return {
+        "assertion": description,
+        "passed": passed,
+        "failed": total - passed,
+        "total": total,
+        "passRate": round(passed / total, 4) if total else 0.0,
+    }
+
+
+class _Column:
+    __slots__ = ("pending", "passed", "total", "failures", "summary_values")
+
+    def __init__(self, keep_values: bool):
+        self.pending: List[Any] = []
+        self.passed = 0
+        self.total = 0
+        self.failures: List[Any] = []
+        # Only assertions with load-test summaries (latency percentiles) keep every value
+        self.summary_values: Optional[List[Any]] = [] if keep_values else None
+
+
+class AssertionCollector:
+    """
+    Collects the selected values of every step's assertions across the iterations of a
+    load test, checking them in batches of batch_size values per assertion.
+    """
+
+    def __init__(self, plan: Any, batch_size: int = ASSERTION_BATCH_SIZE):
+        self.batch_size = max(1, batch_size)
+        self._columns: Dict[Tuple[str, int], _Column] = {}
+        self._assertions: Dict[Tuple[str, int], Assertion] = {}
+        for step in plan.steps:
+            for index, assertion in enumerate(step.assertions):
+                key = (step.name, index)
+                self._assertions[key] = assertion
+                self._columns[key] = _Column(assertion.keeps_values)
+        self._lock = threading.Lock()
+
+    def add(self, step: Any, response: ResponseView) -> None:
+        """Select the step's assertion values from a response; they're checked later, in batches."""
+        # Selecting reads the response, so it happens here, outside the lock
+        values = [assertion.select(response) for assertion in step.assertions]
+        full = []
+        with self._lock:
+            for index, value in enumerate(values):
+                column = self._columns[(step.name, index)]
+                column.pending.append(value)
+                if len(column.pending) >= self.batch_size:
+                    full.append(((step.name, index), column.pending))
+                    column.pending = []
+        for key, batch in full:
+            self._check(key, batch)
+
+    def _check(self, key: Tuple[str, int], batch: List[Any]) -> None:
+        assertion = self._assertions[key]
+        results = assertion.check(batch)
+        passed = sum(results)
+        with self._lock:
+            column = self._columns[key]
+            column.passed += passed
+            column.total += len(batch)
+            if passed < len(batch) and len(column.failures) < MAX_FAILURE_SAMPLES:
+                column.failures.extend(value for value, ok in zip(batch, results) if not ok)
+                del column.failures[MAX_FAILURE_SAMPLES:]
+            if column.summary_values is not None:
+                column.summary_values.extend(batch)
+
+    def report(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Pass rates per step and assertion, checking whatever is still pending."""
+        with self._lock:
+            pending = [(key, column.pending) for key, column in self._columns.items() if column.pending]
+            for key, _ in pending:
+                self._columns[key].pending = []
+        for key, batch in pending:
+            self._check(key, batch)
+
+        report: Dict[str, List[Dict[str, Any]]] = {}
+        for key, column in self._columns.items():
+            assertion = self._assertions[key]
+            entry = pass_rate_entry(assertion.description, column.passed, column.total)
+            if column.failures:
+                entry["failures"] = [_reported(value) for value in column.failures]
+            if column.summary_values is not None:
+                entry.update(assertion.summarize(column.summary_values))
+            report.setdefault(key[0], []).append(entry)
+        return report
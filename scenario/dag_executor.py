@@ -0,0 +1,88 @@
+import asyncio
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Sequence, Set, Tuple
+
+
+class DagExecutor:
+    """
+    Runs scenario steps concurrently while respecting the dependencies between them.
+
+    dependencies[i] holds the indexes of the earlier steps step i references (see
+    ScenarioPlan.dependencies). A step is submitted as soon as all of them have
+    finished, with at most max_workers steps in flight. Results are returned in the
+    original step order, and steps whose run_step returned None (failed to execute)
+    are left out, as in the sequential run. run_async does the same with coroutines
+    on the running event loop, and iter_async streams the results as they finish.
+    Steps run in a copy of the caller's context, so context variables such as the
+    selected environment carry over to the pool's threads (tasks copy it anyway).
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+
+    def run(self, dependencies: Sequence[Set[int]], run_step: Callable[[int], Optional[Any]]) -> List[Any]:
+        dependents: List[List[int]] = [[] for _ in dependencies]
+        for index, deps in enumerate(dependencies):
+            for dep in deps:
+                dependents[dep].append(index)
+        remaining = [len(deps) for deps in dependencies]
+        results: List[Optional[Any]] = [None] * len(dependencies)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            in_flight = {self._submit(pool, run_step, index): index for index, count in enumerate(remaining) if count == 0}
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = in_flight.pop(future)
+                    results[index] = future.result()
+                    for dependent in dependents[index]:
+                        remaining[dependent] -= 1
+                        if remaining[dependent] == 0:
+                            in_flight[self._submit(pool, run_step, dependent)] = dependent
+
+        return [result for result in results if result is not None]
+
+    @staticmethod
+    def _submit(pool: ThreadPoolExecutor, run_step: Callable[[int], Optional[Any]], index: int) -> Future:
+        # A context can only be entered by one thread at a time, so each step gets its own copy
+        return pool.submit(contextvars.copy_context().run, run_step, index)
+
+    async def run_async(self, dependencies: Sequence[Set[int]],
+                        run_step: Callable[[int], Awaitable[Optional[Any]]]) -> List[Any]:
+        results = await asyncio.gather(*self._start_tasks(dependencies, run_step))
+
+        return [result for _, result in results if result is not None]
+
+    async def iter_async(self, dependencies: Sequence[Set[int]],
+                         run_step: Callable[[int], Awaitable[Optional[Any]]]) -> AsyncIterator[Tuple[int, Any]]:
+        """Like run_async, but yields (index, result) pairs in completion order as soon as each step finishes."""
+        tasks = self._start_tasks(dependencies, run_step)
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, result = await next_done
+                if result is not None:
+                    yield index, result
+        finally:
+            # The consumer may stop early (e.g. a closed stream); don't leave steps running
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            # Wait for the cancellations, so no step runs on after the generator is closed
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def _start_tasks(self, dependencies: Sequence[Set[int]],
+                     run_step: Callable[[int], Awaitable[Optional[Any]]]) -> List[asyncio.Task]:
+        semaphore = asyncio.Semaphore(self.max_workers)
+        tasks: List[asyncio.Task] = []
+
+        async def run_when_ready(index: int):
+            # Dependencies always point at earlier steps, whose tasks already exist
+            if dependencies[index]:
+                await asyncio.gather(*(tasks[dep] for dep in dependencies[index]))
+            async with semaphore:
+                return index, await run_step(index)
+
+        for index in range(len(dependencies)):
+            tasks.append(asyncio.ensure_future(run_when_ready(index)))
+        return tasks
@@ -0,0 +1,341 @@
+"""
+Compiled, immutable execution plans for scenarios.
+
+A scenario's URLs, headers and bodies are tokenized once into literal and
+reference segments with pre-split paths, so rendering a step is a single
+linear pass over its segments instead of regex substitution and a scan over
+the whole context. Extraction rules (JSONPath or dotted paths) are parsed once
+as well.
+"""
+import json
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from jsonpath_ng.ext import parse as parse_jsonpath
+from jsonpath_ng.ext.iterable import Len, SortedThis
+from jsonpath_ng.jsonpath import Child, Fields, Index, Parent, Root, This
+
+# Returned by resolvers when a reference cannot be resolved; the placeholder is then kept as-is
+MISSING = object()
+
+
+class Reference(NamedTuple):
+    """A {{source.path}} or ${source.path} placeholder."""
+    source: str
+    path: Tuple[str, ...]
+    placeholder: str
+
+
+Resolver = Callable[[Reference], Any]
+
+
+def _tokenize(text: str) -> Tuple[Any, ...]:
+    """Split text into literal strings and References, scanning it once."""
+    segments: List[Any] = []
+    literal_start = 0
+    position = 0
+    while True:
+        brace = text.find("{{", position)
+        dollar = text.find("${", position)
+        if brace < 0 and dollar < 0:
+            break
+        if dollar < 0 or 0 <= brace < dollar:
+            start, end = brace, text.find("}}", brace + 2)
+            close = end + 2
+        else:
+            start, end = dollar, text.find("}", dollar + 2)
+            close = end + 1
+        if end < 0:
+            break
+        inner = text[start + 2:end].strip()
+        if not inner:
+            position = start + 2
+            continue
+        if start > literal_start:
+            segments.append(text[literal_start:start])
+        parts = inner.split(".")
+        segments.append(Reference(parts[0], tuple(parts[1:]), text[start:close]))
+        literal_start = position = close
+    if literal_start < len(text):
+        segments.append(text[literal_start:])
+    return tuple(segments)
+
+
+class CompiledTemplate:
+    """A string with placeholders, pre-tokenized into literal and Reference segments."""
+
+    __slots__ = ("text", "segments", "references")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.segments = _tokenize(text)
+        self.references = tuple(segment for segment in self.segments if segment.__class__ is Reference)
+
+    def render(self, resolve: Resolver, typed: bool = False) -> Any:
+        """
+        Render the template. With typed=True a string that is exactly one reference
+        renders to the referenced value itself (e.g. an int id) rather than its str().
+        """
+        segments = self.segments
+        if typed and len(segments) == 1 and segments[0].__class__ is Reference:
+            value = resolve(segments[0])
+            return self.text if value is MISSING else value
+
+        parts = []
+        for segment in segments:
+            if segment.__class__ is Reference:
+                value = resolve(segment)
+                parts.append(segment.placeholder if value is MISSING else str(value))
+            else:
+                parts.append(segment)
+        return "".join(parts)
+
+    def __repr__(self):
+        return f"CompiledTemplate({self.text!r})"
+
+
+class CompiledDict(NamedTuple):
+    items: Tuple[Tuple[str, Any], ...]
+
+
+class CompiledList(NamedTuple):
+    items: Tuple[Any, ...]
+
+
+def compile_template(value: Any) -> Any:
+    """Compile a string into a CompiledTemplate if it contains placeholders, otherwise keep it as-is."""
+    if isinstance(value, str) and ("{{" in value or "${" in value):
+        template = CompiledTemplate(value)
+        if template.references:
+            return template
+    return value
+
+
+def compile_value(value: Any) -> Any:
+    """Compile a JSON-like value (a request body) recursively."""
+    if isinstance(value, str):
+        return compile_template(value)
+    elif isinstance(value, dict):
+        return CompiledDict(tuple((key, compile_value(item)) for key, item in value.items()))
+    elif isinstance(value, list):
+        return CompiledList(tuple(compile_value(item) for item in value))
+    return value
+
+
+def render_value(compiled: Any, resolve: Resolver) -> Any:
+    """Render a compiled value into fresh dicts and lists, so the result can be mutated freely."""
+    cls = compiled.__class__
+    if cls is CompiledTemplate:
+        return compiled.render(resolve, typed=True)
+    elif cls is CompiledDict:
+        return {key: render_value(item, resolve) for key, item in compiled.items}
+    elif cls is CompiledList:
+        return [render_value(item, resolve) for item in compiled.items]
+    return compiled
+
+
+def collect_references(compiled: Any) -> Set[str]:
+    """Return the sources referenced anywhere in a compiled value."""
+    cls = compiled.__class__
+    if cls is CompiledTemplate:
+        return {reference.source for reference in compiled.references}
+    elif cls is CompiledDict:
+        return set().union(*(collect_references(item) for _, item in compiled.items))
+    elif cls is CompiledList:
+        return set().union(*(collect_references(item) for item in compiled.items))
+    return set()
+
+
+def resolve_path(data: Any, path: Tuple[str, ...], default: Any = None) -> Any:
+    """Resolves a nested path in data structure like 'response.data.id'; returns default if it doesn't exist."""
+    # convert data to dict if it's a string, or bytes
+    if isinstance(data, (str, bytes)):
+        try:
+            data = json.loads(data)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return default
+    current = data
+    for component in path:
+        if isinstance(current, dict) and component in current:
+            current = current[component]
+        elif isinstance(current, list) and component.isdigit():
+            index = int(component)
+            if 0 <= index < len(current):
+                current = current[index]
+            else:
+                return default
+        else:
+            return default
+    return current
+
+
+def make_resolver(responses: Optional[Any], context: Optional[Dict[str, Any]]) -> Resolver:
+    """
+    Build a resolver that looks references up in earlier step responses (a ResponseStore)
+    first and then in the run context. Unresolvable references return MISSING.
+    """
+    context = context if context is not None else {}
+
+    def resolve(reference: Reference) -> Any:
+        if responses is not None and reference.source in responses:
+            value = responses.resolve(reference.source, reference.path)
+            if value is MISSING:
+                print(f"Warning: Path '{'.'.join(reference.path)}' not found in '{reference.source}'. "
+                      f"Skipping replacement.")
+            return value
+        if reference.source in context:
+            # A JSON null (e.g. an extracted one) resolves to None, unlike a missing key
+            return resolve_path(context[reference.source], reference.path, MISSING) if reference.path \
+                else context[reference.source]
+        print(f"Warning: Variable '{reference.source}' not found in response map. Skipping replacement.")
+        return MISSING
+
+    return resolve
+
+
+def _is_singular(expression: Any) -> bool:
+    """Whether a parsed JSONPath can select at most one value (no wildcards, slices, filters, unions or '..')."""
+    if isinstance(expression, Child):
+        return _is_singular(expression.left) and _is_singular(expression.right)
+    if isinstance(expression, Fields):
+        return len(expression.fields) == 1 and expression.fields[0] != "*"
+    if isinstance(expression, Index):
+        return len(expression.indices) == 1
+    return isinstance(expression, (Root, This, Parent, Len, SortedThis))
+
+
+class Extractor(NamedTuple):
+    """
+    A compiled extraction rule: a JSONPath expression (starting with "$") or a dotted
+    path like "data.items.0.id". A singular JSONPath ("$.data.id", "$.items[0]") extracts
+    its value; any other ("$.items[*].id", "$..id", filters, slices) always extracts a
+    list, even when it matches a single value.
+    """
+    name: str
+    rule: str
+    path: Optional[Tuple[str, ...]]
+    expression: Any
+    singular: bool = True
+
+    def extract(self, data: Any) -> Any:
+        """The value the rule selects in data (a JSON null included), or MISSING when nothing matches."""
+        if self.expression is not None:
+            matches = self.expression.find(data)
+            if not matches:
+                return MISSING
+            return matches[0].value if self.singular else [match.value for match in matches]
+        return resolve_path(data, self.path, MISSING)
+
+
+def compile_extractor(name: str, rule: str) -> Extractor:
+    """Compile one extraction rule; raises ValueError for invalid JSONPath."""
+    rule = str(rule).strip()
+    if rule.startswith("$"):
+        try:
+            expression = parse_jsonpath(rule)
+        except Exception as e:
+            raise ValueError(f"Invalid JSONPath '{rule}' for '{name}': {e}")
+        return Extractor(name, rule, None, expression, _is_singular(expression))
+    return Extractor(name, rule, tuple(rule.split(".")), None)
+
+
+def compile_extractors(step_name: str, rules: Optional[Dict[str, str]]) -> Tuple[Extractor, ...]:
+    """Compile a step's {variable: rule} extraction rules; raises ValueError for invalid JSONPath."""
+    try:
+        return tuple(compile_extractor(name, rule) for name, rule in (rules or {}).items())
+    except ValueError as e:
+        raise ValueError(f"Step '{step_name}': {e}")
+
+
+def _url_prefix(url: str) -> Optional[str]:
+    """How the environment URL is joined to a step URL: '' for a leading slash, '/' otherwise, None for https URLs."""
+    if url.startswith("/"):
+        return ""
+    elif not url.startswith("http") or not url.startswith("https"):
+        return "/"
+    return None
+
+
+class StepPlan(NamedTuple):
+    """The compiled, immutable form of one APIRequest."""
+    name: str
+    method: str
+    url: Any
+    url_prefix: Optional[str]
+    headers: Tuple[Tuple[str, Any], ...]
+    body: Any
+    references: frozenset
+    # Name later steps reference the step's response (or extracted values) by
+    save_as: str = ""
+    # With extractors, only the extracted values are kept instead of the response
+    extractors: Tuple[Extractor, ...] = ()
+    # Compiled assertions on the response (see scenario.assertions)
+    assertions: Tuple[Any, ...] = ()
+
+    def extract(self, data: Any) -> Dict[str, Any]:
+        """Apply the step's extraction rules to its decoded response, leaving out values that weren't found."""
+        values = {}
+        for extractor in self.extractors:
+            value = extractor.extract(data)
+            if value is MISSING:
+                print(f"Warning: '{extractor.rule}' matched nothing in the response of '{self.name}'.")
+            else:
+                values[extractor.name] = value
+        return values
+
+    def render(self, resolve: Resolver, env_url: Optional[str] = None) -> Tuple[str, Dict[str, str], Any]:
+        """Render the step's URL, headers and body; env_url is joined to relative URLs."""
+        url = self.url.render(resolve) if self.url.__class__ is CompiledTemplate else self.url
+        if env_url is not None and self.url_prefix is not None:
+            url = env_url + self.url_prefix + url
+        headers = {
+            key: value.render(resolve) if value.__class__ is CompiledTemplate else value
+            for key, value in self.headers
+        }
+        return url, headers, render_value(self.body, resolve)
+
+
+def compile_step(name: str, method: str, url: str, headers: Dict[str, str], body: Any,
+                 save_as: Optional[str] = None, extract: Optional[Dict[str, str]] = None,
+                 assertions: Tuple[Any, ...] = ()) -> StepPlan:
+    if isinstance(body, str):
+        # JSON bodies given as strings are templated as structures; anything else as plain text
+        try:
+            body = json.loads(body)
+        except json.JSONDecodeError:
+            pass
+    compiled_url = compile_template(url)
+    compiled_headers = tuple((key, compile_template(value)) for key, value in (headers or {}).items())
+    compiled_body = compile_value(body)
+    references = collect_references(compiled_url) | collect_references(compiled_body)
+    for _, value in compiled_headers:
+        references |= collect_references(value)
+    return StepPlan(name, method.upper(), compiled_url, _url_prefix(url or ""), compiled_headers, compiled_body,
+                    frozenset(references), save_as or name, compile_extractors(name, extract), tuple(assertions))
+
+
+class ScenarioPlan(NamedTuple):
+    """The compiled, immutable form of a TestScenario, safe to execute concurrently."""
+    name: str
+    steps: Tuple[StepPlan, ...]
+    # For each step, the indexes of the earlier steps it references
+    dependencies: Tuple[frozenset, ...]
+
+
+def build_dependencies(steps: Tuple[StepPlan, ...]) -> Tuple[frozenset, ...]:
+    """
+    Link each step to the earlier steps it references. References to unknown or later
+    steps are ignored, matching the sequential run where they would simply not resolve.
+    """
+    dependencies = []
+    latest_index_by_name: Dict[str, int] = {}
+    for index, step in enumerate(steps):
+        dependencies.append(frozenset(latest_index_by_name[name] for name in step.references
+                                      if name in latest_index_by_name))
+        latest_index_by_name[step.save_as or step.name] = index
+    return tuple(dependencies)
+
+
+def compile_scenario(scenario: Any) -> ScenarioPlan:
+    """Compile a loaded TestScenario into an immutable ScenarioPlan."""
+    steps = tuple(request.compile() for request in scenario.requests)
+    return ScenarioPlan(scenario.name, steps, build_dependencies(steps))
@@ -0,0 +1,289 @@
+import copy
+import hashlib
+import json
+import tempfile
+import threading
+from collections import deque
+from typing import Any, AsyncIterable, BinaryIO, Deque, Dict, Iterable, List, Optional, Tuple
+
+from config.settings import RESPONSE_STORE_MAX_BYTES, RESPONSE_CAPTURE_MEMORY_BYTES, RESPONSE_CAPTURE_MAX_BYTES, \
+    RESPONSE_PREVIEW_CHARS
+from scenario.plan import MISSING, ScenarioPlan, StepPlan, resolve_path
+
+_NOT_DECODED = object()
+
+
+class StoredResponse:
+    """
+    A response body kept as raw bytes and decoded from JSON at most once, on first use.
+
+    Bodies captured with capture()/capture_async() are read in chunks: once they grow past
+    max_memory bytes they're spilled to a temporary file, and reading stops at max_bytes
+    (the body is then marked truncated and can't be decoded).
+    """
+
+    __slots__ = ("_raw", "_file", "_size", "truncated", "_sha256", "_decoded", "_error", "_lock")
+
+    def __init__(self, raw: bytes = b"", file: Optional[BinaryIO] = None, size: int = None, truncated: bool = False,
+                 sha256: Optional[str] = None):
+        self._raw = raw or b""
+        self._file = file
+        self._size = size if size is not None else len(self._raw)
+        self.truncated = truncated
+        self._sha256 = sha256
+        self._decoded = _NOT_DECODED
+        self._error: Optional[Exception] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def capture(cls, chunks: Iterable[bytes], max_memory: int = RESPONSE_CAPTURE_MEMORY_BYTES,
+                max_bytes: int = RESPONSE_CAPTURE_MAX_BYTES) -> "StoredResponse":
+        """Read a streamed body, e.g. requests' iter_content()."""
+        buffer = _CaptureBuffer(max_memory, max_bytes)
+        for chunk in chunks:
+            if not buffer.write(chunk):
+                break
+        return buffer.finish()
+
+    @classmethod
+    async def capture_async(cls, chunks: AsyncIterable[bytes], max_memory: int = RESPONSE_CAPTURE_MEMORY_BYTES,
+                            max_bytes: int = RESPONSE_CAPTURE_MAX_BYTES) -> "StoredResponse":
+        """Read a streamed body, e.g. httpx's aiter_bytes()."""
+        buffer = _CaptureBuffer(max_memory, max_bytes)
+        async for chunk in chunks:
+            if not buffer.write(chunk):
+                break
+        return buffer.finish()
+
+    @property
+    def raw(self) -> memoryview:
+        """Zero-copy view of the raw body; a spilled body is read back from disk first."""
+        if self._file is not None:
+            return memoryview(self._read_file())
+        return memoryview(self._raw)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def spilled(self) -> bool:
+        return self._file is not None
+
+    @property
+    def sha256(self) -> str:
+        """Hex SHA-256 of the raw body (as captured, if truncated); computed while capturing."""
+        if self._sha256 is None:
+            self._sha256 = hashlib.sha256(self.raw).hexdigest()
+        return self._sha256
+
+    def preview(self, length: int = RESPONSE_PREVIEW_CHARS) -> str:
+        """The start of the body as text."""
+        if self._file is not None:
+            with self._lock:
+                self._file.seek(0)
+                head = self._file.read(length * 4)
+        else:
+            head = self._raw[:length * 4]
+        return head.decode("utf-8", errors="replace")[:length]
+
+    def reference(self, name: str) -> Dict[str, Any]:
+        """What a run result shows instead of the body: the step it belongs to, its size and a preview."""
+        return {"reference": name, "size": self._size, "truncated": self.truncated, "preview": self.preview()}
+
+    def json(self) -> Any:
+        """The decoded body; raises ValueError (every time, without decoding again) if it isn't JSON."""
+        if self._decoded is _NOT_DECODED and self._error is None:
+            with self._lock:
+                if self._decoded is _NOT_DECODED and self._error is None:
+                    try:
+                        if self.truncated:
+                            raise ValueError(f"Response body was truncated at {self._size} bytes")
+                        self._decoded = json.loads(self._read_file() if self._file is not None else self._raw)
+                    except ValueError as e:
+                        # JSONDecodeError, or UnicodeDecodeError for undecodable bytes
+                        self._error = e
+        if self._error is not None:
+            raise self._error
+        return self._decoded
+
+    def close(self) -> None:
+        """Delete the spilled file, if any; the body can't be read afterwards."""
+        if self._file is not None:
+            self._file.close()
+
+    def _read_file(self) -> bytes:
+        self._file.seek(0)
+        return self._file.read()
+
+
+class _CaptureBuffer:
+    """Collects body chunks in memory, moving them to a temporary file past max_memory bytes."""
+
+    def __init__(self, max_memory: int, max_bytes: int):
+        self.max_memory = max_memory
+        self.max_bytes = max_bytes
+        self.chunks: List[bytes] = []
+        self.file: Optional[BinaryIO] = None
+        self.size = 0
+        self.truncated = False
+        self.digest = hashlib.sha256()
+
+    def write(self, chunk: bytes) -> bool:
+        """Add a chunk; False once max_bytes is reached and the rest of the body should be skipped."""
+        if self.max_bytes and self.size + len(chunk) > self.max_bytes:
+            chunk = chunk[:self.max_bytes - self.size]
+            self.truncated = True
+        self.size += len(chunk)
+        self.digest.update(chunk)
+        if self.file is not None:
+            self.file.write(chunk)
+        else:
+            self.chunks.append(chunk)
+            if self.size > self.max_memory:
+                self.file = tempfile.TemporaryFile(prefix="response-")
+                self.file.writelines(self.chunks)
+                self.chunks = []
+        return not self.truncated
+
+    def finish(self) -> StoredResponse:
+        sha256 = self.digest.hexdigest()
+        if self.file is not None:
+            self.file.flush()
+            return StoredResponse(file=self.file, size=self.size, truncated=self.truncated, sha256=sha256)
+        return StoredResponse(b"".join(self.chunks), truncated=self.truncated, sha256=sha256)
+
+
+class ResponseStore:
+    """
+    The responses of the steps executed so far in one run, keyed by step name.
+
+    Bodies are decoded lazily and only once, however many later steps reference
+    them. The store counts how many steps still have to reference each response;
+    once the stored bytes exceed max_bytes, responses that no remaining step
+    references are evicted, oldest first.
+
+    The decoded bodies in the run results count against max_bytes as well (by their
+    raw size): when a response is evicted, the body in its step's result is replaced
+    by a reference and a preview. Results of steps whose responses aren't kept, like
+    those with extraction rules, are added with add_result and are evicted first.
+
+    A streaming store (for runs that hand each result on as soon as it's ready) doesn't
+    hold on to results at all, and drops every response as soon as no remaining step
+    references it, so a run only keeps the responses later steps still need.
+    """
+
+    def __init__(self, plan: Optional[ScenarioPlan] = None, max_bytes: int = RESPONSE_STORE_MAX_BYTES,
+                 streaming: bool = False):
+        self.max_bytes = max_bytes
+        self.streaming = streaming
+        self._entries: Dict[str, StoredResponse] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        # (result, body reference, size) of results whose responses aren't kept
+        self._detached: Deque[Tuple[Dict[str, Any], Dict[str, Any], int]] = deque()
+        self._remaining: Dict[str, int] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        if plan is not None:
+            for step in plan.steps:
+                for source in step.references:
+                    self._remaining[source] = self._remaining.get(source, 0) + 1
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def __getitem__(self, name: str) -> StoredResponse:
+        return self._entries[name]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Raw bytes currently held, in stored responses and run results."""
+        return self._size
+
+    def put(self, name: str, response: StoredResponse, result: Optional[Dict[str, Any]] = None) -> None:
+        """Keep a step's response; result is the step's run result, whose body goes with the response."""
+        with self._lock:
+            previous = self._entries.pop(name, None)
+            if previous is not None:
+                self._size -= previous.size
+                self._results.pop(name, None)
+                previous.close()
+            if self.streaming and self._remaining.get(name, 0) <= 0:
+                # No step references it, so it's never needed
+                response.close()
+                return
+            self._entries[name] = response
+            if result is not None and not self.streaming:
+                self._results[name] = result
+            self._size += response.size
+            self._evict()
+
+    def add_result(self, name: str, response: StoredResponse, result: Dict[str, Any]) -> None:
+        """Count the body of a result whose response isn't kept; call before the response is closed."""
+        if self.streaming:
+            return
+        reference = response.reference(name)
+        with self._lock:
+            self._detached.append((result, reference, response.size))
+            self._size += response.size
+            self._evict()
+
+    def release(self, step: StepPlan) -> None:
+        """Record that step has resolved its references, so they no longer keep responses alive."""
+        with self._lock:
+            for source in step.references:
+                if source in self._remaining:
+                    self._remaining[source] -= 1
+                    if self.streaming and self._remaining[source] <= 0 and source in self._entries:
+                        released = self._entries.pop(source)
+                        self._size -= released.size
+                        released.close()
+            self._evict()
+
+    def _evict(self) -> None:
+        if self._size <= self.max_bytes:
+            return
+        while self._detached:
+            result, reference, size = self._detached.popleft()
+            result["response"]["body"] = reference
+            self._size -= size
+            if self._size <= self.max_bytes:
+                return
+        for name in list(self._entries):
+            if self._remaining.get(name, 0) <= 0:
+                evicted = self._entries.pop(name)
+                result = self._results.pop(name, None)
+                if result is not None:
+                    result["response"]["body"] = evicted.reference(name)
+                self._size -= evicted.size
+                evicted.close()
+                if self._size <= self.max_bytes:
+                    return
+
+    def close(self) -> None:
+        """Drop every response, deleting spilled bodies; called when the run is over."""
+        with self._lock:
+            entries, self._entries = self._entries, {}
+            self._results = {}
+            self._detached.clear()
+            self._size = 0
+        for entry in entries.values():
+            entry.close()
+
+    def resolve(self, name: str, path) -> Any:
+        """Resolve a path in a stored response, or return MISSING."""
+        entry = self._entries.get(name)
+        if entry is None:
+            return MISSING
+        try:
+            data = entry.json()
+        except ValueError:
+            return MISSING
+        value = resolve_path(data, path, MISSING)
+        # The decoded body is shared with the run result and later lookups, so never hand out its containers
+        if isinstance(value, (dict, list)):
+            return copy.deepcopy(value)
+        return value
@@ -2,15 +2,19 @@ import sys
 import os
 
 from config.config import Config
-from scenario.api_request import APIRequest
+from config.envModel import Env
+from config.settings import SCENARIO_MAX_CONCURRENCY
+from scenario.api_request import APIRequest, RequestExecution
+from scenario.plan import ScenarioPlan, StepPlan, compile_scenario, make_resolver, resolve_path
+from scenario.dag_executor import DagExecutor
+from scenario.response_store import ResponseStore
+from scenario.assertions import AssertionCollector, evaluate
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 from dotenv import load_dotenv
-import os
-from validation.endpoint_validations import ValidatorFactory, manipulate_and_create_random_data
-import re
+from validation.endpoint_validations import manipulate_and_create_random_data
+import time
 
 load_dotenv(dotenv_path=".env")
 
@@ -26,6 +30,7 @@ class TestScenario:
         self.created_at = created_at
         self.updated_at = updated_at
         self.requests: List[APIRequest] = self._parse_requests(requests)
+        self._plan: Optional[ScenarioPlan] = None
 
     def _parse_requests(self, requests_data: List[Dict[str, Any]]) -> List[APIRequest]:
         requests = []
@@ -33,97 +38,197 @@ class TestScenario:
             requests.append(APIRequest(**req_data))
         return requests
 
-    def execute(self, initial_context: Dict[str, Any] = None) -> list[Any]:
-        """Executes the requests in the scenario, handling dependencies based on 'save_as'."""
-        context = initial_context if initial_context else {}
-
-        # A Map to store the request with its response
-        request_response_map = {}
-        runResults = []
-
-        envUrl = Config.selected_env.envUrl
-
-        for request in self.requests:
-            if request.url.startswith("/"):
-                request.url = envUrl + request.url
-            elif not request.url.startswith("http") or not request.url.startswith("https"):
-                request.url = envUrl + "/" + request.url
-
-
-            try:
-                # If size of request_response_map is greater than 0, it means we have already executed some requests
-                if request_response_map:
-                    # Process request body template variables
-                    if request.body:
-                        self._process_template_values_recursive(request.body, request_response_map)
-
-                    # Process URL template variables
-                    if request.url:
-                        self._process_template_url(request, request_response_map)
-
-                if request.method in ["POST", "PUT", "PATCH"]:
-                    request.body = manipulate_and_create_random_data(request.body, request.url)
-
-                runResults.append(request.execute(context))
-                # Store the response content in the request_response_map
-                request_response_map[request.name] = request.response.content
-            except Exception as e:
-                print(f"  {request.name}: Error during execution - {e}")
-                # Optionally stop the scenario execution here
-            print("-" * 20)
-        return runResults
-
-    def _process_template_url(self, request: APIRequest, request_response_map: Dict[str, Any]):
-        url_variables = self.extract_variables(request.url)
-        for var_name in url_variables:
-            path_components = var_name.split(".")
-            source_key = path_components[0]
-
-            if source_key in request_response_map:
-                source_data = request_response_map[source_key]
-
-                if len(path_components) > 1:
-                    # Use path resolution for nested objects
-                    resolved_value = self._resolve_nested_path(source_data, path_components[1:])
-                    if resolved_value is not None:
-                        replacement_value = str(resolved_value)
-                        request.url = request.url.replace(f"{{{{{var_name}}}}}", replacement_value)
-                    else:
-                        print(
-                            f"Warning: Path '{'.'.join(path_components[1:])}' not found in '{source_key}'. Skipping URL replacement.")
-                else:
-                    replacement_value = str(source_data)
-                    request.url = request.url.replace(f"{{{{{var_name}}}}}", replacement_value)
-            else:
-                print(
-                    f"Warning: Variable '{source_key}' not found in response map. Skipping URL replacement.")
+    def compile(self) -> ScenarioPlan:
+        """Compile the scenario into an immutable plan once; every later run reuses it."""
+        if self._plan is None:
+            self._plan = compile_scenario(self)
+        return self._plan
+
+    def execute(self, initial_context: Dict[str, Any] = None, max_concurrency: int = None,
+                collector: AssertionCollector = None) -> list[Any]:
+        """
+        Executes the requests in the scenario, handling dependencies based on 'save_as'.
+
+        With max_concurrency > 1, steps that don't reference each other run in parallel
+        (see DagExecutor); results keep the scenario's step order either way. Runs only
+        read the compiled plan, so one scenario can be executed by several runs at once.
+        Assertions are checked per step, or with a collector, only collected for checking
+        in batches (as load tests do).
+        """
+        plan = self.compile()
+        # Copied, as values extracted by steps are added to it
+        context = dict(initial_context) if initial_context else {}
+        max_concurrency = max_concurrency or SCENARIO_MAX_CONCURRENCY
+
+        # A store of the responses of executed steps, referenced by later steps
+        request_response_map = ResponseStore(plan)
+
+        # Read once per run, so every step (on whichever thread or task) uses the run's environment
+        env = Config.get_selected_env()
+
+        def run_step(index: int):
+            return self._execute_step(plan.steps[index], context, request_response_map, env, collector)
+
+        try:
+            if max_concurrency > 1:
+                return DagExecutor(max_concurrency).run(plan.dependencies, run_step)
+
+            runResults = []
+            for index in range(len(plan.steps)):
+                result = run_step(index)
+                if result is not None:
+                    runResults.append(result)
+            return runResults
+        finally:
+            # Deletes the bodies spilled to disk
+            request_response_map.close()
+
+    async def execute_async(self, initial_context: Dict[str, Any] = None, max_concurrency: int = None) -> list[Any]:
+        """Async variant of execute; steps are awaited on the running event loop instead of blocking a thread."""
+        plan = self.compile()
+        # Copied, as values extracted by steps are added to it
+        context = dict(initial_context) if initial_context else {}
+        max_concurrency = max_concurrency or SCENARIO_MAX_CONCURRENCY
+
+        request_response_map = ResponseStore(plan)
+
+        # Read once per run, so every step (on whichever thread or task) uses the run's environment
+        env = Config.get_selected_env()
+
+        async def run_step(index: int):
+            return await self._execute_step_async(plan.steps[index], context, request_response_map, env)
+
+        try:
+            if max_concurrency > 1:
+                return await DagExecutor(max_concurrency).run_async(plan.dependencies, run_step)
+
+            runResults = []
+            for index in range(len(plan.steps)):
+                result = await run_step(index)
+                if result is not None:
+                    runResults.append(result)
+            return runResults
+        finally:
+            request_response_map.close()
+
+    async def iter_execute_async(self, initial_context: Dict[str, Any] = None,
+                                 max_concurrency: int = None) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Like execute_async, but yields (step index, result) pairs as soon as each step
+        finishes instead of collecting them; in completion order when steps run in parallel.
+        """
+        plan = self.compile()
+        # Copied, as values extracted by steps are added to it
+        context = dict(initial_context) if initial_context else {}
+        max_concurrency = max_concurrency or SCENARIO_MAX_CONCURRENCY
+
+        # Results are yielded rather than collected, so the store keeps neither them nor unreferenced responses
+        request_response_map = ResponseStore(plan, streaming=True)
+
+        # Read once per run, so every step (on whichever thread or task) uses the run's environment
+        env = Config.get_selected_env()
+
+        async def run_step(index: int):
+            return await self._execute_step_async(plan.steps[index], context, request_response_map, env)
+
+        try:
+            if max_concurrency > 1:
+                async for index, result in DagExecutor(max_concurrency).iter_async(plan.dependencies, run_step):
+                    yield index, result
+                return
+
+            for index in range(len(plan.steps)):
+                result = await run_step(index)
+                if result is not None:
+                    yield index, result
+        finally:
+            request_response_map.close()
+
+    def _execute_step(self, step: StepPlan, context: Dict[str, Any], request_response_map: ResponseStore,
+                      env: Env, collector: AssertionCollector = None) -> Optional[Dict[str, Any]]:
+        """Executes a single step, returning its run result or None if it failed to execute."""
+        execution = RequestExecution(step.name, step.method)
+
+        result = None
+        try:
+            url, headers, body = self._render_step(step, execution, context, request_response_map, env)
+            result = execution.send(url, headers, body, env)
+            self._check_assertions(step, execution, result, collector)
+            # Store the response in the request_response_map
+            self._save_response(step, execution, result, context, request_response_map)
+        except Exception as e:
+            print(f"  {step.name}: Error during execution - {e}")
+            # Optionally stop the scenario execution here
+        finally:
+            # Unless the store took it, e.g. when an assertion raised first
+            execution.close()
+        print("-" * 20)
+        return result
+
+    async def _execute_step_async(self, step: StepPlan, context: Dict[str, Any],
+                                  request_response_map: ResponseStore, env: Env) -> Optional[Dict[str, Any]]:
+        execution = RequestExecution(step.name, step.method)
+
+        result = None
+        try:
+            url, headers, body = self._render_step(step, execution, context, request_response_map, env)
+            result = await execution.send_async(url, headers, body, env)
+            self._check_assertions(step, execution, result)
+            self._save_response(step, execution, result, context, request_response_map)
+        except Exception as e:
+            print(f"  {step.name}: Error during execution - {e}")
+        finally:
+            # Unless the store took it, e.g. when an assertion raised first
+            execution.close()
+        print("-" * 20)
+        return result
+
+    def _check_assertions(self, step: StepPlan, execution: RequestExecution, result: Dict[str, Any],
+                          collector: AssertionCollector = None):
+        """Adds the outcome of each assertion to the result, failing it if any doesn't hold."""
+        if not step.assertions:
+            return
+        if collector is not None:
+            collector.add(step, execution.response_view())
+            return
+        outcomes = evaluate(step.assertions, execution.response_view())
+        result["assertions"] = outcomes
+        if not all(outcome["passed"] for outcome in outcomes):
+            result["status"]["text"] = "FAILED"
+
+    def _save_response(self, step: StepPlan, execution: RequestExecution, result: Dict[str, Any],
+                       context: Dict[str, Any], request_response_map: ResponseStore):
+        """
+        Keeps the step's response for later steps, or with extraction rules, only the extracted values.
+        Either way the store accounts for the body in the step's result (see ResponseStore).
+        """
+        if step.extractors:
+            request_response_map.add_result(step.name, execution.stored, result)
+            context[step.save_as] = execution.extract(step)
+        else:
+            request_response_map.put(step.save_as, execution.stored, result)
+            # The store owns it now and closes it when it's evicted
+            execution.stored = None
+
+    def _render_step(self, step: StepPlan, execution: RequestExecution, context: Dict[str, Any],
+                     request_response_map: ResponseStore, env: Env):
+        """Resolves references to earlier responses and the context, and fills in random data for write requests."""
+        started = time.perf_counter()
+        try:
+            url, headers, body = step.render(make_resolver(request_response_map, context), env.envUrl)
+        finally:
+            request_response_map.release(step)
+        execution.add_timing("templating", started)
+
+        if step.method in ["POST", "PUT", "PATCH"]:
+            started = time.perf_counter()
+            body = manipulate_and_create_random_data(body, url)
+            execution.add_timing("randomData", started)
+        return url, headers, body
 
     def _resolve_nested_path(self, data: Any, path_components: list) -> Any:
         """Resolves a nested path in data structure like 'response.data.id'."""
-        # convert data to dict if it's a string, or bytes
-        if isinstance(data, str):
-            try:
-                data = json.loads(data)
-            except json.JSONDecodeError:
-                return None
-        elif isinstance(data, bytes):
-            try:
-                data = json.loads(data.decode('utf-8'))
-            except json.JSONDecodeError:
-                return None
-        current = data
-        for component in path_components:
-            if isinstance(current, dict) and component in current:
-                current = current[component]
-            elif isinstance(current, list) and component.isdigit():
-                index = int(component)
-                if 0 <= index < len(current):
-                    current = current[index]
-                else:
-                    return None
-            else:
-                return None
-        return current
+        return resolve_path(data, tuple(path_components))
 
     def to_dict(self) -> Dict[str, Any]:
         """Converts the scenario object to a dictionary for saving."""
@@ -134,75 +239,26 @@ class TestScenario:
             "version": self.version,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
-            "requests": [
-                {
-                    "name": req.name,
-                    "method": req.method,
-                    "url": req.url,
-                    "headers": req.headers,
-                    "body": req.body,
-                }
-                for req in self.requests
-            ],
+            "requests": [self._request_to_dict(req) for req in self.requests],
         }
 
-    def _process_template_values_recursive(self, data, request_response_map):
-        """Process template variables recursively in nested structures."""
-        if isinstance(data, dict):
-            for key, value in data.items():
-                if isinstance(value, str) and "{{" in value and "}}" in value:
-                    # Extract variable name from the template string
-                    var_name = value.strip("{{").strip("}}")
-                    # Parse the path components
-                    path_components = var_name.split(".")
-                    source_key = path_components[0]
-
-                    if source_key in request_response_map:
-                        source_data = request_response_map[source_key]
-
-                        if len(path_components) > 1:
-                            # Use path resolution for nested objects
-                            resolved_value = self._resolve_nested_path(source_data, path_components[1:])
-                            if resolved_value is not None:
-                                data[key] = resolved_value
-                            else:
-                                print(
-                                    f"Warning: Path '{'.'.join(path_components[1:])}' not found in '{source_key}'. Skipping replacement.")
-                        else:
-                            data[key] = source_data
-                    else:
-                        print(f"Warning: Variable '{source_key}' not found in response map. Skipping replacement.")
-                elif isinstance(value, (dict, list)):
-                    # Recursively process nested objects/arrays
-                    self._process_template_values_recursive(value, request_response_map)
-        elif isinstance(data, list):
-            for i, item in enumerate(data):
-                if isinstance(item, str) and "{{" in item and "}}" in item:
-                    # Handle template strings in lists
-                    var_name = item.strip("{{").strip("}}")
-                    path_components = var_name.split(".")
-                    source_key = path_components[0]
-
-                    if source_key in request_response_map:
-                        source_data = request_response_map[source_key]
-                        if len(path_components) > 1:
-                            resolved_value = self._resolve_nested_path(source_data, path_components[1:])
-                            if resolved_value is not None:
-                                data[i] = resolved_value
-                        else:
-                            data[i] = source_data
-                elif isinstance(item, (dict, list)):
-                    # Recursively process nested objects/arrays in lists
-                    self._process_template_values_recursive(item, request_response_map)
-
-    # Get all {{}} variables from the url
-    def extract_variables(self, string: str) -> list:
-        """
-        Extract all {{}} variables from a string.
-        """
-        pattern = r"\{\{(.*?)\}\}"
-        matches = re.findall(pattern, string)
-        return [match.strip() for match in matches]
+    @staticmethod
+    def _request_to_dict(req: APIRequest) -> Dict[str, Any]:
+        data = {
+            "name": req.name,
+            "method": req.method,
+            "url": req.url,
+            "headers": req.headers,
+            "body": req.body,
+        }
+        # save_as defaults to the name, so it's only written when it differs
+        if req.save_as and req.save_as != req.name:
+            data["save_as"] = req.save_as
+        if req.extract:
+            data["extract"] = req.extract
+        if req.assertions:
+            data["assertions"] = req.assertions
+        return data
 
 
 def get_all_field_paths(body: Dict[str, Any], prefix: str = "") -> List[str]:
@@ -0,0 +1,87 @@
+# test_api.py
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api import app
+from database import Base, get_db
+from config.envModel import Env, envs
+from runtime.flow_runner import save_scenario
+from runtime.mock_gateway import MockGateway
+from scenario.scenario import TestScenario
+from util.http_client import async_http_transport
+
+REQUESTS = [
+    {"name": "create-api", "method": "POST", "url": "api-specs", "body": {"name": "orders"}},
+    {"name": "get-api", "method": "GET", "url": "api-specs/{{create-api.apiSpecId}}"},
+]
+
+
+@pytest.fixture
+def gateway_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCENARIO_SAVE_DIR", str(tmp_path))
+    monkeypatch.setattr("repositories.run_repository.RUN_HISTORY_ENABLED", False)
+    with MockGateway(port=0, seed=1) as gateway:
+        monkeypatch.setitem(envs, "mock", Env(clientId="mock", clientSecret="secret", urlKeycloak=gateway.url,
+                                              realm="dgate", envUrl=gateway.url, username="mock", password="secret"))
+        save_scenario(TestScenario("api_run", "id_api_run", "", "1.0.0", "", "", REQUESTS))
+        yield gateway
+
+
+def test_async_run_closes_the_clients_of_finished_loops(gateway_env, monkeypatch):
+    created = []
+    create_client = async_http_transport._create_client
+    monkeypatch.setattr(async_http_transport, "_create_client", lambda: created.append(create_client()) or created[-1])
+
+    # Without a context manager every TestClient call runs on a new event loop
+    client = TestClient(app)
+    for _ in range(2):
+        response = client.post("/api/scenarios/api_run/run/async", json={"environment": "mock"})
+        assert response.status_code == 200
+        assert response.json()["status"] == "success"
+
+    assert gateway_env.stats()["items"] == {"api-specs": 2}
+    assert len(created) == 2 and all(client.is_closed for client in created)
+
+
+def test_bulk_templates_with_invalid_encoded_bodies_are_rejected():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+
+    def get_test_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = get_test_db
+    try:
+        client = TestClient(app)
+        response = client.post("/api/templates/bulk", json=[{"name": "a", "endpoint_type": "plans", "body": "{",
+                                                             "encoded": True}])
+        assert response.status_code == 400 and "not valid JSON" in response.json()["detail"]
+        response = client.post("/api/templates/bulk", json=[{"name": "a", "endpoint_type": "plans", "body": "text"}])
+        assert response.status_code == 200 and response.json()["count"] == 1
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+
+def test_streamed_runs_are_recorded_in_the_run_history(gateway_env, monkeypatch):
+    recorded = []
+    monkeypatch.setattr("runtime.flow_runner.record_run", lambda *args: recorded.append(args))
+
+    with TestClient(app) as client:
+        response = client.post("/api/scenarios/api_run/run/stream", json={"environment": "mock"})
+    frames = [json.loads(line) for line in response.text.splitlines()]
+    assert [frame["event"] for frame in frames] == ["step", "step", "summary"]
+
+    scenario, environment, results = recorded[0][:3]
+    assert (scenario, environment) == ("api_run", "mock")
+    assert [result["name"] for result in results] == ["create-api", "get-api"]
+    assert results[0]["response"]["bodyHash"] == frames[0]["result"]["response"]["bodyHash"]
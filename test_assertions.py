@@ -0,0 +1,52 @@
+# test_assertions.py
+import pytest
+
+from scenario.api_request import APIRequest
+from scenario.assertions import AssertionCollector, ResponseView, compile_assertions, evaluate
+from scenario.plan import ScenarioPlan, build_dependencies
+from scenario.response_store import StoredResponse
+
+SPECS = [
+    {"type": "status_code", "value": "201"},
+    {"type": "json_path", "path": "$.status", "value": "DRAFT"},
+    {"type": "response_body_contains", "value": "apiSpecId"},
+    {"type": "regex", "path": "name", "pattern": "^api_"},
+    {"type": "schema", "schema": {"type": "object", "required": ["apiSpecId"],
+                                  "properties": {"apiSpecId": {"type": "integer"}}}},
+    {"type": "latency", "max_ms": 100, "percentile": 50},
+]
+
+
+def _view(status=201, latency=20.0, body=b'{"apiSpecId": 1, "status": "DRAFT", "name": "api_1"}'):
+    return ResponseView(status, latency, StoredResponse(body))
+
+
+def test_single_responses_are_checked_per_assertion():
+    assertions = compile_assertions("create-api", SPECS)
+
+    assert all(outcome["passed"] for outcome in evaluate(assertions, _view()))
+
+    outcomes = evaluate(assertions, _view(400, 250.0, b'{"apiSpecId": "x", "name": "other"}'))
+    assert [outcome["passed"] for outcome in outcomes] == [False, False, True, False, False, False]
+    assert outcomes[4]["actual"] == "$.apiSpecId is not of type integer"
+
+    with pytest.raises(ValueError):
+        compile_assertions("create-api", [{"type": "regex", "pattern": "("}])
+    with pytest.raises(ValueError):
+        compile_assertions("create-api", [{"type": "unknown"}])
+
+
+def test_load_test_values_are_checked_in_batches():
+    step = APIRequest(name="create-api", method="POST", url="api-specs", assertions=SPECS).compile()
+    collector = AssertionCollector(ScenarioPlan("s", (step,), build_dependencies((step,))), batch_size=2)
+
+    for latency in (10.0, 20.0, 300.0):
+        collector.add(step, _view(latency=latency))
+    collector.add(step, _view(status=500, latency=40.0))
+
+    report = {entry["assertion"]: entry for entry in collector.report()["create-api"]}
+    status = report["status == 201"]
+    assert (status["passed"], status["total"], status["passRate"], status["failures"]) == (3, 4, 0.75, [500])
+    latency = report["p50 latency <= 100ms"]
+    assert latency["passRate"] == 0.75
+    assert (latency["percentileMs"], latency["slaMet"]) == (20.0, True)
@@ -0,0 +1,49 @@
+# test_batch_runner.py
+from runtime.batch_runner import find_scenarios, merge_reports, run_batch
+
+
+def _report(name, status, totals):
+    return {
+        "scenario": name,
+        "status": status,
+        "durationSeconds": 0.1,
+        "numberOfRequests": len(totals),
+        "failedRequests": 0 if status == "success" else len(totals),
+        "steps": [{"name": f"step{i}", "status": 200, "result": "SUCCESS", "totalMs": total}
+                  for i, total in enumerate(totals)],
+    }
+
+
+def test_find_scenarios_matches_the_glob(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCENARIO_SAVE_DIR", str(tmp_path))
+    for name in ("smoke_a", "smoke_b", "regression"):
+        (tmp_path / f"{name}.yaml").write_text("name: x\n")
+
+    assert find_scenarios() == ["regression", "smoke_a", "smoke_b"]
+    assert find_scenarios("smoke_*") == ["smoke_a", "smoke_b"]
+
+
+def test_merge_reports_counts_scenarios_and_merges_latency():
+    reports = [_report("b", "failed", [30.0]), _report("a", "success", [10.0, 20.0]), _report("c", "error", [])]
+
+    merged = merge_reports(reports, "localDev", 1.5)
+
+    assert [report["scenario"] for report in merged["results"]] == ["a", "b", "c"]
+    assert (merged["scenarios"], merged["passed"], merged["failed"], merged["errors"]) == (3, 1, 1, 1)
+    assert merged["requests"] == 3
+    assert merged["requestLatencyMs"]["count"] == 3
+    assert merged["requestLatencyMs"]["max"] == 30.0
+    assert merged["status"] == "failed"
+
+
+def test_run_batch_reports_unloadable_scenarios_as_errors(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCENARIO_SAVE_DIR", str(tmp_path))
+    (tmp_path / "broken_one.yaml").write_text("requests: [\n")
+    (tmp_path / "broken_two.yaml").write_text("requests: [\n")
+
+    report = run_batch("broken_*", "localDev", workers=2)
+
+    assert report["scenarios"] == 2
+    assert report["errors"] == 2
+    assert all(result["error"] for result in report["results"])
+    assert report["status"] == "failed"
@@ -0,0 +1,59 @@
+# test_body_pool.py
+import itertools
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from validation import body_pool
+from validation.body_pool import BodyPool, generate_body
+from validation.endpoint_validations import ApiSpecValidations, manipulate_and_create_random_data
+
+
+def test_pool_is_refilled_in_the_background():
+    pool = BodyPool(ApiSpecValidations, size=4, seed=None)
+    first = pool.get()
+    assert first["name"].startswith("api_")
+
+    deadline = time.time() + 2
+    while len(pool._bodies) < 4 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(pool._bodies) == 4
+    assert pool.get() is not first
+
+
+def test_seeded_pool_returns_equal_independent_copies():
+    pool = BodyPool(ApiSpecValidations, size=4, seed=42)
+    first, second = pool.get(), pool.get()
+    assert first == second and first is not second
+    assert BodyPool(ApiSpecValidations, size=4, seed=42).get() == first
+    assert BodyPool(ApiSpecValidations, size=4, seed=7).get() != first
+
+    first["metaData"]["tags"].append("changed")
+    assert "changed" not in pool.get()["metaData"]["tags"]
+
+
+def test_random_data_fills_missing_fields_from_the_pool():
+    body = manipulate_and_create_random_data({"name": "mine"}, "/api-specs")
+    assert body["name"] == "mine"
+    assert body["type"] in ("PUBLIC", "PRIVATE", "PARTNER")
+
+
+def test_seeded_generation_runs_concurrently_without_touching_unseeded_ids(monkeypatch):
+    expected = generate_body(ApiSpecValidations, 42)
+    ids = []
+    counter = itertools.count(1)
+
+    def uuid4():
+        value = uuid.UUID(int=next(counter) << 96)
+        ids.append(value)
+        return value
+
+    monkeypatch.setattr(body_pool.uuid, "uuid4", uuid4)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        seeded = list(executor.map(lambda _: generate_body(ApiSpecValidations, 42), range(16)))
+        unseeded = list(executor.map(lambda _: generate_body(ApiSpecValidations), range(16)))
+
+    assert all(body == expected for body in seeded)
+    # Unseeded ids are uuid4s, never drawn from a seeded generator
+    assert len(ids) >= 16 and len({body["name"] for body in unseeded}) == 16
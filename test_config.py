@@ -0,0 +1,40 @@
+# test_config.py
+import threading
+
+import pytest
+
+from config.config import Config
+from scenario.dag_executor import DagExecutor
+
+
+def test_selected_environment_is_scoped_to_the_context():
+    seen = {}
+    barrier = threading.Barrier(2)
+
+    def select(name):
+        Config.set_selected_env(name)
+        barrier.wait()
+        seen[name] = Config.get_selected_env_name()
+
+    threads = [threading.Thread(target=select, args=(name,)) for name in ("dev", "test")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert seen == {"dev": "dev", "test": "test"}
+    assert Config.get_selected_env_name() is None
+    with pytest.raises(ValueError):
+        Config.get_selected_env()
+
+
+def test_selection_is_restored_and_carried_into_parallel_steps():
+    with Config.selected("dev"):
+        with Config.selected("test"):
+            names = DagExecutor(max_workers=3).run([set(), set(), {0, 1}], lambda index: Config.get_selected_env_name())
+        assert names == ["test", "test", "test"]
+        assert Config.get_selected_env_name() == "dev"
+    assert Config.get_selected_env_name() is None
+
+    with pytest.raises(ValueError):
+        Config.set_selected_env("missing")
@@ -0,0 +1,83 @@
+# test_dag_executor.py
+import asyncio
+import threading
+import time
+
+from scenario.dag_executor import DagExecutor
+
+
+def test_independent_steps_run_concurrently_and_keep_order():
+    names = ["a", "b", "c", "d"]
+    dependencies = [set(), set(), set(), {0, 1, 2}]
+    finished = []
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def run_step(index):
+        with lock:
+            active.append(index)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.remove(index)
+            finished.append(index)
+        return names[index]
+
+    results = DagExecutor(max_workers=3).run(dependencies, run_step)
+
+    assert results == ["a", "b", "c", "d"]
+    assert max(peak) == 3
+    assert finished[-1] == 3
+
+
+def test_failed_steps_are_left_out():
+    assert DagExecutor(max_workers=2).run([set(), set()], lambda index: None if index == 0 else "b") == ["b"]
+
+
+def test_run_async_waits_for_dependencies():
+    names = ["a", "b", "c"]
+    order = []
+
+    async def run_step(index):
+        await asyncio.sleep(0.02 if index == 0 else 0)
+        order.append(names[index])
+        return names[index]
+
+    results = asyncio.run(DagExecutor(max_workers=3).run_async([set(), {0}, set()], run_step))
+
+    assert results == ["a", "b", "c"]
+    assert order.index("a") < order.index("b")
+    assert order[0] == "c"
+
+
+def test_iter_async_yields_results_as_steps_finish():
+    async def run_step(index):
+        await asyncio.sleep(0.03 if index == 0 else 0)
+        return None if index == 2 else index
+
+    async def collect():
+        return [pair async for pair in DagExecutor(max_workers=3).iter_async([set(), set(), set(), {0}], run_step)]
+
+    assert asyncio.run(collect()) == [(1, 1), (0, 0), (3, 3)]
+
+
+def test_closing_iter_async_early_waits_for_the_cancelled_steps():
+    cancelled = []
+
+    async def run_step(index):
+        try:
+            await asyncio.sleep(0 if index == 0 else 1)
+        except asyncio.CancelledError:
+            cancelled.append(index)
+            raise
+        return index
+
+    async def first_then_close():
+        stream = DagExecutor(max_workers=3).iter_async([set(), set(), {1}], run_step)
+        first = await stream.__anext__()
+        await stream.aclose()
+        # Every cancelled step has stopped by the time aclose returns
+        return first, sorted(cancelled)
+
+    assert asyncio.run(first_then_close()) == ((0, 0), [1])
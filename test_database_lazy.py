@@ -0,0 +1,38 @@
+# test_database_lazy.py
+import asyncio
+import importlib
+import sys
+import time
+
+from sqlalchemy import create_engine
+
+import database
+
+
+def test_engine_is_created_on_first_use():
+    original = sys.modules.pop("database", None)
+    database = importlib.import_module("database")
+    try:
+        assert database._engine is None
+        session = database.SessionLocal()
+        assert session.get_bind() is database.get_engine() is database.engine
+        session.close()
+        assert asyncio.run(database.check_health())["status"] == "ok"
+    finally:
+        # Restore the module the other tests (and models.Base) were imported with
+        if original is not None:
+            sys.modules["database"] = original
+
+
+def test_health_probe_timeout_does_not_cover_engine_creation(monkeypatch):
+    def slow_create_engine():
+        # As in "auto" mode, waiting for SQL Server before falling back to SQLite
+        time.sleep(0.3)
+        return create_engine("sqlite://")
+
+    monkeypatch.setattr(database, "_engine", None)
+    monkeypatch.setattr(database, "_create_engine", slow_create_engine)
+
+    health = asyncio.run(database.check_health(timeout=0.1))
+
+    assert health["status"] == "ok" and health["backend"] == "sqlite"
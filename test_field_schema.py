@@ -0,0 +1,27 @@
+# test_field_schema.py
+from scenario.scenario import get_all_field_paths, get_value_from_path
+from validation.endpoint_validations import ApiSpecValidations
+from validation.field_schema import extract_field_schema, get_validator_field_schema
+
+
+def test_single_pass_matches_the_path_walk():
+    body = {"name": "x", "metaData": {"tags": ["a"], "version": 1.5}, "policies": [{"order": 1, "id": 2}],
+            "premium": True, "count": 3}
+    fields = extract_field_schema(body)
+
+    assert [field["path"] for field in fields] == get_all_field_paths(body)
+    types = {field["path"]: field["type"] for field in fields}
+    assert types == {"name": "string", "metaData": "object", "metaData.tags": "array", "metaData.version": "number",
+                     "policies": "array", "policies[0].order": "integer", "policies[0].id": "integer",
+                     "premium": "boolean", "count": "integer"}
+    assert get_value_from_path(body, "policies[0].id") == 2
+    assert [field["path"] for field in fields if field["required"]] == ["name", "policies[0].id"]
+    assert not any(field["required"] for field in extract_field_schema(body, infer_required=False))
+
+
+def test_validator_schemas_are_deterministic_and_cached():
+    schema = get_validator_field_schema(ApiSpecValidations)
+    assert get_validator_field_schema(ApiSpecValidations) is schema
+    get_validator_field_schema.cache_clear()
+    assert get_validator_field_schema(ApiSpecValidations) == schema
+    assert schema.etag.startswith('"')
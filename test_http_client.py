@@ -0,0 +1,76 @@
+# test_http_client.py
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from urllib3.util import connection
+
+from util.http_client import HttpTransport
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_connections_are_reused_per_origin():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    transport = HttpTransport(pool_size=2)
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/api-specs"
+        for _ in range(5):
+            assert transport.request("GET", url).json() == {"ok": True}
+
+        stats = transport.stats()[f"http://127.0.0.1:{server.server_port}"]
+        assert stats["requests"] == 5
+        assert stats["connectionsOpened"] == 1
+        assert stats["connectionsReused"] == 4
+    finally:
+        transport.close()
+        server.shutdown()
+
+
+def test_a_refused_connection_is_attempted_once(monkeypatch):
+    # A port nothing listens on once the probe socket is closed
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    attempts = []
+    create_connection = connection.create_connection
+
+    def counting_create_connection(address, *args, **kwargs):
+        attempts.append(address)
+        return create_connection(address, *args, **kwargs)
+
+    monkeypatch.setattr(connection, "create_connection", counting_create_connection)
+    transport = HttpTransport(max_retries=0)
+    try:
+        with pytest.raises(requests.ConnectionError):
+            transport.request("GET", f"http://127.0.0.1:{port}/api-specs")
+    finally:
+        transport.close()
+
+    assert attempts == [("127.0.0.1", port)]
+
+
+def test_an_empty_address_list_fails_to_connect(monkeypatch):
+    monkeypatch.setattr(socket, "getaddrinfo", lambda *args, **kwargs: [])
+    transport = HttpTransport(max_retries=0)
+    try:
+        with pytest.raises(requests.ConnectionError, match="getaddrinfo returns an empty list"):
+            transport.request("GET", "http://gateway.invalid/api-specs")
+    finally:
+        transport.close()
@@ -0,0 +1,104 @@
+# test_load_test.py
+import threading
+import time
+
+import pytest
+
+from config.envModel import Env, envs
+from runtime.flow_runner import _Pacer, run_load_test, save_scenario
+from runtime.mock_gateway import MockGateway
+from scenario.scenario import TestScenario
+
+REQUESTS = [
+    {"name": "create-api", "method": "POST", "url": "api-specs", "body": {"name": "orders-{{vu}}-{{iteration}}"}},
+    {"name": "get-api", "method": "GET", "url": "api-specs/{{create-api.apiSpecId}}"},
+]
+
+
+@pytest.fixture
+def start_gateway(tmp_path, monkeypatch):
+    """Start a mock gateway with the given options as the "mock" environment, with a saved two-step scenario."""
+    monkeypatch.setenv("SCENARIO_SAVE_DIR", str(tmp_path))
+    monkeypatch.setattr("repositories.run_repository.RUN_HISTORY_ENABLED", False)
+    save_scenario(TestScenario("load", "id_load", "", "1.0.0", "", "", REQUESTS))
+    gateways = []
+
+    def start(**options):
+        gateway = MockGateway(port=0, seed=1, **options)
+        gateways.append(gateway)
+        url = gateway.start()
+        monkeypatch.setitem(envs, "mock", Env(clientId="mock", clientSecret="secret", urlKeycloak=url, realm="dgate",
+                                              envUrl=url, username="mock", password="secret"))
+        return gateway
+
+    yield start
+    for gateway in gateways:
+        gateway.stop()
+
+
+def test_runs_the_requested_iterations_across_users(start_gateway):
+    gateway = start_gateway()
+
+    summary = run_load_test("load", "mock", users=3, iterations=7)
+
+    assert (summary["iterations"], summary["failedIterations"]) == (7, 0)
+    assert (summary["requests"], summary["failedRequests"]) == (14, 0)
+    assert summary["status"] == "success"
+    assert summary["requestLatencyMs"]["count"] == 14
+    assert set(summary["steps"]) == {"create-api", "get-api"}
+    assert gateway.stats()["items"] == {"api-specs": 7}
+
+
+def test_defaults_to_one_iteration_per_user(start_gateway):
+    start_gateway()
+
+    assert run_load_test("load", "mock", users=2)["iterations"] == 2
+
+
+def test_duration_runs_are_paced_to_the_target_request_rate(start_gateway):
+    start_gateway()
+
+    # 20 requests/s over two steps is one iteration every 100ms
+    summary = run_load_test("load", "mock", users=2, duration=0.5, ramp_up=0.2, target_rps=20)
+
+    assert 3 <= summary["iterations"] <= 5
+    assert summary["durationSeconds"] >= 0.5
+    assert summary["throughput"]["requestsPerSecond"] <= 25
+
+
+def test_failed_requests_fail_their_iterations(start_gateway):
+    start_gateway(error_rate=1.0)
+
+    summary = run_load_test("load", "mock", users=2, iterations=3)
+
+    assert (summary["iterations"], summary["failedIterations"]) == (3, 3)
+    assert (summary["requests"], summary["failedRequests"]) == (6, 6)
+    assert summary["errorRate"] == 1.0
+    assert summary["steps"]["create-api"]["failed"] == 3
+    assert summary["status"] == "failed"
+
+
+def test_pacer_spaces_starts_across_threads():
+    pacer = _Pacer(50)
+    starts = []
+
+    def user():
+        for _ in range(3):
+            pacer.wait()
+            starts.append(time.monotonic())
+
+    threads = [threading.Thread(target=user) for _ in range(2)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Six starts 20ms apart, the first immediately; threads may wake up a little late, never early
+    assert len(starts) == 6
+    assert max(starts) - started >= 5 * 0.02 - 0.002
+
+
+def test_users_must_be_positive():
+    with pytest.raises(ValueError):
+        run_load_test("load", "mock", users=0)
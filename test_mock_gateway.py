@@ -0,0 +1,59 @@
+# test_mock_gateway.py
+import json
+
+import requests
+
+from runtime.mock_gateway import MockGateway, id_field
+
+
+def _post(gateway, path, body):
+    return gateway.handle("POST", path, json.dumps(body).encode())
+
+
+def test_id_fields_follow_the_gateway_naming():
+    assert id_field("api-specs") == "apiSpecId"
+    assert id_field("policies") == "policyId"
+    assert id_field("publication-flow-configs") == "publicationFlowConfigId"
+
+
+def test_items_are_created_read_updated_and_deleted():
+    gateway = MockGateway(seed=1)
+
+    status, created = _post(gateway, "/api/v1/api-specs", {"name": "orders"})
+    assert status == 201 and created["apiSpecId"] == created["id"]
+    item_path = f"/api/v1/api-specs/{created['id']}"
+
+    assert gateway.handle("GET", item_path) == (200, created)
+    status, updated = gateway.handle("PATCH", item_path, b'{"description": "Orders API", "id": 99}')
+    assert status == 200 and updated["name"] == "orders" and updated["id"] == created["id"]
+    assert gateway.handle("GET", "/api/v1/api-specs")[1] == [updated]
+    assert gateway.handle("DELETE", item_path) == (204, None)
+    assert gateway.handle("GET", item_path)[0] == 404
+    assert gateway.handle("GET", "/unknown")[0] == 404
+
+
+def test_list_bodies_of_nested_collections_create_one_item_each():
+    gateway = MockGateway(seed=1, max_items=2)
+
+    status, created = _post(gateway, "/authenticators/3/credentials", [{"type": "OAUTH"}] * 3)
+
+    assert status == 201 and [item["credentialId"] for item in created] == [1, 2, 3]
+    # Only the newest max_items are kept
+    assert [item["id"] for item in gateway.handle("GET", "/credentials")[1]] == [2, 3]
+
+
+def test_errors_are_injected_but_not_for_tokens():
+    gateway = MockGateway(error_rate=1.0, error_status=503, seed=1)
+
+    assert _post(gateway, "/products", {})[0] == 503
+    assert gateway.handle("POST", "/realms/dgate/protocol/openid-connect/token")[0] == 200
+
+
+def test_serves_over_http_and_reports_server_time():
+    with MockGateway(port=0, seed=1) as gateway:
+        response = requests.post(f"{gateway.url}/products", json={"name": "gold"}, timeout=5)
+        stats = requests.get(f"{gateway.url}/__mock__/stats", timeout=5).json()
+
+    assert response.status_code == 201 and response.json()["productId"] == 1
+    assert stats["statuses"] == {"201": 1} and stats["items"] == {"products": 1}
+    assert stats["serverMs"]["count"] == 1
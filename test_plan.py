@@ -0,0 +1,103 @@
+# test_plan.py
+from scenario.api_request import APIRequest
+from scenario.response_store import ResponseStore, StoredResponse
+from scenario.plan import MISSING, CompiledTemplate, Reference, build_dependencies, make_resolver
+
+
+def _step(name, url="api-specs", body=None, headers=None):
+    return APIRequest(name=name, method="POST", url=url, headers=headers, body=body).compile()
+
+
+def test_templates_are_tokenized_into_literals_and_references():
+    template = CompiledTemplate("products/{{create_product.productId}}/plans/${plan.items.0.id}?x={{ vu }}")
+
+    assert template.segments == (
+        "products/",
+        Reference("create_product", ("productId",), "{{create_product.productId}}"),
+        "/plans/",
+        Reference("plan", ("items", "0", "id"), "${plan.items.0.id}"),
+        "?x=",
+        Reference("vu", (), "{{ vu }}"),
+    )
+
+
+def test_render_resolves_responses_and_context_and_keeps_unresolved_placeholders():
+    step = _step("create_product", url="products/{{create-api.apiSpecId}}",
+                 headers={"x-user": "vu-${vu}"},
+                 body={"apiSpecs": [{"apiSpecId": "{{create-api.apiSpecId}}"}], "other": "{{missing.id}}"})
+    responses = ResponseStore()
+    responses.put("create-api", StoredResponse(b'{"apiSpecId": 7}'))
+    resolve = make_resolver(responses, {"vu": 3})
+
+    url, headers, body = step.render(resolve, "http://backend")
+
+    assert url == "http://backend/products/7"
+    assert headers == {"x-user": "vu-3"}
+    # A value that is exactly one reference keeps the referenced type
+    assert body == {"apiSpecs": [{"apiSpecId": 7}], "other": "{{missing.id}}"}
+
+
+def test_rendering_never_mutates_the_plan():
+    step = _step("a", body={"nested": {"name": "fixed"}})
+    first = step.render(make_resolver(ResponseStore(), {}))[2]
+    first["nested"]["name"] = "changed"
+
+    assert step.render(make_resolver(ResponseStore(), {}))[2] == {"nested": {"name": "fixed"}}
+
+
+def test_dependencies_only_link_earlier_steps():
+    steps = (
+        _step("create-api"),
+        _step("create-api2"),
+        _step("create_product", body={"apiSpecs": [{"apiSpecId": "{{create-api.apiSpecId}}"}]}),
+        _step("get_product", url="products/${create_product.productId}", body={"x": "{{later.id}}"}),
+        _step("later"),
+    )
+    assert build_dependencies(steps) == (frozenset(), frozenset(), {0}, {2}, frozenset())
+
+
+def test_unknown_reference_is_missing():
+    assert make_resolver(ResponseStore(), {})(Reference("nope", ("id",), "{{nope.id}}")) is MISSING
+
+
+def test_extraction_rules_keep_only_the_selected_values():
+    request = APIRequest(name="list-apis", method="GET", url="api-specs", save_as="apis",
+                         extract={"first": "$.items[0].id", "public": "$.items[?type = 'PUBLIC'].id",
+                                  "total": "page.total", "absent": "$.nothing"})
+    step = request.compile()
+    body = {"items": [{"id": 1, "type": "PUBLIC"}, {"id": 2, "type": "PARTNER"}, {"id": 3, "type": "PUBLIC"}],
+            "page": {"total": 3}}
+
+    assert step.extract(body) == {"first": 1, "public": [1, 3], "total": 3}
+
+    dependent = _step("create", url="api-specs/{{apis.first}}")
+    assert build_dependencies((step, dependent)) == (frozenset(), frozenset({0}))
+    url, _, _ = dependent.render(make_resolver(ResponseStore(), {"apis": step.extract(body)}))
+    assert url == "api-specs/1"
+
+    try:
+        APIRequest(name="bad", method="GET", url="x", extract={"id": "$.items[("}).compile()
+        assert False, "invalid JSONPath is rejected when the scenario is compiled"
+    except ValueError:
+        pass
+
+
+def test_extraction_results_have_the_shape_of_the_rule():
+    step = APIRequest(name="list-apis", method="GET", url="api-specs",
+                      extract={"public": "$.items[?type = 'PUBLIC'].id", "ids": "$..id", "first": "$.items[0].id",
+                               "owner": "page.owner", "missing": "page.next"}).compile()
+    body = {"items": [{"id": 1, "type": "PUBLIC"}, {"id": 2, "type": "PARTNER"}], "page": {"owner": None}}
+
+    # A filter matching one value still extracts a list; a present null is kept
+    assert step.extract(body) == {"public": [1], "ids": [1, 2], "first": 1, "owner": None}
+
+
+def test_extracted_nulls_render_as_null():
+    step = APIRequest(name="get-api", method="GET", url="api-specs/1", save_as="api",
+                      extract={"owner": "owner"}).compile()
+    responses = ResponseStore()
+    responses.put("raw", StoredResponse(b'{"owner": null}'))
+    resolve = make_resolver(responses, {"api": step.extract({"owner": None})})
+
+    update = _step("update", body={"owner": "{{api.owner}}", "raw": "{{raw.owner}}", "gone": "{{api.missing}}"})
+    assert update.render(resolve)[2] == {"owner": None, "raw": None, "gone": "{{api.missing}}"}
@@ -0,0 +1,137 @@
+# test_response_store.py
+from unittest.mock import Mock
+
+from config.config import Config
+from config.envModel import Env, envs
+from runtime.mock_gateway import MockGateway
+from scenario.api_request import APIRequest
+from scenario.plan import MISSING, compile_step, ScenarioPlan, build_dependencies
+from scenario.response_store import ResponseStore, StoredResponse
+from scenario.scenario import TestScenario
+
+
+def test_stored_response_decodes_once_and_exposes_raw_view():
+    stored = StoredResponse(b'{"data": {"id": 5}}')
+    assert stored.raw.tobytes() == b'{"data": {"id": 5}}'
+    assert stored.json() is stored.json()
+
+    store = ResponseStore()
+    store.put("create", stored)
+    nested = store.resolve("create", ("data",))
+    nested["id"] = 6
+    # Containers are copied, so callers can't change the stored body
+    assert store.resolve("create", ("data", "id")) == 5
+    assert store.resolve("create", ("missing",)) is MISSING
+
+    store.put("text", StoredResponse(b"not json"))
+    assert store.resolve("text", ("id",)) is MISSING
+
+
+def test_only_unreferenced_responses_are_evicted_over_the_cap():
+    steps = (
+        compile_step("a", "POST", "/a", {}, {}),
+        compile_step("b", "POST", "/b", {}, {}),
+        compile_step("c", "GET", "/c/{{a.id}}", {}, None),
+    )
+    store = ResponseStore(ScenarioPlan("s", steps, build_dependencies(steps)), max_bytes=10)
+    store.put("a", StoredResponse(b'{"id": 123456}'))
+    store.release(steps[0])
+    store.put("b", StoredResponse(b'{"id": 1}'))
+    store.release(steps[1])
+    # "a" is still needed by "c"; "b" is not, so it goes once the cap is exceeded
+    assert "a" in store and "b" not in store
+
+    store.release(steps[2])
+    assert "a" not in store and store.size == 0
+
+
+def _result(body):
+    return {"response": {"body": body}}
+
+
+def test_a_streaming_store_drops_responses_once_no_step_needs_them():
+    steps = (
+        compile_step("a", "POST", "/a", {}, {}),
+        compile_step("b", "POST", "/b", {}, {}),
+        compile_step("c", "GET", "/c/{{a.id}}", {}, None),
+    )
+    store = ResponseStore(ScenarioPlan("s", steps, build_dependencies(steps)), streaming=True)
+    a_result = _result({"id": 1})
+    store.put("a", StoredResponse(b'{"id": 1}'), a_result)
+    store.release(steps[0])
+    # Nothing references "b", so it isn't kept at all
+    store.put("b", StoredResponse(b'{"id": 2}'), _result({"id": 2}))
+    store.release(steps[1])
+    assert "a" in store and "b" not in store and store.size == 9
+
+    assert store.resolve("a", ("id",)) == 1
+    store.release(steps[2])
+    assert len(store) == 0 and store.size == 0
+    # Results are handed on, not held by the store
+    store.add_result("x", StoredResponse(b'{"id": 3}'), _result({"id": 3}))
+    assert store.size == 0 and a_result["response"]["body"] == {"id": 1}
+
+
+def test_evicting_a_response_replaces_the_body_in_its_result():
+    store = ResponseStore(max_bytes=30)
+    first, second = StoredResponse(b'{"id": 1, "pad": "xx"}'), StoredResponse(b'{"id": 2}')
+    first_result, second_result = _result(first.json()), _result(second.json())
+    # A step with extraction rules keeps only its result, so that goes first
+    extracted = StoredResponse(b'{"items": [1, 2, 3]}')
+    extracted_result = _result(extracted.json())
+
+    store.add_result("extract", extracted, extracted_result)
+    store.put("first", first, first_result)
+    assert extracted_result["response"]["body"]["reference"] == "extract" and "first" in store
+    store.put("second", second, second_result)
+
+    assert "first" not in store and store.size == second.size
+    assert first_result["response"]["body"] == {"reference": "first", "size": 22, "truncated": False,
+                                               "preview": '{"id": 1, "pad": "xx"}'}
+    assert second_result["response"]["body"] == {"id": 2}
+
+def test_captured_bodies_spill_to_disk_and_are_truncated_at_the_cap():
+    body = b'{"items": [' + b",".join(b'{"id": %d}' % i for i in range(1000)) + b"]}"
+    chunks = [body[i:i + 100] for i in range(0, len(body), 100)]
+
+    small = StoredResponse.capture(chunks, max_memory=len(body), max_bytes=0)
+    assert not small.spilled and small.raw.tobytes() == body
+
+    spilled = StoredResponse.capture(iter(chunks), max_memory=1000, max_bytes=0)
+    assert spilled.spilled and spilled.size == len(body)
+    assert spilled.preview(11) == '{"items": ['
+    store = ResponseStore()
+    store.put("list", spilled)
+    # Later steps still extract values from spilled bodies
+    assert store.resolve("list", ("items", "999", "id")) == 999
+    store.close()
+    assert len(store) == 0
+
+    truncated = StoredResponse.capture(chunks, max_memory=1000, max_bytes=2500)
+    assert truncated.truncated and truncated.size == 2500
+    assert truncated.preview(9) == '{"items":'
+    try:
+        truncated.json()
+        assert False, "truncated bodies can't be decoded"
+    except ValueError:
+        pass
+
+
+def test_executed_requests_close_bodies_the_store_did_not_take(monkeypatch):
+    closed = []
+    close = StoredResponse.close
+    monkeypatch.setattr(StoredResponse, "close", lambda stored: closed.append(stored) or close(stored))
+    monkeypatch.setattr(TestScenario, "_check_assertions", Mock(side_effect=RuntimeError("assertion error")))
+
+    with MockGateway(port=0, seed=1) as gateway:
+        monkeypatch.setitem(envs, "mock", Env(clientId="mock", clientSecret="secret", urlKeycloak=gateway.url,
+                                              realm="dgate", envUrl=gateway.url, username="mock", password="secret"))
+        with Config.selected("mock"):
+            # Without extraction rules, nothing else would close the body
+            APIRequest(name="create", method="POST", url=f"{gateway.url}/api-specs", body={"name": "a"}).execute({})
+            assert len(closed) == 1
+            # The assertions raise before the response is handed to the store
+            scenario = TestScenario("s", "id_s", "", "1.0.0", "", "",
+                                    [{"name": "b", "method": "GET", "url": "api-specs"}])
+            assert scenario.execute()[0]["status"]["code"] == 200
+            assert len(closed) == 2
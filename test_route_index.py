@@ -0,0 +1,19 @@
+# test_route_index.py
+from validation.route_index import RouteIndex, closest_endpoint_key, resolve_endpoint_key
+
+
+def test_rightmost_route_wins_and_params_match_any_segment():
+    index = RouteIndex(["api-specs", "plans", "products/{id}/subscriptions"])
+    assert index.match("http://localhost:8099/api/v1/api-specs") == "api-specs"
+    assert index.match("/api-specs/12/plans/3") == "plans"
+    assert index.match("/Products/7/Subscriptions") == "products/{id}/subscriptions"
+    assert index.match("/consumers/7/subscriptions") is None
+    assert index.match("/unknown") is None
+
+
+def test_validator_keys_resolve_like_the_factory():
+    assert resolve_endpoint_key("/products/5/plans") == "plans"
+    assert resolve_endpoint_key("relative/path") is None
+    # Full URLs contain an empty segment, which the factory maps to the default validator
+    assert resolve_endpoint_key("http://host/unknown") == "default"
+    assert closest_endpoint_key("api-spec") == "api-specs"
@@ -0,0 +1,105 @@
+# test_run_repository.py
+import hashlib
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models import ScenarioRun, StepRun
+from repositories import run_repository
+from repositories.run_repository import RunHistoryWriter, RunRecord
+from scenario.response_store import StoredResponse
+
+
+def _result(name, text, total, body=None):
+    return {
+        "name": name,
+        "status": {"code": 200 if text == "SUCCESS" else 500, "text": text},
+        "request": {"method": "GET"},
+        "response": {"body": body},
+        "timings": {"total": total},
+    }
+
+
+def test_runs_are_written_in_batches_and_aggregated_per_step():
+    # One shared connection, so the writer thread sees the same in-memory database
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Session = sessionmaker(bind=engine)
+    writer = RunHistoryWriter(session_factory=Session, batch_size=10, flush_interval=0.05)
+
+    day = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for offset, login in ((0, "SUCCESS"), (0, "FAILED"), (1, "SUCCESS")):
+        results = [_result("login", login, 10.0 + offset), _result("list", "SUCCESS", 5.0, {"items": ["x" * 2000]})]
+        assert writer.submit(RunRecord("flow", "dev", day + timedelta(days=offset), 20.0, results))
+    assert writer.flush(timeout=5)
+
+    db = Session()
+    assert db.query(ScenarioRun).count() == 3
+    step = db.query(StepRun).filter(StepRun.name == "list").first()
+    assert len(step.body_hash) == 64 and len(step.body_preview) == run_repository.RUN_HISTORY_BODY_PREVIEW
+
+    runs = run_repository.list_runs(db, "flow")
+    assert [run.status for run in runs] == ["success", "failed", "success"]
+    assert [step.name for step in runs[1].steps] == ["login", "list"]
+
+    rates = run_repository.get_step_failure_rates(db, "flow", "dev")
+    assert [(rate["name"], rate["runs"], rate["failed"]) for rate in rates] == [("login", 3, 1), ("list", 3, 0)]
+
+    trends = run_repository.get_step_trends(db, "flow", since=day)
+    assert [(point["bucket"], point["runs"], point["failureRate"]) for point in trends["login"]] == \
+        [("2026-01-01", 2, 0.5), ("2026-01-02", 1, 0.0)]
+    assert trends["login"][1]["latencyMs"]["max"] == 11.0
+    db.close()
+
+
+def test_referenced_bodies_keep_the_hash_taken_while_capturing():
+    first, second = StoredResponse.capture([b'{"a": "' + b"x" * 600, b'1"}']), \
+        StoredResponse.capture([b'{"a": "' + b"x" * 600, b'2"}'])
+    results = []
+    for stored in (first, second):
+        result = _result("big", "SUCCESS", 1.0, stored.reference("big"))
+        result["response"]["bodyHash"] = stored.sha256
+        results.append(result)
+
+    run = run_repository._run_model(RunRecord("flow", "dev", datetime.now(timezone.utc), 2.0, results))
+
+    assert first.sha256 == hashlib.sha256(first.raw).hexdigest()
+    # Same preview, different bodies
+    assert run.steps[0].body_preview == run.steps[1].body_preview == first.preview()
+    assert run.steps[0].body_hash == first.sha256 != run.steps[1].body_hash
+
+
+def test_history_results_keep_what_the_run_history_stores():
+    results = [_result("list", "SUCCESS", 5.0, {"items": ["x" * 2000]}), _result("empty", "FAILED", 1.0)]
+    started_at = datetime.now(timezone.utc)
+
+    full = run_repository._run_model(RunRecord("flow", "dev", started_at, 6.0, results))
+    reduced = run_repository._run_model(RunRecord("flow", "dev", started_at, 6.0,
+                                                  [run_repository.history_result(result) for result in results]))
+
+    columns = ("name", "method", "status_code", "result", "total_ms", "body_hash", "body_preview")
+    assert [[getattr(step, column) for column in columns] for step in reduced.steps] == \
+        [[getattr(step, column) for column in columns] for step in full.steps]
+    assert reduced.status == full.status == "failed"
+
+
+@pytest.mark.skipif(not hasattr(os, "fork") or sys.platform == "darwin", reason="needs the fork start method")
+def test_a_forked_writer_writes_its_records_after_a_reset(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'runs.db'}")
+    writer = RunHistoryWriter(session_factory=sessionmaker(bind=engine), flush_interval=0.01)
+    record = RunRecord("flow", "dev", datetime.now(timezone.utc), 1.0, [_result("login", "SUCCESS", 1.0)])
+    # The parent's writer thread is running when the worker is forked
+    assert writer.submit(record) and writer.flush(timeout=5)
+
+    pid = os.fork()
+    if pid == 0:
+        writer.reset()
+        written = writer.submit(record) and writer.flush(timeout=5)
+        # Like a pool worker, exit without running atexit hooks
+        os._exit(0 if written else 1)
+    assert os.waitpid(pid, 0)[1] == 0
+    assert sessionmaker(bind=engine)().query(ScenarioRun).count() == 2
@@ -0,0 +1,52 @@
+# test_scenario_repository.py
+import os
+
+from repositories.scenario_repository import ScenarioRepository
+
+SCENARIO_YAML = """name: {name}
+id: id_1
+description: test
+version: 1.0.0
+created_at: '2024-01-01'
+updated_at: '2024-01-01'
+requests:
+- name: get-api
+  method: GET
+  url: /apis
+"""
+
+
+def test_scenarios_are_cached_until_the_file_changes(tmp_path):
+    path = str(tmp_path / "flow.yaml")
+    with open(path, "w") as file:
+        file.write(SCENARIO_YAML.format(name="flow"))
+
+    repository = ScenarioRepository(stat_interval=0)
+    first = repository.get(path)
+    assert repository.get(path) is first
+    assert first.compile().steps[0].name == "get-api"
+    assert repository.list_names(str(tmp_path)) == ["flow"]
+
+    with open(path, "w") as file:
+        file.write(SCENARIO_YAML.format(name="renamed-flow"))
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+    assert repository.get(path).name == "renamed-flow"
+
+    os.remove(path)
+    os.utime(tmp_path, ns=(0, os.stat(tmp_path).st_mtime_ns + 1_000_000))
+    assert not repository.exists(path)
+    assert repository.list_names(str(tmp_path)) == []
+
+
+def test_stat_checks_are_throttled(tmp_path):
+    path = str(tmp_path / "flow.yaml")
+    with open(path, "w") as file:
+        file.write(SCENARIO_YAML.format(name="flow"))
+
+    repository = ScenarioRepository(stat_interval=3600)
+    first = repository.get(path)
+    os.remove(path)
+    # Within the interval the cached scenario is served without looking at the disk
+    assert repository.get(path) is first
+    repository.invalidate(path)
+    assert not repository.exists(path)
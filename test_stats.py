@@ -0,0 +1,35 @@
+# test_stats.py
+from util.stats import LatencyHistogram
+
+
+def test_summary_reports_nearest_rank_percentiles_and_buckets():
+    histogram = LatencyHistogram()
+    for value in range(1, 101):
+        histogram.add(float(value))
+    histogram.add(None)
+
+    summary = histogram.summary()
+
+    assert summary["count"] == 100
+    assert (summary["p50"], summary["p90"], summary["p99"]) == (50.0, 90.0, 99.0)
+    assert summary["buckets"]["<=1"] == 1
+    assert summary["buckets"]["<=100"] == 50
+    assert sum(summary["buckets"].values()) == 100
+
+
+def test_empty_histogram():
+    assert LatencyHistogram().summary() == {"count": 0}
+
+
+def test_samples_are_capped_but_counts_stay_exact():
+    histogram = LatencyHistogram(reservoir_size=100)
+    for value in range(1, 10001):
+        histogram.add(float(value))
+
+    summary = histogram.summary()
+
+    assert len(histogram.samples) == 100
+    assert (summary["count"], summary["min"], summary["max"], summary["mean"]) == (10000, 1.0, 10000.0, 5000.5)
+    assert summary["buckets"][">10000"] == 0 and sum(summary["buckets"].values()) == 10000
+    # The percentiles come from a uniform sample of all values
+    assert 3000 < summary["p50"] < 7000
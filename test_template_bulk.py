@@ -0,0 +1,110 @@
+# test_template_bulk.py
+import json
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import Base
+from init_db import migrate_templates
+from models import Template
+from repositories import template_repository
+
+
+def _session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def test_bulk_upsert_inserts_updates_and_streams():
+    db = _session()
+    templates = [{"name": f"t{i}", "endpoint_type": "Consumers", "body": {"i": i}} for i in range(1200)]
+    assert template_repository.bulk_upsert_templates(db, templates) == 1200
+
+    templates[0]["body"] = {"i": "updated"}
+    templates.append({"name": "t1", "endpoint_type": "plans", "body": {}})
+    assert template_repository.bulk_upsert_templates(db, templates[:2] + templates[-1:]) == 3
+
+    assert db.query(Template).count() == 1201
+    exported = list(template_repository.iter_templates(db, "CONSUMERS", batch_size=100))
+    assert len(exported) == 1200
+    assert exported[0].body == {"i": "updated"}
+    name, endpoint_type, body = next(template_repository.iter_raw_templates(db, "consumers"))
+    assert (name, endpoint_type, json.loads(body)) == ("t0", "consumers", {"i": "updated"})
+    db.close()
+
+
+def test_cached_reads_are_invalidated_on_write():
+    db = _session()
+    template_repository.template_cache.invalidate()
+    template_repository.create_template(db, "a", "plans", {"v": 1})
+    first = template_repository.get_raw_template_bodies_by_type(db, "Plans")
+    assert [(name, json.loads(body)) for name, body in first] == [("a", {"v": 1})]
+    assert template_repository.get_raw_template_bodies_by_type(db, "plans") is first
+    rows = template_repository.get_templates_by_type(db, "plans")
+    assert [(row.name, row.body) for row in rows] == [("a", {"v": 1})]
+    assert template_repository.get_templates_by_type(db, "PLANS")[0] is rows[0]
+
+    template_repository.update_template(db, "a", "plans", {"v": 2})
+    assert json.loads(template_repository.get_raw_template_bodies_by_type(db, "plans")[0][1]) == {"v": 2}
+    assert template_repository.get_templates_by_type(db, "plans")[0].body == {"v": 2}
+    template_repository.bulk_upsert_templates(db, [{"name": "b", "endpoint_type": "plans", "body": {}}])
+    assert len(template_repository.get_raw_template_bodies_by_type(db, "plans")) == 2
+    template_repository.delete_template(db, "a", "plans")
+    assert len(template_repository.get_raw_template_bodies_by_type(db, "plans")) == 1
+    db.close()
+
+
+def test_reads_started_before_an_invalidation_are_not_cached():
+    cache = template_repository.TemplateCache()
+    generation = cache.generation
+    # A write lands while the read is still in flight
+    cache.invalidate("plans")
+
+    assert not cache.put("plans", [("a", "{}")], generation)
+    assert cache.get("plans") is None
+    assert cache.put("plans", [("a", "{}")], cache.generation)
+    assert cache.get("plans") == [("a", "{}")]
+
+
+def test_duplicates_block_the_unique_index_unless_removal_is_requested():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as connection:
+        # A templates table created before the unique index existed
+        connection.execute(text("CREATE TABLE templates (id INTEGER PRIMARY KEY, name VARCHAR(255), "
+                                "endpoint_type VARCHAR(100), body JSON, created_at DATETIME, updated_at DATETIME)"))
+        connection.execute(text("INSERT INTO templates (name, endpoint_type, body) VALUES "
+                                "('a', 'plans', '{\"v\": 1}'), ('a', 'plans', '{\"v\": 2}'), ('b', 'plans', '{}')"))
+
+    assert not migrate_templates(bind=engine)
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT COUNT(*) FROM templates")).scalar() == 3
+    assert "uq_templates_name_endpoint_type" not in {index["name"] for index in inspect(engine).get_indexes("templates")}
+
+    assert migrate_templates(remove_duplicates=True, bind=engine)
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT name, body FROM templates ORDER BY name")).all()
+    assert [(name, json.loads(body)) for name, body in rows] == [("a", {"v": 2}), ("b", {})]
+    assert "uq_templates_name_endpoint_type" in {index["name"] for index in inspect(engine).get_indexes("templates")}
+
+
+def test_string_bodies_are_only_decoded_when_marked_encoded():
+    db = _session()
+    template_repository.bulk_upsert_templates(db, [
+        {"name": "text", "endpoint_type": "plans", "body": "plain text"},
+        {"name": "json", "endpoint_type": "plans", "body": '{"v": 1}', "encoded": True},
+    ])
+    assert template_repository.get_template_by_name_and_type(db, "text", "plans").body == "plain text"
+    assert template_repository.get_template_by_name_and_type(db, "json", "plans").body == {"v": 1}
+
+    template_repository.update_template(db, "json", "plans", '"quoted"')
+    assert template_repository.get_template_by_name_and_type(db, "json", "plans").body == '"quoted"'
+    with pytest.raises(ValueError):
+        template_repository.update_template(db, "json", "plans", "not json", encoded=True)
+    db.rollback()
+    with pytest.raises(ValueError):
+        template_repository.bulk_upsert_templates(db, [{"name": "x", "endpoint_type": "plans", "body": "{",
+                                                        "encoded": True}])
+    db.close()
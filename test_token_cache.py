@@ -0,0 +1,65 @@
+# test_token_cache.py
+import threading
+import time
+
+from config import token_generator
+from config.envModel import Env
+from config.token_generator import TokenCache
+
+
+def _env():
+    return Env("client", "secret", "http://keycloak", "realm", "http://backend", "user", "pass")
+
+
+def test_token_is_cached_until_expiry(monkeypatch):
+    calls = []
+
+    def fake_fetch(env):
+        calls.append("password")
+        return {"access_token": f"token{len(calls)}", "expires_in": 300,
+                "refresh_token": "refresh", "refresh_expires_in": 1800}
+
+    monkeypatch.setattr(token_generator, "fetch_keycloak_token", fake_fetch)
+    cache = TokenCache(margin=30)
+
+    assert cache.get_token(_env()) == "token1"
+    assert cache.get_token(_env()) == "token1"
+    assert calls == ["password"]
+
+
+def test_expiring_token_uses_refresh_grant(monkeypatch):
+    calls = []
+    monkeypatch.setattr(token_generator, "fetch_keycloak_token",
+                        lambda env: calls.append("password") or
+                        {"access_token": "old", "expires_in": 10,
+                         "refresh_token": "refresh", "refresh_expires_in": 1800})
+    monkeypatch.setattr(token_generator, "refresh_keycloak_token",
+                        lambda env, refresh_token: calls.append(refresh_token) or
+                        {"access_token": "new", "expires_in": 300})
+    # A margin larger than expires_in makes the first token immediately due for renewal
+    cache = TokenCache(margin=30)
+
+    assert cache.get_token(_env()) == "old"
+    assert cache.get_token(_env()) == "new"
+    assert calls == ["password", "refresh"]
+
+
+def test_concurrent_callers_share_one_fetch(monkeypatch):
+    calls = []
+
+    def slow_fetch(env):
+        calls.append("password")
+        time.sleep(0.05)
+        return {"access_token": "shared", "expires_in": 300}
+
+    monkeypatch.setattr(token_generator, "fetch_keycloak_token", slow_fetch)
+    cache = TokenCache(margin=30)
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(cache.get_token(_env()))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert tokens == ["shared"] * 8
+    assert calls == ["password"]
@@ -0,0 +1,366 @@
+import asyncio
+import socket
+import threading
+import time
+import weakref
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from config.settings import (HTTP_POOL_SIZE, HTTP_ASYNC_POOL_SIZE, HTTP_KEEP_ALIVE, HTTP_MAX_RETRIES,
+                             HTTP_BACKOFF_FACTOR, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+
+class RequestTimings:
+    """
+    Network phase timings of one transport call, in milliseconds.
+
+    dns, connect and tls stay 0 when a pooled connection was reused; ttfb runs from
+    sending the request to receiving the response headers and total covers the whole
+    call including retries and reading the body.
+    """
+
+    PHASES = ("dns", "connect", "tls", "ttfb", "total")
+
+    def __init__(self):
+        self.dns = 0.0
+        self.connect = 0.0
+        self.tls = 0.0
+        self.ttfb = 0.0
+        self.total = 0.0
+        self._sent_at: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, float]:
+        return {phase: round(getattr(self, phase), 3) for phase in self.PHASES}
+
+
+_local = threading.local()
+
+
+def _current_timings() -> Optional[RequestTimings]:
+    return getattr(_local, "timings", None)
+
+
+def _elapsed_ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+
+class _TimedConnectionMixin:
+    """Records DNS, TCP connect, TLS and time-to-first-byte into the calling thread's RequestTimings."""
+
+    def _new_conn(self):
+        timings = _current_timings()
+        if timings is None:
+            return super()._new_conn()
+
+        started = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)
+        except OSError:
+            # Let urllib3 raise its usual NameResolutionError
+            return super()._new_conn()
+        timings.dns += _elapsed_ms(started)
+
+        # Connect to the resolved addresses in turn, as urllib3 would, so the DNS lookup isn't repeated
+        # inside the connect time; TLS SNI and certificate checks still use self.host
+        dns_host = self._dns_host
+        started = time.perf_counter()
+        error = None
+        try:
+            for address in dict.fromkeys(info[4][0] for info in addresses):
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except Exception as e:
+                    error = e
+            if error is None:
+                # As urllib3's create_connection does
+                raise socket.error("getaddrinfo returns an empty list")
+            raise error
+        finally:
+            self._dns_host = dns_host
+            timings.connect += _elapsed_ms(started)
+
+    def connect(self):
+        timings = _current_timings()
+        if timings is None:
+            return super().connect()
+
+        dns, tcp = timings.dns, timings.connect
+        started = time.perf_counter()
+        super().connect()
+        # Whatever connect() spent beyond DNS and the TCP handshake is the TLS handshake
+        handshake = _elapsed_ms(started) - (timings.dns - dns) - (timings.connect - tcp)
+        if isinstance(self, HTTPSConnection):
+            timings.tls += max(handshake, 0.0)
+
+    def request(self, *args, **kwargs):
+        timings = _current_timings()
+        if timings is not None:
+            timings._sent_at = time.perf_counter()
+        return super().request(*args, **kwargs)
+
+    def getresponse(self, *args, **kwargs):
+        response = super().getresponse(*args, **kwargs)
+        timings = _current_timings()
+        if timings is not None and timings._sent_at is not None:
+            timings.ttfb += _elapsed_ms(timings._sent_at)
+            timings._sent_at = None
+        return response
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+class _AsyncTraceRecorder:
+    """httpcore trace callback filling RequestTimings; httpcore reports DNS as part of connect."""
+
+    def __init__(self, timings: RequestTimings):
+        self.timings = timings
+        self.started: Dict[str, float] = {}
+
+    async def __call__(self, event_name: str, info: Dict[str, Any]):
+        prefix, _, stage = event_name.rpartition(".")
+        if stage == "started":
+            self.started[prefix] = time.perf_counter()
+            return
+        if stage != "complete" or prefix not in self.started:
+            return
+        started = self.started.pop(prefix)
+        if prefix.endswith("connect_tcp"):
+            self.timings.connect += _elapsed_ms(started)
+        elif prefix.endswith("start_tls"):
+            self.timings.tls += _elapsed_ms(started)
+        elif prefix.endswith("send_request_headers"):
+            self.timings._sent_at = started
+        elif prefix.endswith("receive_response_headers") and self.timings._sent_at is not None:
+            self.timings.ttfb += _elapsed_ms(self.timings._sent_at)
+            self.timings._sent_at = None
+
+
+class HttpTransport:
+    """
+    Pooled HTTP transport shared by scenario requests and token fetches.
+
+    Keeps one ``requests.Session`` per origin (scheme, host and port), so every
+    environment's backend and Keycloak each get their own keep-alive connection
+    pool. Idempotent requests are retried with exponential backoff on connection
+    errors and gateway failures, and every request gets a default timeout. Each
+    response carries the RequestTimings of its call as ``response.timings``.
+    """
+
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, keep_alive: bool = HTTP_KEEP_ALIVE,
+                 max_retries: int = HTTP_MAX_RETRIES, backoff_factor: float = HTTP_BACKOFF_FACTOR,
+                 connect_timeout: float = HTTP_CONNECT_TIMEOUT, read_timeout: float = HTTP_READ_TIMEOUT):
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = (connect_timeout, read_timeout)
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    def _create_session(self) -> requests.Session:
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=(502, 503, 504),
+            # Only idempotent methods are retried so a POST is never sent twice
+            allowed_methods=frozenset(["GET", "HEAD", "PUT", "DELETE", "OPTIONS"]),
+            raise_on_status=False,
+        )
+        adapter = _TimedHTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
+    def session_for(self, url: str) -> requests.Session:
+        """Return the pooled session for the origin of url, creating it on first use."""
+        origin = self._origin(url)
+        session = self._sessions.get(origin)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(origin)
+                if session is None:
+                    session = self._sessions[origin] = self._create_session()
+        return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        session = self.session_for(url)
+        timings = _local.timings = RequestTimings()
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        finally:
+            _local.timings = None
+        timings.total = _elapsed_ms(started)
+        response.timings = timings
+        return response
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Report per-origin request and connection counts and the resulting connection reuse ratio."""
+        report = {}
+        for origin, session in list(self._sessions.items()):
+            num_requests = 0
+            num_connections = 0
+            for adapter in set(session.adapters.values()):
+                for key in list(adapter.poolmanager.pools.keys()):
+                    pool = adapter.poolmanager.pools.get(key)
+                    if pool is None:
+                        continue
+                    num_requests += pool.num_requests
+                    num_connections += pool.num_connections
+            reused = max(num_requests - num_connections, 0)
+            report[origin] = {
+                "requests": num_requests,
+                "connectionsOpened": num_connections,
+                "connectionsReused": reused,
+                "reuseRatio": round(reused / num_requests, 4) if num_requests else 0.0,
+            }
+        return report
+
+    def close(self) -> None:
+        """Close every pooled session; the next request opens fresh ones."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+
+class _LoopClients:
+    """
+    The clients of one event loop. They are closed when the loop shuts down its async
+    generators, as asyncio.run (and so uvicorn and anyio) does before closing the loop.
+    """
+
+    def __init__(self):
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self._closer = None
+
+    async def watch(self) -> None:
+        """Start the async generator whose shutdown closes the clients; call on the loop."""
+        if self._closer is None:
+            self._closer = self._close_on_shutdown()
+            await self._closer.__anext__()
+
+    async def _close_on_shutdown(self):
+        try:
+            yield
+        finally:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        clients, self.clients = self.clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+class AsyncHttpTransport:
+    """
+    Asyncio counterpart of HttpTransport built on ``httpx.AsyncClient``.
+
+    Keeps one client per origin with a bounded keep-alive pool. httpx clients are
+    tied to the event loop they were first used on, so each loop gets its own
+    clients; they are closed when their loop shuts down (see _LoopClients) and
+    forgotten once it is garbage collected.
+    """
+
+    def __init__(self, pool_size: int = HTTP_ASYNC_POOL_SIZE, keep_alive: bool = HTTP_KEEP_ALIVE,
+                 max_retries: int = HTTP_MAX_RETRIES, connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+                 read_timeout: float = HTTP_READ_TIMEOUT):
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.max_retries = max_retries
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopClients]" = \
+            weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _create_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(max_connections=self.pool_size,
+                              max_keepalive_connections=self.pool_size if self.keep_alive else 0)
+        # httpx only retries failed connection attempts, which are always safe to repeat
+        transport = httpx.AsyncHTTPTransport(limits=limits, retries=self.max_retries)
+        return httpx.AsyncClient(transport=transport, timeout=self.timeout)
+
+    def _loop_clients(self) -> _LoopClients:
+        loop = asyncio.get_running_loop()
+        loop_clients = self._loops.get(loop)
+        if loop_clients is None:
+            with self._lock:
+                loop_clients = self._loops.get(loop)
+                if loop_clients is None:
+                    loop_clients = self._loops[loop] = _LoopClients()
+        return loop_clients
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        clients = self._loop_clients().clients
+        origin = HttpTransport._origin(url)
+        client = clients.get(origin)
+        if client is None:
+            client = clients[origin] = self._create_client()
+        return client
+
+    async def request(self, method: str, url: str, stream: bool = False, **kwargs) -> httpx.Response:
+        """
+        Send a request; with stream=True (as for requests) only the headers are read, and the
+        caller reads the body (aiter_bytes) and closes the response (aclose).
+        """
+        timings = RequestTimings()
+        kwargs.setdefault("extensions", {})["trace"] = _AsyncTraceRecorder(timings)
+        started = time.perf_counter()
+        await self._loop_clients().watch()
+        client = self.client_for(url)
+        if stream:
+            response = await client.send(client.build_request(method, url, **kwargs), stream=True)
+        else:
+            response = await client.request(method, url, **kwargs)
+        timings.total = _elapsed_ms(started)
+        response.timings = timings
+        return response
+
+    async def close(self) -> None:
+        """Close the running loop's clients; the next request opens fresh ones."""
+        await self._loop_clients().aclose()
+
+
+# Shared transports used by APIRequest and the Keycloak token fetch
+http_transport = HttpTransport()
+async_http_transport = AsyncHttpTransport()
@@ -0,0 +1,74 @@
+import math
+import random
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+from config.settings import LATENCY_RESERVOIR_SIZE
+
+
+# Upper bounds (ms) of the histogram buckets reported alongside the percentiles
+BUCKET_BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """
+    Collects latency samples (in milliseconds) and reports percentile summaries and bucket counts.
+
+    Count, min, mean, max and the bucket counts are exact. Percentiles come from the samples,
+    of which at most reservoir_size are kept: past that, a uniform random sample of all values
+    (reservoir sampling), so a histogram's memory doesn't grow with the length of a run.
+    """
+
+    def __init__(self, reservoir_size: int = LATENCY_RESERVOIR_SIZE):
+        self.reservoir_size = max(1, reservoir_size)
+        self.samples: List[float] = []
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.bucket_counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self._rng = random.Random()
+
+    def add(self, value: Optional[float]) -> None:
+        if value is None:
+            return
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.bucket_counts[bisect_left(BUCKET_BOUNDS_MS, value)] += 1
+        if len(self.samples) < self.reservoir_size:
+            self.samples.append(value)
+        else:
+            slot = self._rng.randrange(self.count)
+            if slot < self.reservoir_size:
+                self.samples[slot] = value
+
+    def __len__(self) -> int:
+        return self.count
+
+    @staticmethod
+    def _percentile(ordered: List[float], percent: float) -> float:
+        # Nearest-rank percentile, so every reported value is an observed sample
+        rank = max(1, math.ceil(percent / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+    def summary(self) -> Dict[str, float]:
+        if not self.count:
+            return {"count": 0}
+        ordered = sorted(self.samples)
+        return {
+            "count": self.count,
+            "min": round(self.min, 3),
+            "mean": round(self.total / self.count, 3),
+            "p50": round(self._percentile(ordered, 50), 3),
+            "p90": round(self._percentile(ordered, 90), 3),
+            "p99": round(self._percentile(ordered, 99), 3),
+            "max": round(self.max, 3),
+            "buckets": self._buckets(),
+        }
+
+    def _buckets(self) -> Dict[str, int]:
+        buckets = {f"<={bound}": count for bound, count in zip(BUCKET_BOUNDS_MS, self.bucket_counts)}
+        buckets[f">{BUCKET_BOUNDS_MS[-1]}"] = self.bucket_counts[-1]
+        return buckets
@@ -1,11 +1,21 @@
-from config.token_generator import get_keycloak_token  
+from config.token_generator import token_cache
 from config.envModel import Env
 
 def generate_token(env: Env) -> str:
     if not env:
         raise ValueError(f"Environment '{env}' not found.")
     
-    token = get_keycloak_token(env)
+    token = token_cache.get_token(env)
     if not token:
         raise ValueError("Failed to retrieve token.")
-    return token
\ No newline at end of file
+    return token
+
+
+async def generate_token_async(env: Env) -> str:
+    if not env:
+        raise ValueError(f"Environment '{env}' not found.")
+
+    token = await token_cache.get_token_async(env)
+    if not token:
+        raise ValueError("Failed to retrieve token.")
+    return token
@@ -3,6 +3,9 @@ from typing import Any, Type
 import os
 import difflib
 
+# The libyaml bindings parse several times faster than the pure-Python loader
+_SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 def object_to_yaml_file(obj: Any, file_path: str) -> None:
     try:
         data = obj.to_dict() if hasattr(obj, "to_dict") else obj
@@ -14,7 +17,7 @@ def object_to_yaml_file(obj: Any, file_path: str) -> None:
 def yaml_file_to_object(file_path: str, obj_type: Type) -> Any:
     try:
         with open(file_path, 'r') as file:
-            data = yaml.safe_load(file)
+            data = yaml.load(file, Loader=_SafeLoader)
             return obj_type.from_dict(data) if hasattr(obj_type, "from_dict") else obj_type(**data)
     except yaml.YAMLError as e:
         raise ValueError(f"Error converting YAML file to object: {e}")
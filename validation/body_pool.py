@@ -0,0 +1,139 @@
+"""
+Pools of pre-generated sample bodies for the validators in ValidatorFactory.
+
+Building a body with get_valid_body() takes a fresh set of random draws and
+string formatting every time, which shows up as CPU under load tests. Each
+validator gets a pool of ready-made bodies instead; a background thread tops
+the pools up whenever they run low. With BODY_POOL_SEED set, bodies are
+generated from a fixed seed, so they're deterministic: each validator's body is
+generated once and handed out as copies.
+
+Validators draw from rng. Seeded generation gives the generating thread a
+random.Random of its own, so it never needs a lock or touches other threads'
+draws; unseeded draws go to the random module and ids are uuid4s, so forked
+workers can't generate the same ids.
+"""
+import copy
+import queue
+import random
+import threading
+import uuid
+from collections import deque
+from typing import Any, Dict, Optional
+
+from config.settings import BODY_POOL_SIZE, BODY_POOL_SEED
+
+class _BodyRandom(threading.local):
+    """The random module, or on a thread generating a seeded body, that body's random.Random."""
+
+    seeded: Optional[random.Random] = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.seeded or random, name)
+
+    def uuid4(self) -> uuid.UUID:
+        if self.seeded is None:
+            return uuid.uuid4()
+        return uuid.UUID(int=self.seeded.getrandbits(128), version=4)
+
+
+# Source of randomness for all generated bodies (see endpoint_validations)
+rng = _BodyRandom()
+
+
+class BodyPool:
+    """Sample bodies of one validator; every body handed out by get() belongs to the caller."""
+
+    def __init__(self, validator: Any, size: int = BODY_POOL_SIZE, seed: Optional[int] = BODY_POOL_SEED):
+        self.validator = validator
+        self.size = max(0, size)
+        self.seed = seed
+        self._bodies: deque = deque()
+        self._refill_pending = False
+        self._seeded_body: Any = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        if self.seed is not None:
+            return copy.deepcopy(self._get_seeded_body())
+
+        try:
+            body = self._bodies.popleft()
+        except IndexError:
+            body = generate_body(self.validator)
+        if len(self._bodies) <= self.size // 2 and self.size:
+            self._request_refill()
+        return body
+
+    def fill(self) -> None:
+        """Top the pool up to its size; runs on the refill thread."""
+        try:
+            while len(self._bodies) < self.size:
+                self._bodies.append(generate_body(self.validator))
+        finally:
+            self._refill_pending = False
+
+    def _request_refill(self) -> None:
+        with self._lock:
+            if self._refill_pending:
+                return
+            self._refill_pending = True
+        _refiller.request(self)
+
+    def _get_seeded_body(self) -> Any:
+        if self._seeded_body is None:
+            self._seeded_body = generate_body(self.validator, self.seed)
+        return self._seeded_body
+
+
+class _Refiller:
+    """A single daemon thread that fills the pools queued by BodyPool.get()."""
+
+    def __init__(self):
+        self._queue: "queue.Queue[BodyPool]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def request(self, pool: BodyPool) -> None:
+        self._queue.put(pool)
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="body-pool-refill", daemon=True)
+                    self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            pool = self._queue.get()
+            try:
+                pool.fill()
+            except Exception as e:
+                print(f"Warning: Failed to refill the sample body pool of {pool.validator}: {e}")
+
+
+def generate_body(validator: Any, seed: Optional[int] = None) -> Any:
+    """
+    Generate a new body with the validator. With a seed, the body only depends on the
+    seed and the validator, and the draws of other threads are left alone.
+    """
+    if seed is None:
+        return validator.get_valid_body()
+    rng.seeded = random.Random(f"{seed}:{getattr(validator, '__name__', validator)}")
+    try:
+        return validator.get_valid_body()
+    finally:
+        rng.seeded = None
+
+
+_refiller = _Refiller()
+_pools: Dict[Any, BodyPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_sample_body(validator: Any) -> Any:
+    """A valid sample body for the validator (a ValidatorFactory class), taken from its pool."""
+    pool = _pools.get(validator)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(validator, BodyPool(validator))
+    return pool.get()
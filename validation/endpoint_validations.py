@@ -1,11 +1,11 @@
 """
 Endpoint validation rules based on ModelFactory
 """
-import uuid
-import random
 import string
 from enum import Enum
 from typing import Dict, List, Any, Optional
+from validation.body_pool import get_sample_body, rng as _rng
+from validation.route_index import resolve_endpoint_key
 # from datetime import datetime, timedelta # Not currently used, can be removed if not needed
 
 
@@ -78,23 +78,13 @@ def manipulate_and_create_random_data(body: Any, apiPath: str) -> Any:
     # Example: "http://localhost:8099/api/v1/api-specs" -> "api-specs"
     # Example: "/consumers" -> "consumers"
     if isinstance(apiPath, str):
-        path_segments = apiPath.strip("/").split("/")
-        # Try to find a known validator key by looking from the end of the path
-        # This handles cases like /api/v1/endpoint_key or /endpoint_key
-        api_key_for_validator = None
-        for i in range(len(path_segments) -1, -1, -1):
-            potential_key = path_segments[i].lower()
-            if ValidatorFactory.get_validator(potential_key):
-                api_key_for_validator = potential_key
-                break
-        if not api_key_for_validator and path_segments: # Fallback to last segment if specific not found
-            api_key_for_validator = path_segments[-1].lower()
-        elif not path_segments: # Handle empty or root path
-            api_key_for_validator = "default" # Or some other default key
+        # Find the known validator key closest to the end of the path (see route_index)
+        # This handles cases like /api/v1/endpoint_key, /endpoint_key or /endpoint_key/{id}
+        api_key_for_validator = resolve_endpoint_key(apiPath)
     else:
         raise ValueError("apiPath must be a string.")
 
-    validator = ValidatorFactory.get_validator(api_key_for_validator)
+    validator = ValidatorFactory.get_validator(api_key_for_validator) if api_key_for_validator else None
 
     if not validator or not hasattr(validator, 'get_valid_body'):
         # If no specific validator, it's hard to guess, so return body as is or raise error
@@ -104,7 +94,7 @@ def manipulate_and_create_random_data(body: Any, apiPath: str) -> Any:
 
 
     # Generate a sample valid body structure using the validator
-    random_data_template = validator.get_valid_body()
+    random_data_template = get_sample_body(validator)
 
     # Helper function to recursively merge/fill data
     def fill_missing_fields(target_data, template_data):
@@ -177,7 +167,7 @@ class EndpointValidations:
 
     @staticmethod
     def generate_random_string(length: int = 12, prefix: str = "") -> str:
-        random_part = str(uuid.uuid4()).replace("-", "")[:length - len(prefix)]
+        random_part = _rng.uuid4().hex[:length - len(prefix)]
         return f"{prefix}{random_part}"
 
     @staticmethod
@@ -186,11 +176,11 @@ class EndpointValidations:
 
     @staticmethod
     def generate_valid_phone() -> str:
-        return f"+1{random.randint(200, 999)}{random.randint(1000000, 9999999)}"
+        return f"+1{_rng.randint(200, 999)}{_rng.randint(1000000, 9999999)}"
 
     @staticmethod
     def generate_valid_version() -> str:
-        return f"{random.randint(0,9)}.{random.randint(0,9)}.{random.randint(0,9)}"
+        return f"{_rng.randint(0,9)}.{_rng.randint(0,9)}.{_rng.randint(0,9)}"
 
 
 class ApiSpecValidations:
@@ -200,19 +190,19 @@ class ApiSpecValidations:
         return {
             "name": name,
             "description": f"Description for {name}",
-            "contextPath": f"/{name.replace('_', '-')}/v{random.randint(1,3)}",
+            "contextPath": f"/{name.replace('_', '-')}/v{_rng.randint(1,3)}",
             "backendServiceUrl": EndpointValidations.DEFAULT_BACKEND_SERVICE_URL, # Corrected variable name
             "status": "DRAFT",
-            "type": random.choice(list(ApiType)).value,
-            "style": random.choice(list(ApiStyle)).value,
-            "authType": random.choice(list(AuthenticatorType)).value,
+            "type": _rng.choice(list(ApiType)).value,
+            "style": _rng.choice(list(ApiStyle)).value,
+            "authType": _rng.choice(list(AuthenticatorType)).value,
             "metaData": {
                 "version": EndpointValidations.generate_valid_version(),
                 "owner": EndpointValidations.generate_random_string(prefix="owner_"),
                 "category": "General",
-                "tags": [f"tag{i}" for i in range(random.randint(1,3))]
+                "tags": [f"tag{i}" for i in range(_rng.randint(1,3))]
             },
-            "addVersionToContextPath": random.choice([True, False]),
+            "addVersionToContextPath": _rng.choice([True, False]),
             "predicates": [],
             "requestPolicies": [],
             "responsePolicies": []
@@ -222,7 +212,7 @@ class ApiSpecValidations:
 class EnvironmentModelValidations:
     @staticmethod
     def get_valid_body() -> Dict[str, Any]:
-        env_type = random.choice(list(EnvironmentType)).value
+        env_type = _rng.choice(list(EnvironmentType)).value
         return {
             "name": f"Env_{env_type}_{EndpointValidations.generate_random_string(5)}",
             "url": f"https://gw.{env_type.lower()}.example.com",
@@ -239,7 +229,7 @@ class EnvironmentModelValidations:
 class CredentialModelValidations:
     @staticmethod
     def get_valid_body() -> List[Dict[str, Any]]: # Changed to list as per API expectation
-        auth_type = random.choice(list(AuthenticatorType)).value
+        auth_type = _rng.choice(list(AuthenticatorType)).value
         credential: Dict[str, Any] = {"authenticatorType": auth_type}
         if auth_type == AuthenticatorType.BASIC.value:
             credential["username"] = EndpointValidations.generate_random_string(prefix="user_")
@@ -248,7 +238,7 @@ class CredentialModelValidations:
             credential["clientId"] = EndpointValidations.generate_random_string(prefix="oauth_client_")
             credential["clientSecret"] = EndpointValidations.generate_random_string(24)
             credential["clientName"] = EndpointValidations.generate_random_string(prefix="OAuthApp_")
-            credential["redirectUrls"] = [f"https://app.example.com/callback{i}" for i in range(random.randint(1,2))]
+            credential["redirectUrls"] = [f"https://app.example.com/callback{i}" for i in range(_rng.randint(1,2))]
         elif auth_type == AuthenticatorType.API_KEY.value:
             credential["apiKeyClientName"] = EndpointValidations.generate_random_string(prefix="apikey_app_")
             # apiKeyClientToken is often generated by the server, so not included here
@@ -261,12 +251,12 @@ class CredentialModelValidations:
 class AuthenticatorModelValidations:
     @staticmethod
     def get_valid_body() -> Dict[str, Any]:
-        auth_type = random.choice(list(AuthenticatorType)).value
+        auth_type = _rng.choice(list(AuthenticatorType)).value
         body = {
             "name": f"{auth_type}_Auth_{EndpointValidations.generate_random_string(4)}",
             "type": auth_type,
             "status": "PENDING", # Default status
-            "defaultAuth": random.choice([True, False]),
+            "defaultAuth": _rng.choice([True, False]),
         }
         if auth_type == AuthenticatorType.OAUTH.value:
             body["tokenIssuerUrl"] = f"https://keycloak.example.com/auth/realms/{EndpointValidations.generate_random_string(5)}"
@@ -284,10 +274,10 @@ class ApiPolicyValidations: # Renamed from Policy to avoid conflict
         return {
             "policyName": "REQUEST_RATE_LIMITER", # This should match an enum if available
             "httpExchange": "REQUEST",
-            "order": random.randint(1, 10),
+            "order": _rng.randint(1, 10),
             "args": {
-                "PER_SECONDS": str(random.randint(1, 60)),
-                "NO_OF_REQUESTS": str(random.randint(5, 100))
+                "PER_SECONDS": str(_rng.randint(1, 60)),
+                "NO_OF_REQUESTS": str(_rng.randint(5, 100))
             }
         }
     # ... (add other policy types)
@@ -301,7 +291,7 @@ class ConsumerModelValidations:
             "name": name,
             "consumerType": "GENERAL", # Default or random from an enum
             "segment": "B2B", # Default or random
-            "status": random.choice(list(ConsumerStatus)).value,
+            "status": _rng.choice(list(ConsumerStatus)).value,
             "source": "MANUAL", # Default or random
             "description": f"Test consumer: {name}",
             "logo": "https://example.com/logo.png",
@@ -313,7 +303,7 @@ class ConsumerModelValidations:
                 "country": "US"
             },
             "contacts": [{
-                "contactType": random.choice(list(ContactType)).value,
+                "contactType": _rng.choice(list(ContactType)).value,
                 "firstName": "Tech",
                 "lastName": "Support",
                 "jobTitle": "Support Lead",
@@ -335,8 +325,8 @@ class ProductModelValidations:
             "status": "DRAFT",
             "segment": "Enterprise",
             "version": EndpointValidations.generate_valid_version(),
-            "premium": random.choice([True, False]),
-            "availableOnDevPortal": random.choice([True, False]),
+            "premium": _rng.choice([True, False]),
+            "availableOnDevPortal": _rng.choice([True, False]),
             "apiSpecs": [], # Typically linked via IDs after creation
             # "productPlanPrices": [] # Also often linked
         }
@@ -354,7 +344,7 @@ class PlanModelValidations:
             "planStatus": "DRAFT", # Or random
             "renewalTypeOptions": ["AUTO", "MANUAL"],
             "subscriptionPeriodOptions": ["MONTHLY", "YEARLY"],
-            "premium": random.choice([True, False]),
+            "premium": _rng.choice([True, False]),
             # "productPlanPrices": [] # Often linked
         }
     # ...
@@ -421,13 +411,13 @@ class MessageBrokerValidations:
         return {
             "name": name,
             "host": "message-broker.example.com",
-            "port": random.choice([5672, 9092]), # RabbitMQ, Kafka defaults
+            "port": _rng.choice([5672, 9092]), # RabbitMQ, Kafka defaults
             "username": EndpointValidations.generate_random_string(prefix="broker_user_"),
             "password": EndpointValidations.generate_random_string(16),
-            "brokerProvider": random.choice(["RABBIT_MQ", "KAFKA"]),
-            "allowedOnDevPortal": random.choice([True, False]),
+            "brokerProvider": _rng.choice(["RABBIT_MQ", "KAFKA"]),
+            "allowedOnDevPortal": _rng.choice([True, False]),
             "status": "DRAFT",
-            "topics": [f"topic_{i}" for i in range(random.randint(1,3))]
+            "topics": [f"topic_{i}" for i in range(_rng.randint(1,3))]
         }
 
 class PolicyTemplateValidations:
@@ -447,7 +437,7 @@ class WorkflowValidations: # Renamed from Wf to Workflow
         # Example for a 'performProcessAction' like endpoint
         return {
              "reason": EndpointValidations.generate_random_string(15, prefix="action_reason_"),
-             "action": random.choice(["PROCESS_NEXT", "WITHDRAW", "TERMINATE"])
+             "action": _rng.choice(["PROCESS_NEXT", "WITHDRAW", "TERMINATE"])
         }
     # Add more specific workflow bodies if needed
 
@@ -0,0 +1,76 @@
+"""
+Field schemas (path, type and required flag per field) of request bodies.
+
+Validator schemas are extracted from a deterministic body, generated from a
+fixed seed, so every call sees the same shape; they're computed once per
+validator and carry an ETag for conditional requests.
+"""
+import hashlib
+import json
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple
+
+from validation.body_pool import generate_body
+
+# Seed of the bodies the validator schemas are extracted from
+SCHEMA_BODY_SEED = 0
+
+
+class FieldSchema(NamedTuple):
+    fields: List[Dict[str, Any]]
+    etag: str
+
+
+def _field_type(value: Any) -> str:
+    # bool before int, as bool is a subclass of int
+    if isinstance(value, bool):
+        return "boolean"
+    elif isinstance(value, int):
+        return "integer"
+    elif isinstance(value, float):
+        return "number"
+    elif isinstance(value, list):
+        return "array"
+    elif isinstance(value, dict):
+        return "object"
+    return "string"
+
+
+def _is_required(path: str) -> bool:
+    # Basic heuristic for required fields
+    path = path.lower()
+    return "name" in path or path.endswith(".id")
+
+
+def extract_field_schema(body: Any, infer_required: bool = True) -> List[Dict[str, Any]]:
+    """
+    Walk body once, listing every field in the order of get_all_field_paths: nested
+    objects are descended into, and lists of objects through their first item ("tags[0].name").
+    Without infer_required, every field is reported as optional.
+    """
+    fields: List[Dict[str, Any]] = []
+
+    def walk(node: Dict[str, Any], prefix: str):
+        for key, value in node.items():
+            path = f"{prefix}.{key}" if prefix else key
+            fields.append({
+                "path": path,
+                "type": _field_type(value),
+                "required": infer_required and _is_required(path),
+            })
+            if isinstance(value, dict):
+                walk(value, path)
+            elif isinstance(value, list) and value and isinstance(value[0], dict):
+                walk(value[0], f"{path}[0]")
+
+    if isinstance(body, dict):
+        walk(body, "")
+    return fields
+
+
+@lru_cache(maxsize=None)
+def get_validator_field_schema(validator: Any) -> FieldSchema:
+    """The cached field schema of a ValidatorFactory validator; the fields must not be modified."""
+    fields = extract_field_schema(generate_body(validator, SCHEMA_BODY_SEED))
+    digest = hashlib.sha1(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+    return FieldSchema(fields, f'"{digest}"')
@@ -0,0 +1,94 @@
+"""
+Resolution of request URLs to ValidatorFactory keys.
+
+Routes are stored in a trie over their path segments in reverse order, so a URL
+is matched by walking its segments from the right: the first (rightmost)
+position where a route ends wins, as in the original right-to-left probing of
+ValidatorFactory.get_validator. A "{param}" route segment matches any one
+segment. Resolved paths and fuzzy matches are memoized.
+"""
+from difflib import get_close_matches
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+
+class _Node:
+    __slots__ = ("children", "param", "key")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.param: Optional["_Node"] = None
+        self.key: Optional[str] = None
+
+
+class RouteIndex:
+    """A reversed-segment trie mapping route patterns like "api-specs" or "products/{id}/plans" to keys."""
+
+    def __init__(self, routes: Iterable[str] = ()):
+        self._root = _Node()
+        for route in routes:
+            self.add(route)
+
+    def add(self, pattern: str, key: Optional[str] = None) -> None:
+        node = self._root
+        # An empty pattern is kept as a single empty segment, the one between the slashes of "http://"
+        segments = pattern.lower().strip("/").split("/")
+        for segment in reversed(segments):
+            if segment.startswith("{") and segment.endswith("}"):
+                if node.param is None:
+                    node.param = _Node()
+                node = node.param
+            else:
+                node = node.children.setdefault(segment, _Node())
+        node.key = key if key is not None else pattern.lower()
+
+    def match(self, path: str) -> Optional[str]:
+        """The key of the route ending at the rightmost possible segment of path, or None."""
+        segments = path.lower().strip("/").split("/")
+        for end in range(len(segments) - 1, -1, -1):
+            key = self._match_at(self._root, segments, end)
+            if key is not None:
+                return key
+        return None
+
+    def _match_at(self, node: _Node, segments: List[str], index: int) -> Optional[str]:
+        # Literal segments take precedence over parameters; the longest route wins at each end position
+        if index >= 0:
+            child = node.children.get(segments[index])
+            if child is not None:
+                key = self._match_at(child, segments, index - 1)
+                if key is not None:
+                    return key
+            if node.param is not None:
+                key = self._match_at(node.param, segments, index - 1)
+                if key is not None:
+                    return key
+        return node.key
+
+
+_index: Optional[RouteIndex] = None
+
+
+def get_route_index() -> RouteIndex:
+    global _index
+    if _index is None:
+        from validation.endpoint_validations import ValidatorFactory
+        index = RouteIndex(ValidatorFactory.get_all_validator_names())
+        # ValidatorFactory.get_validator("") falls back to the default validator
+        index.add("", "default")
+        _index = index
+    return _index
+
+
+@lru_cache(maxsize=4096)
+def resolve_endpoint_key(path: str) -> Optional[str]:
+    """The ValidatorFactory key for a request URL or path, or None if no route matches."""
+    return get_route_index().match(path)
+
+
+@lru_cache(maxsize=1024)
+def closest_endpoint_key(name: str, cutoff: float = 0.6) -> Optional[str]:
+    """The ValidatorFactory key closest to name, for names without an exact validator."""
+    from validation.endpoint_validations import ValidatorFactory
+    matches = get_close_matches(name, ValidatorFactory.get_all_validator_names(), n=1, cutoff=cutoff)
+    return matches[0] if matches else None